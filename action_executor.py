@@ -1,15 +1,12 @@
 from pynput.keyboard import Key, Controller as KeyboardController
 from pynput.mouse import Button, Controller as MouseController
 import global_state
-import os
-import threading
-import time
+from action_scheduler import ActionScheduler, MacroStep, parse_macro
+from app_logging import get_logger
 import random
-import sys
 
-# Conditionally import winsound for Windows-specific sound playback
-if sys.platform == "win32":
-    import winsound
+action_log = get_logger('actions')
+
 
 class ActionExecutor:
     def __init__(self):
@@ -20,6 +17,9 @@ class ActionExecutor:
         """
         self.keyboard = None
         self.mouse = None
+        # Key releases and macro steps run on this thread, so execute() never sleeps.
+        self.scheduler = ActionScheduler(self._perform_step)
+        self._macro_cache = {}
         # Maps string representations to pynput's special Key objects
         self.special_keys = {
             'alt': Key.alt, 'alt_l': Key.alt_l, 'alt_r': Key.alt_r,
@@ -47,44 +47,61 @@ class ActionExecutor:
             self.keyboard = KeyboardController()
         if self.mouse is None:
             self.mouse = MouseController()
+        self.scheduler.start()
+
+    def _key(self, name):
+        return self.special_keys.get(name.lower(), name)
+
+    def _perform_step(self, kind, target):
+        """Runs one scheduled step; called on the scheduler thread."""
+        if kind == 'key_down':
+            self.keyboard.press(self._key(target))
+        elif kind == 'key_up':
+            self.keyboard.release(self._key(target))
+        elif kind == 'mouse_down':
+            self.mouse.press(getattr(Button, target))
+        elif kind == 'mouse_up':
+            self.mouse.release(getattr(Button, target))
+
+    def macro_steps(self, text):
+        """Parsed steps for a macro string (cached, since the same macros fire repeatedly)."""
+        steps = self._macro_cache.get(text)
+        if steps is None:
+            steps = self._macro_cache[text] = parse_macro(text)
+        return steps
 
-    def execute(self, action):
-        """Executes a given key or mouse action."""
+    def stop(self):
+        self.scheduler.stop()
+
+    def execute(self, action, sound_path=None):
+        """Executes a given key or mouse action. `sound_path` overrides the global action sound."""
         self._lazy_init_controllers()
 
         action_type = action.get('type')
         detail = action.get('detail')
 
-        # Play a sound notification in a background thread to avoid blocking
-        if global_state.play_action_sound and global_state.action_sound_path:
-            if os.path.exists(global_state.action_sound_path):
-                # Use winsound on Windows for better compatibility; it's built-in.
-                if sys.platform == "win32":
-                    sound_thread = threading.Thread(target=lambda: winsound.PlaySound(global_state.action_sound_path, winsound.SND_FILENAME), daemon=True)
-                    sound_thread.start()
-                else:
-                    # Provide a message for non-Windows users as playsound is removed.
-                    print(f"Warning: Sound playback is currently only supported on Windows.")
-            else:
-                print(f"Warning: Sound file not found at '{global_state.action_sound_path}'")
+        # Only queues the cue: decoding, mixing and output happen on the audio worker thread.
+        if global_state.play_action_sound:
+            global_state.audio_cues.play(sound_path or global_state.action_sound_path)
 
         if not detail:
             return
 
         try:
             if action_type == 'Key Press':
-                key_to_press = self.special_keys.get(detail.lower(), detail)
-
-                # Press the key
-                self.keyboard.press(key_to_press)
-
-                # **MODIFICATION**: Wait for a short, random interval to simulate a real key press
-                time.sleep(random.uniform(0.04, 0.09))  # 40ms to 90ms
+                # Hold the key for a short, random interval (40-90 ms) to simulate a real key press.
+                # The release is scheduled rather than slept for, so the caller isn't blocked; a
+                # repeated press of the same key waits for the previous one's release.
+                self.scheduler.schedule([MacroStep(0.0, 'key_down', detail),
+                                         MacroStep(random.uniform(0.04, 0.09), 'key_up', detail)],
+                                        after_release=True)
 
-                # Release the key
-                self.keyboard.release(key_to_press)
+                action_log.info("Pressed key '%s'", detail)
 
-                print(f"Action Executed: Pressed key '{detail}' with simulated duration.")
+            elif action_type == 'Macro':
+                steps = self.macro_steps(detail)
+                self.scheduler.schedule(steps)
+                action_log.info("Started macro with %d steps", len(steps))
 
             elif action_type == 'Mouse Click':
                 if detail.lower() == 'left':
@@ -93,7 +110,7 @@ class ActionExecutor:
                 elif detail.lower() == 'right':
                     self.mouse.press(Button.right)
                     self.mouse.release(Button.right)
-                print(f"Action Executed: {detail} mouse click")
+                action_log.info("%s mouse click", detail)
 
         except Exception as e:
-            print(f"Error during action execution: {e}")
\ No newline at end of file
+            action_log.error("Error during action execution: %s", e)
\ No newline at end of file
@@ -0,0 +1,179 @@
+# In action_scheduler.py
+"""
+A single timer thread that runs scheduled steps (key down/up, mouse button, ...) at absolute
+times, so overlapping macros interleave without a thread or a sleep per action.
+
+Due steps sit in a heap ordered by (due time, insertion order). The thread sleeps until shortly
+before the earliest one and busy-waits the rest of the way, because sleep() alone can overshoot
+by a millisecond or more and combos need steps to land within a few ms.
+
+Macros are written as a list of steps separated by commas or spaces:
+
+    down:<key>  up:<key>  tap:<key>         key down / key up / down, then up TAP_HOLD later
+    mdown:<button>  mup:<button>  click:<button>  mouse button (left, right, middle)
+    wait:<ms>                                delay before the following steps
+
+e.g. "down:ctrl, tap:c, up:ctrl, wait:20, click:left".
+
+Keys and mouse buttons pressed by a step stay held until their release step runs. cancel_all()
+and stop() drop the pending steps and release whatever is still held, so a macro cut short
+(e.g. at shutdown) doesn't leave a key held down in the OS.
+"""
+import heapq
+import itertools
+import threading
+import time
+from collections import namedtuple
+
+from app_logging import get_logger
+
+MacroStep = namedtuple('MacroStep', 'offset kind target')  # offset: seconds after the macro starts
+
+STEP_KINDS = {'down': 'key_down', 'up': 'key_up', 'mdown': 'mouse_down', 'mup': 'mouse_up'}
+RELEASE_KINDS = {'key_down': 'key_up', 'mouse_down': 'mouse_up'}
+MOUSE_BUTTONS = ('left', 'right', 'middle')
+TAP_HOLD = 0.02
+# Wake this long before a due step and spin for the remainder.
+SPIN_WINDOW = 0.002
+
+action_log = get_logger('actions')
+
+
+def parse_macro(text):
+    """Parses macro text into a list of MacroStep in firing order. Raises ValueError on bad steps."""
+    steps = []
+    offset = 0.0
+    for token in text.replace(',', ' ').split():
+        name, _, argument = token.partition(':')
+        name = name.lower()
+        if not argument:
+            raise ValueError(f"Macro step '{token}' needs an argument, e.g. 'tap:a' or 'wait:20'")
+        if name == 'wait':
+            try:
+                delay = float(argument) / 1000.0
+            except ValueError:
+                raise ValueError(f"Invalid delay in macro step '{token}'") from None
+            if delay < 0:
+                raise ValueError(f"Negative delay in macro step '{token}'")
+            offset += delay
+        elif name in ('mdown', 'mup', 'click') and argument.lower() not in MOUSE_BUTTONS:
+            raise ValueError(f"Unknown mouse button in macro step '{token}' (use {', '.join(MOUSE_BUTTONS)})")
+        elif name in STEP_KINDS:
+            target = argument.lower() if name in ('mdown', 'mup') else argument
+            steps.append(MacroStep(offset, STEP_KINDS[name], target))
+        elif name == 'tap':
+            steps.append(MacroStep(offset, 'key_down', argument))
+            offset += TAP_HOLD
+            steps.append(MacroStep(offset, 'key_up', argument))
+        elif name == 'click':
+            steps.append(MacroStep(offset, 'mouse_down', argument.lower()))
+            steps.append(MacroStep(offset, 'mouse_up', argument.lower()))
+        else:
+            raise ValueError(f"Unknown macro step '{token}'")
+    return steps
+
+
+class ActionScheduler:
+    """Runs `perform(kind, target)` for each scheduled step at its due time on one thread."""
+
+    def __init__(self, perform, spin_window=SPIN_WINDOW):
+        self.perform = perform
+        self.spin_window = spin_window
+        self._heap = []
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        # Held around each step, so cancel_all() never releases keys while a press is under way.
+        self._perform_lock = threading.Lock()
+        # Bumped by cancel_all(); a step taken off the heap before the bump is not run.
+        self._generation = 0
+        # (release kind, target) of every key / mouse button pressed and not yet released.
+        self._held = set()
+        self._running = False
+        self._thread = None
+        self.steps_run = 0
+        self.max_lateness = 0.0
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="action-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the timer thread, dropping pending steps and releasing held keys and buttons."""
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        self.cancel_all()
+
+    def schedule(self, steps, start=None, after_release=False):
+        """
+        Queues MacroSteps to run at start + step.offset (start defaults to now). With after_release,
+        start is pushed back so no press in `steps` runs before a release of the same key or button
+        that is already pending (a repeated key press then can't overlap the previous one).
+        """
+        if start is None:
+            start = time.perf_counter()
+        with self._condition:
+            if after_release:
+                start = max([start] + [due - step.offset for step in steps if step.kind in RELEASE_KINDS
+                                       for due, _, kind, target in self._heap
+                                       if kind == RELEASE_KINDS[step.kind] and target == step.target])
+            for step in steps:
+                heapq.heappush(self._heap, (start + step.offset, next(self._order), step.kind, step.target))
+            self._condition.notify()
+
+    def pending(self):
+        with self._condition:
+            return len(self._heap)
+
+    def cancel_all(self):
+        """Drops every pending step and releases the keys and mouse buttons still held."""
+        with self._condition:
+            self._heap = []
+            self._generation += 1
+        with self._perform_lock:
+            for release_kind, target in sorted(self._held):
+                self._perform(release_kind, target)
+            self._held.clear()
+
+    def _perform(self, kind, target):
+        try:
+            self.perform(kind, target)
+        except Exception as e:
+            action_log.error("Error during scheduled action step %s '%s': %s", kind, target, e)
+            return
+        if kind in RELEASE_KINDS:
+            self._held.add((RELEASE_KINDS[kind], target))
+        else:
+            self._held.discard((kind, target))
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._heap:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                due = self._heap[0][0]
+                remaining = due - time.perf_counter()
+                if remaining > self.spin_window:
+                    # New, earlier steps notify the condition and wake us to re-check.
+                    self._condition.wait(remaining - self.spin_window)
+                    continue
+            while time.perf_counter() < due:
+                pass
+            with self._condition:
+                if not self._heap or self._heap[0][0] != due:
+                    continue
+                _, _, kind, target = heapq.heappop(self._heap)
+                generation = self._generation
+            self.max_lateness = max(self.max_lateness, time.perf_counter() - due)
+            with self._perform_lock:
+                if generation != self._generation:
+                    continue
+                self._perform(kind, target)
+            self.steps_run += 1
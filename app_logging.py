@@ -0,0 +1,115 @@
+# In app_logging.py
+"""
+Non-blocking diagnostics for the hot paths (hit detection, group checks, action execution,
+pose logging).
+
+Loggers live under the "m2k" namespace, one per category (get_logger('hits') -> "m2k.hits").
+Records go through a per-category token-bucket rate limit and then onto a bounded queue, all in
+the calling thread. A QueueListener thread does the formatting and the actual write. A stalled
+terminal or pipe therefore fills the queue, and further records are dropped and counted instead
+of blocking the GUI or sensor thread. Records below the configured level cost one level check.
+"""
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+
+ROOT_LOGGER = "m2k"
+LOG_FORMAT = "%(asctime)s.%(msecs)03d %(levelname)-7s %(name)-11s %(message)s"
+DATE_FORMAT = "%H:%M:%S"
+QUEUE_SIZE = 10000
+
+# Category -> (messages per second, burst). Others get DEFAULT_RATE_LIMIT.
+DEFAULT_RATE_LIMIT = (50.0, 100)
+RATE_LIMITS = {'pose': (200.0, 200)}
+
+_listener = None
+_queue_handler = None
+
+
+def get_logger(category):
+    return logging.getLogger(f"{ROOT_LOGGER}.{category}")
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per logger name; notes how many records were suppressed on the next one let through."""
+
+    def __init__(self, limits=None, default=DEFAULT_RATE_LIMIT):
+        super().__init__()
+        self.limits = dict(RATE_LIMITS if limits is None else limits)
+        self.default = default
+        self._buckets = {}
+        self.suppressed = {}
+
+    def filter(self, record):
+        category = record.name.rpartition('.')[2]
+        rate, burst = self.limits.get(category, self.default)
+        now = time.monotonic()
+        tokens, last = self._buckets.get(category, (burst, now))
+        tokens = min(burst, tokens + (now - last) * rate)
+        if tokens < 1.0:
+            self._buckets[category] = (tokens, now)
+            self.suppressed[category] = self.suppressed.get(category, 0) + 1
+            return False
+        self._buckets[category] = (tokens - 1.0, now)
+        skipped = self.suppressed.pop(category, 0)
+        if skipped:
+            record.msg = f"{record.msg} [{skipped} earlier '{category}' messages suppressed]"
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of raising when the queue is full."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        """
+        Queues the record as is: QueueHandler.prepare would format it here, on the calling thread.
+        The listener formats it later, so don't mutate objects passed as log arguments afterwards.
+        """
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(level=logging.INFO, stream=None, limits=None):
+    """Routes the "m2k" loggers through the rate limit and background writer. Safe to call again."""
+    global _listener, _queue_handler
+    shutdown_logging()
+    log_queue = queue.Queue(QUEUE_SIZE)
+    _queue_handler = DroppingQueueHandler(log_queue)
+    _queue_handler.addFilter(RateLimitFilter(limits))
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(logging.Formatter(LOG_FORMAT, DATE_FORMAT))
+    _listener = logging.handlers.QueueListener(log_queue, output)
+    _listener.start()
+
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.handlers = [_queue_handler]
+    logger.setLevel(level)
+    logger.propagate = False
+    return _queue_handler
+
+
+def set_level(level):
+    logging.getLogger(ROOT_LOGGER).setLevel(level)
+
+
+def dropped_count():
+    return _queue_handler.dropped if _queue_handler else 0
+
+
+def shutdown_logging():
+    """Flushes queued records and stops the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,301 @@
+# In audio_cues.py
+"""
+Action sound cues: decoded once, kept in memory, and played by one persistent worker thread.
+
+play(path) only enqueues a request, so the trigger path does no file I/O and creates no threads.
+The worker decodes (and caches) a file the first time it is needed, or ahead of time via
+preload(), and mixes every active cue into fixed-size blocks for the output backend. Cues that
+overlap are summed (and clipped) instead of cutting each other off.
+
+Backends, picked by create_backend():
+    SoundDeviceBackend  real-time output through the optional `sounddevice` package
+    WinsoundBackend     Windows fallback, plays each mixed cue from memory in one call
+    FileSinkBackend     writes the mix to a WAV file (tests, debugging)
+    NullBackend         discards the mix
+
+Only PCM WAV files can be decoded (the standard library has no MP3 decoder).
+"""
+import io
+import queue
+import sys
+import threading
+import time
+import wave
+
+import numpy as np
+
+from app_logging import get_logger
+
+OUTPUT_RATE = 44100
+OUTPUT_CHANNELS = 2
+BLOCK_FRAMES = 512
+MAX_VOICES = 16
+
+audio_log = get_logger('audio')
+
+
+def decode_wav(path, rate=OUTPUT_RATE, channels=OUTPUT_CHANNELS):
+    """Reads a PCM WAV file into float32 frames (n, channels) at `rate`, in [-1, 1]."""
+    with wave.open(path, 'rb') as wav:
+        width = wav.getsampwidth()
+        source_channels = wav.getnchannels()
+        source_rate = wav.getframerate()
+        raw = wav.readframes(wav.getnframes())
+    if width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif width == 2:
+        samples = np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768.0
+    elif width == 3:
+        bytes_ = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+        values = (bytes_[:, 0].astype(np.int32) | (bytes_[:, 1].astype(np.int32) << 8) |
+                  (bytes_[:, 2].astype(np.int8).astype(np.int32) << 16))
+        samples = values.astype(np.float32) / 8388608.0
+    elif width == 4:
+        samples = np.frombuffer(raw, dtype='<i4').astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {width} bytes")
+    frames = samples.reshape(-1, source_channels)
+
+    if source_channels != channels:
+        mono = frames.mean(axis=1, keepdims=True)
+        frames = np.repeat(mono, channels, axis=1)
+    if source_rate != rate and len(frames):
+        count = int(round(len(frames) * rate / source_rate))
+        positions = np.linspace(0, len(frames) - 1, count)
+        frames = np.stack([np.interp(positions, np.arange(len(frames)), frames[:, c]) for c in range(channels)],
+                          axis=1)
+    return np.ascontiguousarray(frames, dtype=np.float32)
+
+
+def to_pcm16(block):
+    return (np.clip(block, -1.0, 1.0) * 32767.0).astype('<i2').tobytes()
+
+
+# --- Backends ---
+
+class NullBackend:
+    name = "null"
+    # Non-real-time backends don't block in write(), so the worker paces itself.
+    realtime = False
+
+    def open(self, rate, channels):
+        self.frames_written = 0
+
+    def write(self, block):
+        self.frames_written += len(block)
+
+    def close(self):
+        pass
+
+
+class FileSinkBackend(NullBackend):
+    """Appends the mixed output to a 16-bit WAV file."""
+    name = "file"
+
+    def __init__(self, path):
+        self.path = path
+        self._wav = None
+
+    def open(self, rate, channels):
+        super().open(rate, channels)
+        self._wav = wave.open(self.path, 'wb')
+        self._wav.setnchannels(channels)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(rate)
+
+    def write(self, block):
+        super().write(block)
+        self._wav.writeframes(to_pcm16(block))
+
+    def close(self):
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+
+class SoundDeviceBackend:
+    name = "sounddevice"
+    realtime = True
+
+    def __init__(self):
+        import sounddevice
+        self._sounddevice = sounddevice
+        self._stream = None
+
+    def open(self, rate, channels):
+        self._stream = self._sounddevice.OutputStream(samplerate=rate, channels=channels, dtype='float32',
+                                                      blocksize=BLOCK_FRAMES)
+        self._stream.start()
+
+    def write(self, block):
+        self._stream.write(block)
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+
+class WinsoundBackend:
+    """
+    winsound can't stream, so the worker hands it whole cues (every cue playing at that moment,
+    mixed to the end) and each is played synchronously from memory in one PlaySound call. Cues
+    triggered meanwhile are mixed into the next call instead of overlapping.
+    """
+    name = "winsound"
+    realtime = True
+    whole_cues = True
+
+    def __init__(self):
+        import winsound
+        self._winsound = winsound
+
+    def open(self, rate, channels):
+        self._rate = rate
+        self._channels = channels
+
+    def write(self, block):
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wav:
+            wav.setnchannels(self._channels)
+            wav.setsampwidth(2)
+            wav.setframerate(self._rate)
+            wav.writeframes(to_pcm16(block))
+        self._winsound.PlaySound(buffer.getvalue(), self._winsound.SND_MEMORY)
+
+    def close(self):
+        pass
+
+
+def create_backend(preferred=None):
+    """The first available of sounddevice and winsound (Windows), else NullBackend."""
+    if preferred is not None:
+        return preferred
+    try:
+        return SoundDeviceBackend()
+    except (ImportError, OSError):
+        pass
+    if sys.platform == "win32":
+        return WinsoundBackend()
+    audio_log.warning("No audio output available (install 'sounddevice'); action sounds are disabled.")
+    return NullBackend()
+
+
+# --- Cache and worker ---
+
+class AudioCuePlayer:
+    def __init__(self, backend=None, rate=OUTPUT_RATE, channels=OUTPUT_CHANNELS):
+        self.backend = backend
+        self.rate = rate
+        self.channels = channels
+        self.cues = {}
+        self._failed = set()
+        self._requests = queue.SimpleQueue()
+        self._voices = []
+        self._thread = None
+        self._running = False
+        self.played = 0
+
+    def start(self):
+        if self.backend is None:
+            self.backend = create_backend()
+        self.backend.open(self.rate, self.channels)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="audio-cues", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._requests.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        self.backend.close()
+
+    def play(self, path):
+        """Queues a cue. Cheap enough for the trigger path: no I/O, no thread creation."""
+        if path:
+            self._requests.put(('play', path))
+
+    def preload(self, paths):
+        """Decodes the given files on the worker thread ahead of their first use."""
+        for path in paths:
+            if path:
+                self._requests.put(('load', path))
+
+    def _load(self, path):
+        cue = self.cues.get(path)
+        if cue is not None or path in self._failed:
+            return cue
+        try:
+            cue = decode_wav(path, self.rate, self.channels)
+        except (OSError, EOFError, ValueError, wave.Error) as e:
+            self._failed.add(path)
+            audio_log.warning("Could not load sound '%s' (only PCM WAV files are supported): %s", path, e)
+            return None
+        self.cues[path] = cue
+        return cue
+
+    def _handle(self, request):
+        kind, path = request
+        cue = self._load(path)
+        if kind == 'play' and cue is not None and len(cue):
+            if len(self._voices) >= MAX_VOICES:
+                self._voices.pop(0)
+            self._voices.append([cue, 0])
+            self.played += 1
+
+    def _mix_to_end(self):
+        """Mixes the rest of every active voice into one buffer and ends them."""
+        length = max(len(cue) - position for cue, position in self._voices)
+        mix = np.zeros((length, self.channels), dtype=np.float32)
+        for cue, position in self._voices:
+            mix[:len(cue) - position] += cue[position:]
+        self._voices = []
+        return np.clip(mix, -1.0, 1.0, out=mix)
+
+    def _run(self):
+        block = np.zeros((BLOCK_FRAMES, self.channels), dtype=np.float32)
+        block_seconds = BLOCK_FRAMES / self.rate
+        next_block = None
+        while self._running:
+            if not self._voices:
+                # Idle: block until the next request instead of spinning out silence.
+                request = self._requests.get()
+                if request is None:
+                    break
+                self._handle(request)
+                next_block = time.perf_counter()
+                continue
+            while True:
+                try:
+                    request = self._requests.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    self._running = False
+                    break
+                self._handle(request)
+
+            if getattr(self.backend, 'whole_cues', False):
+                self.backend.write(self._mix_to_end())
+                continue
+
+            block.fill(0.0)
+            remaining = []
+            for voice in self._voices:
+                cue, position = voice
+                count = min(BLOCK_FRAMES, len(cue) - position)
+                block[:count] += cue[position:position + count]
+                voice[1] = position + count
+                if voice[1] < len(cue):
+                    remaining.append(voice)
+            self._voices = remaining
+            np.clip(block, -1.0, 1.0, out=block)
+            self.backend.write(block.copy())
+
+            if not self.backend.realtime:
+                next_block += block_seconds
+                delay = next_block - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
@@ -0,0 +1,129 @@
+# In audit_log.py
+"""
+Append-only JSONL audit log of every group completion and action dispatch, for reviewing false
+triggers after a session.
+
+The log subscribes to GroupCompleted and ActionDispatched on the event bus, so the trigger path
+only pays for the bus enqueue. A background thread drains the subscription a few times a
+second and writes through a buffered file. When the file passes max_bytes it is rotated like
+logging's RotatingFileHandler (trigger_audit.jsonl -> .1 -> .2 ...).
+
+One line per event:
+
+    {"event": "group_completed", "t": <sample time of the completing hit>, "wall": <unix time>,
+     "group_id": ..., "group": <name>, "hit_times": {point id: sample time}, "detect_ms": ...}
+    {"event": "action_dispatched", "t": ..., "wall": ..., "group_id": ..., "action": {...},
+     "stockpiled": false, "latency_ms": <completing hit -> dispatch>}
+
+action_dispatched is written when the action actually runs. For a stockpiled action that is
+when it leaves the stockpile (drain or button), with "stockpiled": true and latency_ms null.
+
+hit_times is null for gesture-triggered groups. `t` is time.monotonic(), and `wall` maps it to
+Unix time.
+"""
+import json
+import os
+import threading
+import time
+
+from app_logging import get_logger
+from event_bus import ActionDispatched, GroupCompleted
+
+DEFAULT_AUDIT_PATH = "trigger_audit.jsonl"
+
+trigger_log = get_logger('audit')
+
+
+class AuditLog:
+    def __init__(self, event_bus, path=DEFAULT_AUDIT_PATH, max_bytes=5 * 1024 * 1024, backup_count=3,
+                 flush_interval=0.5):
+        self.event_bus = event_bus
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.enabled = False
+        self.written = 0
+        self._subscription = None
+        self._file = None
+        self._stop = threading.Event()
+        self._thread = None
+        # Completion time per group, to measure hit -> dispatch latency.
+        self._completions = {}
+        self._wall_offset = time.time() - time.monotonic()
+
+    def start(self):
+        self._subscription = self.event_bus.subscribe('audit', capacity=4096,
+                                                      event_types=(GroupCompleted, ActionDispatched))
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-log", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        if self._subscription is not None:
+            self.event_bus.unsubscribe(self._subscription)
+            self._subscription = None
+        self._close_file()
+
+    @property
+    def dropped(self):
+        return self._subscription.dropped if self._subscription else 0
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self._write_pending()
+        self._write_pending()
+
+    def _write_pending(self):
+        events = self._subscription.drain()
+        if not events:
+            return
+        if not self.enabled:
+            self._close_file()
+            return
+        lines = ''.join(json.dumps(self._record(event)) + '\n' for event in events)
+        try:
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8', buffering=64 * 1024)
+            self._file.write(lines)
+            self._file.flush()
+            self.written += len(events)
+            if self._file.tell() >= self.max_bytes:
+                self._rotate()
+        except OSError as e:
+            trigger_log.warning("Could not write trigger audit log '%s': %s", self.path, e)
+            self._close_file()
+
+    def _record(self, event):
+        if isinstance(event, GroupCompleted):
+            self._completions[event.group_id] = event.timestamp
+            hit_times = dict(event.hit_times) if event.hit_times is not None else None
+            return {'event': 'group_completed', 't': event.timestamp, 'wall': event.timestamp + self._wall_offset,
+                    'group_id': event.group_id, 'group': event.group.get('name', 'Unnamed'), 'hit_times': hit_times,
+                    'detect_ms': (event.detected - event.timestamp) * 1000.0 if event.detected else None}
+        completed = None if event.stockpiled else self._completions.pop(event.group_id, None)
+        return {'event': 'action_dispatched', 't': event.timestamp, 'wall': event.timestamp + self._wall_offset,
+                'group_id': event.group_id, 'action': event.action, 'stockpiled': event.stockpiled,
+                'latency_ms': (event.timestamp - completed) * 1000.0 if completed is not None else None}
+
+    def _rotate(self):
+        self._close_file()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def _close_file(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
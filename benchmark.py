@@ -0,0 +1,471 @@
+# In benchmark.py
+"""
+Headless micro- and macro-benchmarks for the motion pipeline.
+
+    python benchmark.py --save                 # record a baseline
+    python benchmark.py --threshold 0.15       # compare against it, fail on >15% regressions
+    python benchmark.py --check                # only run the quaternion_math property checks
+
+No controller, SDL or OpenGL is required; only numpy and the standard library.
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import global_state
+from config_manager import read_config_file, write_config_file
+from madgwick_ahrs import MadgwickAHRS
+from quaternion_math import quaternion_multiply, rotate_point_by_quaternion, quaternion_slerp, quaternion_to_euler, \
+    euler_to_quaternion, rotate_points_by_quaternion_batch, quaternion_slerp_batch
+from motion_engine import detect_point_hits, evaluate_groups, apply_point_events, GroupIndex
+from point_store import ReferencePointStore
+from filter_bank import SensorFilterBank, FILTER_TYPES
+from sensor_pipeline import SensorPipeline
+from motion_history import MotionHistory
+from gesture_recognizer import GestureRecognizer, GestureTemplate
+import test_quaternion_math as quaternion_tests
+from test_quaternion_math import random_unit_quaternions
+
+DEFAULT_BASELINE_PATH = "benchmark_baseline.json"
+DEFAULT_THRESHOLD = 0.10
+POINT_COUNTS = (10, 100, 1000, 10000)
+SEED = 1234
+
+
+# --- Synthetic data ---
+
+def make_reference_points(count, rng):
+    positions = rng.uniform(-0.6, 0.6, size=(count, 3))
+    return [{'id': f"p{i}", 'position': list(positions[i]), 'hit': False, 'is_active': True, 'chain_parent': None}
+            for i in range(count)]
+
+
+def make_groups(points, points_per_group=4):
+    groups = {}
+    for start in range(0, len(points), points_per_group):
+        group_id = f"group_{start // points_per_group}"
+        groups[group_id] = {
+            "name": group_id,
+            "point_ids": {p['id'] for p in points[start:start + points_per_group]},
+            "hit_timestamps": {},
+            "action": {"type": "Key Press", "detail": ""}
+        }
+    return groups
+
+
+def make_synthetic_session(duration_s=10.0, sample_rate=200.0):
+    """
+    Generates gyro (rad/s) and accel (g) streams for a controller sweeping back and forth
+    around its pitch and yaw axes. Accel is gravity expressed in the controller frame.
+    """
+    n = int(duration_s * sample_rate)
+    t = np.arange(n) / sample_rate
+    pitch = 0.8 * np.sin(2 * np.pi * 0.5 * t)
+    yaw = 0.6 * np.sin(2 * np.pi * 0.3 * t + 0.7)
+    gyro = np.zeros((n, 3))
+    gyro[:, 0] = np.gradient(pitch, t)
+    gyro[:, 1] = np.gradient(yaw, t)
+    accel = np.zeros((n, 3))
+    accel[:, 0] = -np.sin(yaw) * np.cos(pitch)
+    accel[:, 1] = np.sin(pitch)
+    accel[:, 2] = np.cos(yaw) * np.cos(pitch)
+    return gyro, accel, 1.0 / sample_rate
+
+
+# --- Timing ---
+
+def time_callable(func, number, repeat):
+    """Returns per-call seconds for each of `repeat` runs of `number` calls."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return timings
+
+
+def auto_number(func, target_s=0.05):
+    """Picks a call count so that one timing run lasts roughly target_s."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= target_s or number >= 1_000_000:
+            return number
+        number = max(number * 2, int(number * target_s / max(elapsed, 1e-9)))
+
+
+# --- Benchmark definitions ---
+# Each entry builds its fixtures and returns a zero-argument callable to time.
+
+def bench_quaternion_multiply(rng):
+    q1, q2 = rng.normal(size=4), rng.normal(size=4)
+    return lambda: quaternion_multiply(q1, q2)
+
+
+def bench_rotate_point_by_quaternion(rng):
+    q = rng.normal(size=4)
+    q /= np.linalg.norm(q)
+    point = np.array([0.0, 0.0, 0.5])
+    return lambda: rotate_point_by_quaternion(point, q)
+
+
+def bench_quaternion_slerp(rng):
+    q1 = euler_to_quaternion(10.0, 20.0, 30.0)
+    q2 = euler_to_quaternion(40.0, -10.0, 5.0)
+    return lambda: quaternion_slerp(q1, q2, 0.3)
+
+
+def bench_quaternion_to_euler(rng):
+    q = euler_to_quaternion(10.0, 20.0, 30.0)
+    return lambda: quaternion_to_euler(q)
+
+
+def bench_update_imu(rng):
+    ahrs = MadgwickAHRS(sample_period=1 / 200, beta=0.1, zeta=0.05)
+    gyro = np.array([0.1, -0.05, 0.02])
+    accel = np.array([0.02, 0.01, 0.99])
+    return lambda: ahrs.update_imu(gyro, accel)
+
+
+def bench_rotate_points_batch(rng):
+    q = rng.normal(size=4)
+    q /= np.linalg.norm(q)
+    points = rng.normal(size=(1000, 3))
+    return lambda: rotate_points_by_quaternion_batch(points, q)
+
+
+def bench_quaternion_slerp_batch(rng):
+    q1 = rng.normal(size=(1000, 4))
+    q2 = rng.normal(size=(1000, 4))
+    return lambda: quaternion_slerp_batch(q1, q2, 0.3)
+
+
+def make_filter_bank_bench(filter_type):
+    def bench(rng):
+        bank = SensorFilterBank(channels=6)
+        bank.configure(filter_type=filter_type, beta=0.05)
+        sample = rng.normal(size=6)
+        return lambda: bank.update(sample, 0.005)
+    return bench
+
+
+def make_filter_block_bench(filter_type, rows):
+    def bench(rng):
+        bank = SensorFilterBank(channels=6)
+        bank.configure(filter_type=filter_type, beta=0.05)
+        block = rng.normal(size=(rows, 6))
+        return lambda: bank.process_block(block, 0.005)
+    return bench
+
+
+def make_hit_detection_bench(count):
+    def bench(rng):
+        points = ReferencePointStore(make_reference_points(count, rng))
+        history = {}
+        # A tip far away from every point measures the steady-state cost of a miss.
+        tip = np.array([5.0, 5.0, 5.0])
+        return lambda: detect_point_hits(points, tip, 0.15, history, 0.0, 2.0)
+    return bench
+
+
+def make_swept_hit_detection_bench(count):
+    def bench(rng):
+        points = ReferencePointStore(make_reference_points(count, rng))
+        history = {}
+        # Four sensor samples per GUI tick, sweeping past every point without touching any.
+        path_times = np.arange(5) * 0.004
+        tip_path = np.column_stack((np.linspace(-1.0, 1.0, 5), np.full(5, 5.0), np.full(5, 5.0)))
+        return lambda: detect_point_hits(points, tip_path[-1], 0.15, history, 0.016, 2.0, tip_path, path_times)
+    return bench
+
+
+def make_group_evaluation_bench(count):
+    def bench(rng):
+        points = make_reference_points(count, rng)
+        groups = make_groups(points)
+        all_ids = [p['id'] for p in points]
+        # Every point was just hit except one per group, so each group is checked but none complete.
+        history = {pid: 0.0 for i, pid in enumerate(all_ids) if i % 4 != 0}
+        newly_hit = set(all_ids[1::4])
+        store = ReferencePointStore(points)
+        # Built once, as the GUI only rebuilds it when the points or groups change.
+        group_index = GroupIndex()
+        group_index.refresh(groups, store, 0)
+        return lambda: evaluate_groups(groups, store, history, newly_hit, 0.0, 2.0, 1.0, {}, group_index)
+    return bench
+
+
+@contextlib.contextmanager
+def bench_config_save_load(rng):
+    points = make_reference_points(100, rng)
+    groups = make_groups(points)
+    config_data = {
+        'ui_settings': {'hit_tolerance_var': 0.15, 'beta_gain_var': 0.1},
+        'reference_points': points,
+        'frame_states': {},
+        'home_position': {'name': 'Home', 'orientation': list(global_state.DEFAULT_HOME_ORIENTATION)},
+        'reference_point_groups': {gid: {**g, 'point_ids': sorted(g['point_ids'])} for gid, g in groups.items()},
+        'action_sound_path': None,
+        'stats': {'total_actions_completed': 0, 'action_count_file_path': ""}
+    }
+    with tempfile.TemporaryDirectory(prefix="pydualm2k_bench_") as directory:
+        path = os.path.join(directory, "config.json")
+
+        def run():
+            write_config_file(path, config_data)
+            read_config_file(path)
+        yield run
+
+
+def bench_session_replay(rng):
+    """Feeds a 10 s synthetic session through the sensor pipeline and the GUI-rate hit/group checks."""
+    gyro, accel, dt = make_synthetic_session()
+    points = make_reference_points(100, rng)
+    groups = make_groups(points)
+    gui_every = max(1, int(round(0.016 / dt)))
+
+    def run():
+        global_state.reference_points = ReferencePointStore(points)
+        global_state.reference_point_groups = groups
+        global_state.point_hit_history = {}
+        global_state.group_last_triggered = {}
+        global_state.reference_points_version += 1
+        global_state.inside_points = set()
+        global_state.motion_history.clear()
+        global_state.engine_events.drain()
+        pipeline = SensorPipeline(sample_rate=1.0 / dt)
+        pipeline.reset_orientation([1.0, 0.0, 0.0, 0.0])
+        for i in range(len(gyro)):
+            pipeline.process_sample(gyro[i], accel[i], dt, timestamp=i * dt)
+            if i % gui_every == 0:
+                current_time = i * dt
+                newly_hit = apply_point_events(global_state.engine_events.drain(), global_state.reference_points,
+                                               global_state.point_hit_history, global_state.inside_points,
+                                               current_time, global_state.group_grace_period)
+                global_state.group_index.refresh(global_state.reference_point_groups, global_state.reference_points,
+                                                 (global_state.reference_points_version,
+                                                  global_state.reference_point_groups_version))
+                evaluate_groups(global_state.reference_point_groups, global_state.reference_points,
+                                global_state.point_hit_history, newly_hit, current_time,
+                                global_state.group_grace_period, global_state.action_interval,
+                                global_state.group_last_triggered, global_state.group_index)
+    return run
+
+
+def bench_history_append(rng):
+    history = MotionHistory()
+    quaternion = tuple(random_unit_quaternions(rng, 1)[0])
+    state = [0.0]
+
+    def run():
+        state[0] += 0.005
+        history.append(state[0], quaternion, (10.0, 20.0, 30.0), (0.1, 0.2, 0.3), (0.01, 0.02, 0.03), (0.0, 0.0, 1.0))
+    return run
+
+
+def bench_history_pose_at(rng):
+    history = MotionHistory()
+    quaternions = random_unit_quaternions(rng, history.capacity + 100)
+    for i, q in enumerate(quaternions):
+        history.append(i * 0.005, q, (0.0, 0.0, 0.0), q[1:], (0.0, 0.0, 0.0), (0.0, 0.0, 1.0))
+    query_times = rng.uniform(history.times()[0], history.times()[-1], size=64)
+
+    def run():
+        for query_time in query_times:
+            history.pose_at(query_time)
+    return run
+
+
+def make_gesture_bench(template_count):
+    """Streams 1 s of tip motion (200 samples) through a recognizer holding `template_count` templates."""
+    def bench(rng):
+        sample_rate = 200.0
+        t = np.arange(int(sample_rate)) / sample_rate
+        tips = np.column_stack((0.3 * np.cos(2 * np.pi * t), 0.3 * np.sin(2 * np.pi * t), np.zeros_like(t)))
+        history = MotionHistory()
+        recognizer = GestureRecognizer(history)
+        recognizer.enabled = True
+        for i in range(template_count):
+            path = np.cumsum(rng.normal(scale=0.01, size=(60, 3)), axis=0)
+            recognizer.add_template(GestureTemplate(f"g{i}", f"g{i}", path, rng.uniform(0.3, 1.0)))
+        offset = [0.0]
+
+        def run():
+            for i in range(len(t)):
+                history.append(offset[0] + t[i], (1.0, 0.0, 0.0, 0.0), (0.0, 0.0, 0.0), tips[i], (0.0, 0.0, 0.0),
+                               (0.0, 0.0, 1.0))
+                recognizer.update()
+            offset[0] += 1.0
+        return run
+    return bench
+
+
+def build_benchmarks():
+    benchmarks = [
+        ("quat.multiply", bench_quaternion_multiply),
+        ("quat.rotate_point", bench_rotate_point_by_quaternion),
+        ("quat.slerp", bench_quaternion_slerp),
+        ("quat.to_euler", bench_quaternion_to_euler),
+        ("ahrs.update_imu", bench_update_imu),
+        ("quat.rotate_points_batch[1000]", bench_rotate_points_batch),
+        ("quat.slerp_batch[1000]", bench_quaternion_slerp_batch),
+    ]
+    for filter_type in FILTER_TYPES:
+        benchmarks.append((f"filters.update[{filter_type}]", make_filter_bank_bench(filter_type)))
+    for filter_type in FILTER_TYPES:
+        benchmarks.append((f"filters.block[{filter_type}, 1000]", make_filter_block_bench(filter_type, 1000)))
+    for count in POINT_COUNTS:
+        benchmarks.append((f"hits.detect[{count}]", make_hit_detection_bench(count)))
+    for count in POINT_COUNTS:
+        benchmarks.append((f"hits.detect_swept[{count}]", make_swept_hit_detection_bench(count)))
+    for count in POINT_COUNTS:
+        benchmarks.append((f"groups.evaluate[{count}]", make_group_evaluation_bench(count)))
+    benchmarks.append(("config.save_load[100]", bench_config_save_load))
+    benchmarks.append(("history.append", bench_history_append))
+    benchmarks.append(("history.pose_at[64]", bench_history_pose_at))
+    benchmarks.append(("gestures.update[32 templates]", make_gesture_bench(32)))
+    benchmarks.append(("replay.session[10s]", bench_session_replay))
+    return benchmarks
+
+
+# --- quaternion_math property checks ---
+
+def check_quaternion_math():
+    """
+    Runs the property tests in test_quaternion_math.py without pytest. Returns a list of failure
+    descriptions (empty when everything holds).
+    """
+    failures = []
+    for name in sorted(vars(quaternion_tests)):
+        test = getattr(quaternion_tests, name)
+        if name.startswith('test_') and callable(test):
+            try:
+                test()
+            except AssertionError as e:
+                failures.append(str(e) or name)
+    return failures
+
+
+# --- Runner ---
+
+def run_benchmarks(name_filter=None, repeat=5):
+    results = {}
+    for name, factory in build_benchmarks():
+        if name_filter and name_filter not in name:
+            continue
+        with contextlib.ExitStack() as stack:
+            func = factory(np.random.default_rng(SEED))
+            if isinstance(func, contextlib.AbstractContextManager):
+                # Factories that own resources (a temp directory, ...) clean them up after timing.
+                func = stack.enter_context(func)
+            # Engine diagnostics are app_logging records, which aren't written here as logging isn't set up;
+            # this only keeps stray prints (config helpers, ...) out of the report.
+            stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+            func()
+            number = auto_number(func)
+            timings = time_callable(func, number, repeat)
+        results[name] = {
+            'best_s': min(timings),
+            'median_s': statistics.median(timings),
+            'number': number,
+            'repeat': repeat
+        }
+        print(f"{name:<32} best {format_duration(min(timings)):>10}   median {format_duration(statistics.median(timings)):>10}"
+              f"   ({number} x {repeat})")
+    return results
+
+
+def format_duration(seconds):
+    if seconds < 1e-6:
+        return f"{seconds * 1e9:.1f} ns"
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.2f} us"
+    if seconds < 1.0:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds:.3f} s"
+
+
+def compare_to_baseline(results, baseline, threshold):
+    """Prints a comparison table and returns the names of benchmarks that regressed beyond threshold."""
+    regressions = []
+    print(f"\n--- Comparison against baseline (threshold {threshold:.0%}) ---")
+    for name, result in results.items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            print(f"{name:<32} (no baseline)")
+            continue
+        ratio = result['best_s'] / base['best_s'] if base['best_s'] > 0 else math.inf
+        status = "ok"
+        if ratio > 1.0 + threshold:
+            status = "REGRESSION"
+            regressions.append(name)
+        elif ratio < 1.0 - threshold:
+            status = "faster"
+        print(f"{name:<32} {ratio:>6.2f}x   {status}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the PyDualSense-MotionToKey benchmark suite.")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH, help="Baseline JSON file to compare against.")
+    parser.add_argument('--save', action='store_true', help="Write the results as the new baseline.")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown that counts as a regression (0.10 = 10%%).")
+    parser.add_argument('--filter', default=None, help="Only run benchmarks whose name contains this string.")
+    parser.add_argument('--repeat', type=int, default=5, help="Timing runs per benchmark.")
+    parser.add_argument('--check', action='store_true', help="Only run the quaternion_math property checks.")
+    args = parser.parse_args(argv)
+
+    failures = check_quaternion_math()
+    for failure in failures:
+        print(f"CHECK FAILED: {failure}")
+    if failures:
+        return 1
+    if args.check:
+        print("quaternion_math checks passed.")
+        return 0
+
+    results = run_benchmarks(args.filter, args.repeat)
+
+    if args.save:
+        baseline = {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0],
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'results': results
+        }
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=4)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save to create one.")
+        return 0
+
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    regressions = compare_to_baseline(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,7 +3,9 @@ from tkinter import ttk, messagebox
 import json
 import os
 import traceback
+from collections import namedtuple
 import global_state
+from point_store import stored_position, detach_invalid_chains
 
 
 def log_error(exc):
@@ -13,6 +15,18 @@ def log_error(exc):
     print(f"An error occurred. Details have been logged to error.log")
 
 
+def read_config_file(filepath):
+    """Reads and parses a configuration file. Raises on I/O or JSON errors."""
+    with open(filepath, 'r') as f:
+        return json.load(f)
+
+
+def write_config_file(filepath, config_data):
+    """Serializes config_data to filepath. Raises on I/O or serialization errors."""
+    with open(filepath, 'w') as f:
+        json.dump(config_data, f, indent=4)
+
+
 def save_config(root, collapsible_frames, filepath=None):
     """Saves the current application state to the specified filepath."""
     if not filepath:
@@ -25,16 +39,12 @@ def save_config(root, collapsible_frames, filepath=None):
     config_data = {
         'ui_settings': {}, 'reference_points': [], 'frame_states': {},
         'home_position': {}, 'reference_point_groups': {}, 'action_sound_path': None,
-        'stats': {}  ## NEW ## - Added a dedicated section for stats
+        'stats': {},  ## NEW ## - Added a dedicated section for stats
+        'gesture_templates': {}
     }
 
     with global_state.controller_lock:
-        points_to_save = []
-        for p in global_state.reference_points:
-            point_copy = p.copy()
-            point_copy['hit'] = bool(p['hit'])
-            points_to_save.append(point_copy)
-        config_data['reference_points'] = points_to_save
+        config_data['reference_points'] = global_state.reference_points.to_dicts()
 
         config_data['home_position'] = global_state.home_position
         config_data['reference_point_groups'] = {
@@ -42,6 +52,7 @@ def save_config(root, collapsible_frames, filepath=None):
             for gid, gdata in global_state.reference_point_groups.items()
         }
         config_data['action_sound_path'] = global_state.action_sound_path
+        config_data['gesture_templates'] = global_state.gesture_recognizer.templates_to_dict()
 
         ## NEW ## - Save stats from global_state
         config_data['stats']['total_actions_completed'] = global_state.total_actions_completed
@@ -73,8 +84,7 @@ def save_config(root, collapsible_frames, filepath=None):
             log_error(e)
 
     try:
-        with open(filepath, 'w') as f:
-            json.dump(config_data, f, indent=4)
+        write_config_file(filepath, config_data)
         messagebox.showinfo("Save Success", f"Configuration saved to {filepath}")
         print(f"Configuration saved to {filepath}")
     except Exception as e:
@@ -90,8 +100,7 @@ def load_config(root, ref_tree, group_tree, collapsible_frames, filepath=None, i
         return False
 
     try:
-        with open(filepath, 'r') as f:
-            config_data = json.load(f)
+        config_data = read_config_file(filepath)
     except Exception as e:
         log_error(e)
         if not initial_load:
@@ -99,8 +108,17 @@ def load_config(root, ref_tree, group_tree, collapsible_frames, filepath=None, i
                                  f"Failed to load or parse configuration file. See error.log for details.")
         return False
 
+    # Chains that point nowhere or loop would never activate; load those points unchained.
+    points, chain_problems = detach_invalid_chains(config_data.get('reference_points', []))
+    if chain_problems:
+        message = "Some chain parents were cleared:\n" + "\n".join(chain_problems)
+        print(f"Config {filepath}: {message}")
+        if not initial_load:
+            messagebox.showwarning("Invalid Chains", message)
+
     with global_state.controller_lock:
-        global_state.reference_points = config_data.get('reference_points', [])
+        global_state.reference_points.load(points)
+        global_state.reference_points_version += 1
         global_state.home_position = config_data.get('home_position', {})
         global_state.action_sound_path = config_data.get('action_sound_path', None)
         loaded_groups = config_data.get('reference_point_groups', {})
@@ -109,12 +127,15 @@ def load_config(root, ref_tree, group_tree, collapsible_frames, filepath=None, i
             gdata['point_ids'] = set(gdata.get('point_ids', []))
             gdata['hit_timestamps'] = {}
             global_state.reference_point_groups[gid] = gdata
+        global_state.reference_point_groups_version += 1
 
         ## NEW ## - Load stats. If the 'stats' key doesn't exist, use default values.
         stats_data = config_data.get('stats', {})
         global_state.total_actions_completed = stats_data.get('total_actions_completed', 0)
         global_state.action_count_file_path = stats_data.get('action_count_file_path', "")
 
+        global_state.gesture_recognizer.load_templates(config_data.get('gesture_templates', {}))
+
     ref_tree.delete(*ref_tree.get_children())
     for point in global_state.reference_points:
         values = (
@@ -155,6 +176,172 @@ def load_config(root, ref_tree, group_tree, collapsible_frames, filepath=None, i
     return True
 
 
+# Keys that hold runtime state rather than configuration; ignored when diffing a reloaded config.
+POINT_RUNTIME_KEYS = ('hit', 'is_active')
+GROUP_RUNTIME_KEYS = ('hit_timestamps',)
+# UI settings a reload never overwrites (the same ones load_config skips).
+PROTECTED_UI_SETTINGS = ('home_name_var', 'total_actions_completed_var', 'action_count_file_path_var')
+
+ConfigDiff = namedtuple('ConfigDiff', 'added_points removed_points changed_points added_groups removed_groups '
+                                      'changed_groups settings home_position gesture_templates action_sound_path')
+# A ConfigDiff's home_position / gesture_templates / action_sound_path when the file doesn't change it
+# (None is a real value there: a cleared action sound).
+UNCHANGED = object()
+
+
+def _persistent(item, runtime_keys):
+    return {key: (sorted(value) if isinstance(value, set) else value)
+            for key, value in item.items() if key not in runtime_keys}
+
+
+def _point_for_compare(point):
+    """A point's persistent keys, with the position rounded to float32 as the point store holds it."""
+    persistent = _persistent(point, POINT_RUNTIME_KEYS)
+    persistent['position'] = stored_position(point.get('position', (0.0, 0.0, 0.0)))
+    persistent['chain_parent'] = point.get('chain_parent') or None
+    return persistent
+
+
+def _groups_for_compare(groups):
+    return {gid: _persistent({**gdata, 'point_ids': sorted(gdata.get('point_ids', []))}, GROUP_RUNTIME_KEYS)
+            for gid, gdata in groups.items()}
+
+
+def diff_config(config_data):
+    """
+    Compares parsed config file contents with the running state. Returns a ConfigDiff listing
+    only what differs: points and groups by id (added lists hold the new dicts, removed lists the
+    ids, changed lists the new dicts), changed UI settings as {var name: value}, and the new home
+    position / gesture templates / action sound path, or UNCHANGED where unchanged.
+    """
+    with global_state.controller_lock:
+        current_points = {p['id']: _point_for_compare(p) for p in global_state.reference_points}
+        current_groups = _groups_for_compare(global_state.reference_point_groups)
+        current_home = global_state.home_position
+        current_sound = global_state.action_sound_path
+        current_templates = global_state.gesture_recognizer.templates_to_dict()
+
+    new_points = {p['id']: p for p in config_data.get('reference_points', []) if 'id' in p}
+    added_points = [p for pid, p in new_points.items() if pid not in current_points]
+    removed_points = [pid for pid in current_points if pid not in new_points]
+    changed_points = [p for pid, p in new_points.items()
+                      if pid in current_points and _point_for_compare(p) != current_points[pid]]
+
+    loaded_groups = config_data.get('reference_point_groups', {})
+    new_groups = _groups_for_compare(loaded_groups)
+    added_groups = [(gid, loaded_groups[gid]) for gid in new_groups if gid not in current_groups]
+    removed_groups = [gid for gid in current_groups if gid not in new_groups]
+    changed_groups = [(gid, loaded_groups[gid]) for gid, gdata in new_groups.items()
+                      if gid in current_groups and gdata != current_groups[gid]]
+
+    settings = {}
+    for key, value in config_data.get('ui_settings', {}).items():
+        var = getattr(global_state, key, None)
+        if key.startswith('home_q_') or key in PROTECTED_UI_SETTINGS or not isinstance(var, tk.Variable):
+            continue
+        try:
+            if var.get() != value:
+                settings[key] = value
+        except tk.TclError:
+            settings[key] = value
+
+    home = config_data.get('home_position', {})
+    templates = config_data.get('gesture_templates', {})
+    sound = config_data.get('action_sound_path', None)
+    return ConfigDiff(added_points, removed_points, changed_points, added_groups, removed_groups, changed_groups,
+                      settings, home if home != current_home else UNCHANGED,
+                      templates if templates != current_templates else UNCHANGED,
+                      sound if sound != current_sound else UNCHANGED)
+
+
+def describe_config_diff(diff):
+    """One-line summary such as '2 points changed, 1 group added, 3 settings changed' ('' if nothing changed)."""
+    parts = []
+    for count, noun, verb in ((len(diff.added_points), 'point', 'added'), (len(diff.removed_points), 'point', 'removed'),
+                              (len(diff.changed_points), 'point', 'changed'),
+                              (len(diff.added_groups), 'group', 'added'), (len(diff.removed_groups), 'group', 'removed'),
+                              (len(diff.changed_groups), 'group', 'changed'), (len(diff.settings), 'setting', 'changed')):
+        if count:
+            parts.append(f"{count} {noun}{'s' if count != 1 else ''} {verb}")
+    for value, label in ((diff.home_position, 'home position'), (diff.gesture_templates, 'gesture templates'),
+                         (diff.action_sound_path, 'action sound')):
+        if value is not UNCHANGED:
+            parts.append(f"{label} changed")
+    return ', '.join(parts)
+
+
+def apply_config_diff(diff, ref_tree, group_tree):
+    """
+    Applies a ConfigDiff in place. Points and groups that didn't change keep their runtime state
+    (hits, group hit timestamps and cooldowns); changed groups restart their hit timestamps, and
+    removed points and groups drop theirs. Only the affected tree rows are touched.
+    The new config's chains must be valid (see point_store.detach_invalid_chains).
+    """
+    with global_state.controller_lock:
+        points = global_state.reference_points
+        if diff.removed_points:
+            points.remove(diff.removed_points)
+            for pid in diff.removed_points:
+                global_state.point_hit_history.pop(pid, None)
+                global_state.inside_points.discard(pid)
+        # Points go in unchained and the new chain parents are set together afterwards, so the
+        # chains are only validated in their final state (a new point can be chained to a point
+        # added after it, two points can swap parent and child).
+        for new_point in diff.added_points:
+            points.add({**_persistent(new_point, POINT_RUNTIME_KEYS), 'chain_parent': None})
+        for new_point in diff.changed_points:
+            points.replace({**new_point, 'chain_parent': None})
+        points.set_parents({p['id']: p.get('chain_parent') for p in diff.added_points + diff.changed_points})
+        if diff.added_points or diff.removed_points or diff.changed_points:
+            global_state.reference_points_version += 1
+
+        groups = global_state.reference_point_groups
+        for gid in diff.removed_groups:
+            del groups[gid]
+            global_state.group_last_triggered.pop(gid, None)
+        for gid, gdata in diff.changed_groups + diff.added_groups:
+            groups[gid] = {**_persistent(gdata, GROUP_RUNTIME_KEYS), 'point_ids': set(gdata.get('point_ids', [])),
+                           'hit_timestamps': {}}
+        if diff.removed_groups or diff.changed_groups or diff.added_groups:
+            global_state.reference_point_groups_version += 1
+
+        if diff.home_position is not UNCHANGED:
+            global_state.home_position = diff.home_position
+        if diff.action_sound_path is not UNCHANGED:
+            global_state.action_sound_path = diff.action_sound_path
+        if diff.gesture_templates is not UNCHANGED:
+            global_state.gesture_recognizer.load_templates(diff.gesture_templates)
+
+    for pid in diff.removed_points:
+        if ref_tree.exists(pid):
+            ref_tree.delete(pid)
+    for point in diff.changed_points + diff.added_points:
+        x, y, z = point.get('position', [0, 0, 0])
+        values = (point['id'], f"{x:.2f}", f"{y:.2f}", f"{z:.2f}")
+        if ref_tree.exists(point['id']):
+            ref_tree.item(point['id'], values=values)
+        else:
+            ref_tree.insert('', 'end', iid=point['id'], values=values)
+
+    for gid in diff.removed_groups:
+        if group_tree.exists(gid):
+            group_tree.delete(gid)
+    for gid, gdata in diff.changed_groups + diff.added_groups:
+        values = (gdata.get('name', 'Unnamed Group'),)
+        if group_tree.exists(gid):
+            group_tree.item(gid, values=values)
+        else:
+            group_tree.insert('', 'end', iid=gid, values=values)
+
+    for key, value in diff.settings.items():
+        try:
+            getattr(global_state, key).set(value)
+        except (tk.TclError, AttributeError):
+            pass
+    if diff.home_position is not UNCHANGED:
+        update_home_position_ui()
+
+
 def update_home_position_ui():
     """Helper to sync the home position data to the UI."""
     home_pos = global_state.home_position
@@ -0,0 +1,171 @@
+# In config_watcher.py
+"""
+Watches the loaded config file for changes made outside the app (editors, scripts).
+
+On Linux the file's directory is watched with inotify, so atomic replace-by-rename saves are
+seen too; elsewhere, or if inotify is unavailable, the file's mtime and size are polled. Bursts of
+events are debounced into one change. The watcher thread only raises a flag: the GUI picks it up
+with take_change() and does the reload on the Tk thread.
+"""
+import ctypes
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct('iIII')  # wd, mask, cookie, name length
+
+
+class _InotifyBackend:
+    def __init__(self, path):
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._name = os.path.basename(path).encode()
+        directory = os.path.dirname(os.path.abspath(path)).encode()
+        if self._libc.inotify_add_watch(self._fd, directory, IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE) < 0:
+            os.close(self._fd)
+            raise OSError(ctypes.get_errno(), "inotify_add_watch failed")
+
+    def wait(self, timeout):
+        """True if the watched file changed within `timeout` seconds."""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return False
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        changed = False
+        offset = 0
+        while offset + INOTIFY_EVENT.size <= len(data):
+            _, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if name == self._name:
+                changed = True
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+class _PollingBackend:
+    def __init__(self, path, interval=0.5):
+        self._path = path
+        self._interval = interval
+        self._signature = self._stat()
+
+    def _stat(self):
+        try:
+            st = os.stat(self._path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def wait(self, timeout):
+        time.sleep(min(timeout, self._interval))
+        signature = self._stat()
+        if signature == self._signature:
+            return False
+        self._signature = signature
+        return signature is not None
+
+    def close(self):
+        pass
+
+
+class ConfigWatcher:
+    """Background watcher for one file; call take_change() from the GUI loop."""
+
+    def __init__(self, path=None, debounce=0.2):
+        self.debounce = debounce
+        self.backend_name = None
+        self._path = None
+        self._backend = None
+        self._changed = threading.Event()
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread = None
+        if path:
+            self.watch(path)
+
+    def _make_backend(self, path):
+        if sys.platform.startswith('linux'):
+            try:
+                backend = _InotifyBackend(path)
+                self.backend_name = "inotify"
+                return backend
+            except (OSError, AttributeError) as e:
+                print(f"inotify unavailable ({e}); polling {path} for changes instead.")
+        self.backend_name = "polling"
+        return _PollingBackend(path)
+
+    def watch(self, path):
+        """Switches to watching `path` (e.g. after a different config was loaded)."""
+        path = os.path.abspath(path)
+        with self._lock:
+            if path == self._path:
+                return
+            if self._backend is not None:
+                self._backend.close()
+            self._path = path
+            self._backend = self._make_backend(path)
+            self._changed.clear()
+
+    @property
+    def path(self):
+        return self._path
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        with self._lock:
+            if self._backend is not None:
+                self._backend.close()
+                self._backend = None
+
+    def _run(self):
+        while self._running:
+            backend = self._backend
+            if backend is None:
+                time.sleep(0.2)
+                continue
+            try:
+                changed = backend.wait(0.2)
+            except (OSError, ValueError):
+                # The backend was closed by watch()/stop() while we were waiting on it.
+                continue
+            if not changed:
+                continue
+            # Let a burst of writes (truncate, write, rename) settle before reporting.
+            while self._running and backend is self._backend:
+                try:
+                    if not backend.wait(self.debounce):
+                        break
+                except (OSError, ValueError):
+                    break
+            self._changed.set()
+
+    def take_change(self):
+        """True once for each (debounced) change since the last call."""
+        if self._changed.is_set():
+            self._changed.clear()
+            return True
+        return False
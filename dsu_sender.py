@@ -0,0 +1,115 @@
+# In dsu_sender.py
+"""
+A minimal DSU (cemuhook) server that streams synthetic controller motion, standing in for a
+real device when testing the network input source:
+
+    python dsu_sender.py --rate 200 --loss 0.02 --reorder 0.02
+    python main_app.py --input dsu --dsu-server 127.0.0.1:26760
+
+The controller sweeps back and forth around its pitch and yaw axes. --loss drops that fraction
+of packets and --reorder swaps that fraction with the following packet, to exercise the
+receiver's reordering and loss handling.
+"""
+import argparse
+import math
+import random
+import socket
+import sys
+import time
+
+from input_sources import DSU_DEFAULT_PORT, DSU_MSG_PAD_DATA, DSU_PAD_DATA, DSU_PAD_REQUEST, build_dsu_packet, \
+    parse_dsu_packet
+
+# Clients that haven't re-requested pad data within this many seconds stop receiving it.
+CLIENT_TIMEOUT = 5.0
+
+
+def synthetic_motion(t):
+    """(accel in g, gyro in deg/s) in DSU axes for the sweeping motion at time t."""
+    pitch = 0.8 * math.sin(2 * math.pi * 0.5 * t)
+    yaw = 0.6 * math.sin(2 * math.pi * 0.3 * t + 0.7)
+    pitch_rate = 0.8 * 2 * math.pi * 0.5 * math.cos(2 * math.pi * 0.5 * t)
+    yaw_rate = 0.6 * 2 * math.pi * 0.3 * math.cos(2 * math.pi * 0.3 * t + 0.7)
+    # Gravity in the controller frame; the receiver flips Y and Z into the pipeline's axes.
+    accel = (-math.sin(yaw) * math.cos(pitch), -math.sin(pitch), -math.cos(yaw) * math.cos(pitch))
+    gyro = (math.degrees(pitch_rate), -math.degrees(yaw_rate), 0.0)
+    return accel, gyro
+
+
+def build_pad_data(slot, packet_number, motion_us, accel, gyro):
+    payload = DSU_PAD_DATA.pack(slot, 2, 2, 1, b'\x00\x11\x22\x33\x44\x55', 0x05, 1, packet_number,
+                                0, 0, 0, 0, 128, 128, 128, 128, *([0] * 12), b'\0' * 6, b'\0' * 6,
+                                motion_us, *accel, *gyro)
+    return build_dsu_packet(b'DSUS', 0x1234, DSU_MSG_PAD_DATA, payload)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream synthetic DSU motion data.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DSU_DEFAULT_PORT)
+    parser.add_argument("--slot", type=int, default=0)
+    parser.add_argument("--rate", type=float, default=200.0, help="samples per second")
+    parser.add_argument("--loss", type=float, default=0.0, help="fraction of packets to drop")
+    parser.add_argument("--reorder", type=float, default=0.0, help="fraction of packets to swap with the next")
+    parser.add_argument("--duration", type=float, default=0.0, help="stop after this many seconds (0 = forever)")
+    args = parser.parse_args(argv)
+
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind((args.host, args.port))
+    server.setblocking(False)
+    clients = {}
+    period = 1.0 / args.rate
+    start = time.monotonic()
+    next_send = start
+    packet_number = 0
+    held = None
+    sent = 0
+    print(f"DSU server on {args.host}:{args.port}, slot {args.slot}, {args.rate:.0f} Hz")
+
+    try:
+        while not args.duration or time.monotonic() - start < args.duration:
+            while True:
+                try:
+                    data, address = server.recvfrom(1024)
+                except BlockingIOError:
+                    break
+                parsed = parse_dsu_packet(data, b'DSUC')
+                if parsed and parsed[0] == DSU_MSG_PAD_DATA and len(parsed[1]) >= DSU_PAD_REQUEST.size:
+                    if address not in clients:
+                        print(f"Client {address[0]}:{address[1]} subscribed")
+                    clients[address] = time.monotonic()
+
+            now = time.monotonic()
+            clients = {address: seen for address, seen in clients.items() if now - seen < CLIENT_TIMEOUT}
+            if now < next_send:
+                time.sleep(min(next_send - now, 0.001))
+                continue
+            next_send += period
+
+            t = next_send - start
+            accel, gyro = synthetic_motion(t)
+            packet = build_pad_data(args.slot, packet_number, int(t * 1e6), accel, gyro)
+            packet_number = (packet_number + 1) & 0xFFFFFFFF
+            if random.random() < args.loss:
+                continue
+            outgoing = [packet]
+            if held is not None:
+                outgoing.append(held)
+                held = None
+            elif random.random() < args.reorder:
+                held = packet
+                outgoing = []
+            for client in clients:
+                for data in outgoing:
+                    server.sendto(data, client)
+                    sent += 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    print(f"Sent {sent} packets.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+# In event_bus.py
+"""
+Typed motion events and a small publish/subscribe bus to move them between threads.
+
+The sensor thread publishes point enter/exit and button events as they happen, stamped with the
+sample time they refer to; the GUI publishes group completions and dispatched actions. Each
+subscriber (the engine, the action dispatcher, plugins, ...) gets its own bounded queue and
+drains it at its own pace, so consumers react to changes instead of rescanning state.
+
+Publishing and draining take no locks: each subscriber queue is a deque, whose append and
+popleft are atomic, and the subscriber list is replaced rather than mutated.
+
+A full queue drops new events, except those of the subscription's `keep_types` (e.g. point
+exits, which would otherwise leave a point "inside" forever), and marks the subscription as
+overflowed; the consumer checks take_overflow() and resynchronizes its state from the source.
+"""
+from collections import deque, namedtuple
+
+PointEntered = namedtuple('PointEntered', 'timestamp point_id')
+PointExited = namedtuple('PointExited', 'timestamp point_id')
+# hit_times: {point id: hit time} of the points that completed the group (None for gestures);
+# detected: when the completion was noticed, for latency measurements.
+GroupCompleted = namedtuple('GroupCompleted', 'timestamp group_id group hit_times detected', defaults=(None, None))
+# stockpiled: the action was queued on the stockpile when its group completed and runs only now.
+ActionDispatched = namedtuple('ActionDispatched', 'timestamp group_id action stockpiled', defaults=(False,))
+ButtonPressed = namedtuple('ButtonPressed', 'timestamp button')
+# Sent by the sensor process in place of point events its forwarding queue had to drop.
+EventsDropped = namedtuple('EventsDropped', 'timestamp count')
+
+DEFAULT_QUEUE_CAPACITY = 1024
+
+
+class Subscription:
+    """
+    One consumer's bounded event queue. When full, new events (other than `keep_types`) are
+    dropped and counted, and the subscription is flagged as overflowed.
+    """
+
+    def __init__(self, name, capacity=DEFAULT_QUEUE_CAPACITY, event_types=None, keep_types=None):
+        self.name = name
+        self.capacity = capacity
+        self.event_types = tuple(event_types) if event_types else None
+        self.keep_types = tuple(keep_types) if keep_types else ()
+        self.dropped = 0
+        self.overflowed = False
+        self._queue = deque()
+
+    def __len__(self):
+        return len(self._queue)
+
+    def offer(self, event):
+        if self.event_types is not None and not isinstance(event, self.event_types):
+            return
+        if len(self._queue) >= self.capacity and not isinstance(event, self.keep_types):
+            self.dropped += 1
+            self.overflowed = True
+            return
+        self._queue.append(event)
+
+    def take_overflow(self):
+        """True (once) if events were dropped since the last call."""
+        overflowed = self.overflowed
+        self.overflowed = False
+        return overflowed
+
+    def drain(self, limit=None):
+        """Removes and returns queued events, oldest first (at most `limit` if given)."""
+        events = []
+        queue = self._queue
+        while queue and (limit is None or len(events) < limit):
+            events.append(queue.popleft())
+        return events
+
+
+class EventBus:
+    def __init__(self):
+        self._subscriptions = ()
+
+    def subscribe(self, name, capacity=DEFAULT_QUEUE_CAPACITY, event_types=None, keep_types=None):
+        """
+        Registers a consumer. `event_types` limits it to those event classes (all events by
+        default); events of `keep_types` are queued even when the queue is full.
+        """
+        subscription = Subscription(name, capacity, event_types, keep_types)
+        self._subscriptions = self._subscriptions + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self._subscriptions = tuple(s for s in self._subscriptions if s is not subscription)
+
+    def publish(self, event):
+        for subscription in self._subscriptions:
+            subscription.offer(event)
+
+    def stats(self):
+        """{subscriber name: (queued events, dropped events)}"""
+        return {s.name: (len(s), s.dropped) for s in self._subscriptions}
+
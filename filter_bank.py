@@ -0,0 +1,211 @@
+# In filter_bank.py
+"""
+Multi-channel smoothing filters for the raw IMU streams.
+
+A SensorFilterBank filters all channels of a sample (e.g. ax, ay, az, gx, gy, gz) as one small
+NumPy array, or an (N, C) block of samples in batch mode, instead of one Python object per axis.
+
+In batch mode the two linear filters run without a per-sample loop: the block is cut into chunks
+of BLOCK_CHUNK rows and each chunk's output is one matrix product with the filter's impulse
+response (a lower-triangular Toeplitz matrix) plus the response to the carried-over state. The
+One-Euro filter adapts its cutoff to its own output, so it stays sample by sample.
+"""
+import math
+import numpy as np
+
+BLOCK_CHUNK = 64
+
+FILTER_EXPONENTIAL = "Exponential"
+FILTER_ONE_EURO = "One-Euro"
+FILTER_BIQUAD = "Biquad"
+FILTER_TYPES = (FILTER_EXPONENTIAL, FILTER_ONE_EURO, FILTER_BIQUAD)
+
+
+def _smoothing_factor(dt, cutoff):
+    """Exponential smoothing factor for a first-order low-pass with the given cutoff (Hz)."""
+    tau = 1.0 / (2.0 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class SensorFilterBank:
+    """
+    Filters `channels` signals in lockstep with one of three low-pass filters:
+
+    * Exponential: y = alpha * x + (1 - alpha) * y_prev, with a per-channel alpha.
+    * One-Euro: an exponential filter whose cutoff rises with the signal's speed, so it smooths
+      jitter when still and stays responsive on fast swings (Casiez et al., CHI 2012).
+    * Biquad: a second-order Butterworth-style low-pass (RBJ cookbook) at a fixed cutoff.
+
+    Channels whose `enabled` flag is False pass through unfiltered.
+    """
+
+    def __init__(self, channels, filter_type=FILTER_EXPONENTIAL, sample_rate=200.0):
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.filter_type = filter_type
+        self.enabled = np.ones(channels, dtype=bool)
+        self.alpha = np.full(channels, 0.5)
+        self.min_cutoff = 1.0
+        self.beta = 0.0
+        self.d_cutoff = 1.0
+        self.cutoff_hz = 20.0
+        self.q = 1.0 / math.sqrt(2.0)
+        self._b = np.zeros(3)
+        self._a = np.zeros(3)
+        self._exponential_matrices = None
+        self._update_biquad_coefficients()
+        self.reset()
+
+    def configure(self, filter_type=None, enabled=None, alpha=None, min_cutoff=None, beta=None, d_cutoff=None,
+                  cutoff_hz=None, q=None, sample_rate=None):
+        """Updates filter parameters. Changing the filter type resets the filter state."""
+        if filter_type is not None and filter_type != self.filter_type:
+            if filter_type not in FILTER_TYPES:
+                raise ValueError(f"Unknown filter type '{filter_type}'")
+            self.filter_type = filter_type
+            self.reset()
+        if enabled is not None:
+            self.enabled = np.broadcast_to(np.asarray(enabled, dtype=bool), (self.channels,)).copy()
+        if alpha is not None:
+            self.alpha = np.broadcast_to(np.asarray(alpha, dtype=np.float64), (self.channels,)).copy()
+            self._exponential_matrices = None
+        if min_cutoff is not None:
+            self.min_cutoff = max(float(min_cutoff), 1e-3)
+        if beta is not None:
+            self.beta = max(float(beta), 0.0)
+        if d_cutoff is not None:
+            self.d_cutoff = max(float(d_cutoff), 1e-3)
+        if cutoff_hz is not None or q is not None or sample_rate is not None:
+            if cutoff_hz is not None:
+                self.cutoff_hz = float(cutoff_hz)
+            if q is not None:
+                self.q = max(float(q), 1e-3)
+            if sample_rate is not None:
+                self.sample_rate = float(sample_rate)
+            self._update_biquad_coefficients()
+
+    def reset(self):
+        self._initialized = False
+        self._y = np.zeros(self.channels)
+        self._dx = np.zeros(self.channels)
+        self._z1 = np.zeros(self.channels)
+        self._z2 = np.zeros(self.channels)
+
+    def _update_biquad_coefficients(self):
+        # Keep the cutoff safely below Nyquist so the coefficients stay stable.
+        fc = min(max(self.cutoff_hz, 1e-3), 0.45 * self.sample_rate)
+        w0 = 2.0 * math.pi * fc / self.sample_rate
+        cos_w0 = math.cos(w0)
+        alpha = math.sin(w0) / (2.0 * self.q)
+        a0 = 1.0 + alpha
+        self._b = np.array([(1.0 - cos_w0) / 2.0, 1.0 - cos_w0, (1.0 - cos_w0) / 2.0]) / a0
+        self._a = np.array([1.0, -2.0 * cos_w0 / a0, (1.0 - alpha) / a0])
+        self._biquad_matrices = None
+
+    def _get_exponential_matrices(self):
+        """(C, L, L) Toeplitz matrices alpha * (1 - alpha)^(n - k) per channel, and (C, L) decays (1 - alpha)^(n + 1)."""
+        if self._exponential_matrices is None:
+            lags = np.arange(BLOCK_CHUNK)
+            powers = (1.0 - self.alpha)[:, np.newaxis] ** np.arange(BLOCK_CHUNK + 1)
+            lag = lags[:, np.newaxis] - lags
+            toeplitz = np.where(lag >= 0, self.alpha[:, np.newaxis, np.newaxis] * powers[:, np.maximum(lag, 0)], 0.0)
+            self._exponential_matrices = (toeplitz, powers[:, 1:])
+        return self._exponential_matrices
+
+    def _get_biquad_matrices(self):
+        """(L, L) Toeplitz matrix of the impulse response, and (L, 2) responses to unit z1 / z2 states."""
+        if self._biquad_matrices is None:
+            b0, b1, b2 = self._b
+            _, a1, a2 = self._a
+            # Columns: a unit impulse, a unit z1 and a unit z2 initial state.
+            responses = np.zeros((BLOCK_CHUNK, 3))
+            z1 = np.array([0.0, 1.0, 0.0])
+            z2 = np.array([0.0, 0.0, 1.0])
+            x = np.array([1.0, 0.0, 0.0])
+            for n in range(BLOCK_CHUNK):
+                y = b0 * x + z1
+                z1 = b1 * x - a1 * y + z2
+                z2 = b2 * x - a2 * y
+                responses[n] = y
+                x = np.zeros(3)
+            lags = np.arange(BLOCK_CHUNK)
+            lag = lags[:, np.newaxis] - lags
+            toeplitz = np.where(lag >= 0, responses[np.maximum(lag, 0), 0], 0.0)
+            self._biquad_matrices = (toeplitz, responses[:, 1:])
+        return self._biquad_matrices
+
+    def _prime(self, x):
+        """Starts every filter in steady state at x so the first samples have no transient."""
+        b0, b1, b2 = self._b
+        _, a1, a2 = self._a
+        self._y = x.copy()
+        self._dx = np.zeros(self.channels)
+        self._z2 = (b2 - a2) * x
+        self._z1 = (b1 - a1) * x + self._z2
+        self._initialized = True
+
+    def update(self, sample, dt=None):
+        """Filters one (C,) sample and returns the (C,) output. dt defaults to 1 / sample_rate."""
+        x = np.asarray(sample, dtype=np.float64)
+        if not self._initialized:
+            self._prime(x)
+            return x.copy()
+        if dt is None or dt <= 0:
+            dt = 1.0 / self.sample_rate
+
+        if self.filter_type == FILTER_EXPONENTIAL:
+            y = self.alpha * x + (1.0 - self.alpha) * self._y
+        elif self.filter_type == FILTER_ONE_EURO:
+            # The speed is taken against the previous filtered value, as in Casiez et al.
+            dx = (x - self._y) / dt
+            a_d = _smoothing_factor(dt, self.d_cutoff)
+            self._dx = a_d * dx + (1.0 - a_d) * self._dx
+            cutoff = self.min_cutoff + self.beta * np.abs(self._dx)
+            a = 1.0 / (1.0 + 1.0 / (2.0 * math.pi * cutoff * dt))
+            y = a * x + (1.0 - a) * self._y
+        else:
+            b0, b1, b2 = self._b
+            _, a1, a2 = self._a
+            y = b0 * x + self._z1
+            self._z1 = b1 * x - a1 * y + self._z2
+            self._z2 = b2 * x - a2 * y
+
+        self._y = np.where(self.enabled, y, x)
+        return self._y
+
+    def process_block(self, block, dt=None):
+        """
+        Filters an (N, C) block of consecutive samples and returns an (N, C) array.
+        The filter state carries over between blocks and single-sample updates.
+        """
+        block = np.asarray(block, dtype=np.float64)
+        out = np.empty_like(block)
+        if not len(block):
+            return out
+        start = 0
+        if not self._initialized:
+            out[0] = self.update(block[0], dt)
+            start = 1
+        if self.filter_type == FILTER_ONE_EURO:
+            for i in range(start, block.shape[0]):
+                out[i] = self.update(block[i], dt)
+            return out
+
+        for chunk_start in range(start, block.shape[0], BLOCK_CHUNK):
+            x = block[chunk_start:chunk_start + BLOCK_CHUNK]
+            m = len(x)
+            if self.filter_type == FILTER_EXPONENTIAL:
+                toeplitz, decay = self._get_exponential_matrices()
+                y = ((toeplitz[:, :m, :m] @ x.T[:, :, np.newaxis])[:, :, 0] + decay[:, :m] * self._y[:, np.newaxis]).T
+            else:
+                toeplitz, state_response = self._get_biquad_matrices()
+                y = toeplitz[:m, :m] @ x + state_response[:m] @ np.vstack((self._z1, self._z2))
+                # The direct form II transposed state after the chunk, from its last two samples.
+                b0, b1, b2 = self._b
+                _, a1, a2 = self._a
+                z2_before_last = b2 * x[-2] - a2 * y[-2] if m > 1 else self._z2
+                self._z1 = b1 * x[-1] - a1 * y[-1] + z2_before_last
+                self._z2 = b2 * x[-1] - a2 * y[-1]
+            out[chunk_start:chunk_start + m] = np.where(self.enabled, y, x)
+            self._y = out[chunk_start + m - 1].copy()
+        return out
@@ -0,0 +1,280 @@
+# In gesture_recognizer.py
+"""
+Trajectory-template gesture recognition for the controller tip.
+
+Templates are recorded tip paths (swipes, curls, ...). The recognizer reads recent tip samples
+from the shared MotionHistory and, every `stride` samples, compares the most recent movement
+against each template
+with dynamic time warping (DTW). Most comparisons are rejected cheaply:
+
+0. Path length: a window that moved much less (or more) than the template is skipped outright.
+1. LB_Kim: the distance between the first and last points is a lower bound on the DTW cost.
+2. LB_Keogh: the distance from the query to the template's warping envelope (per axis, within
+   the Sakoe-Chiba band) is a tighter lower bound.
+3. Early abandoning: the DTW itself stops as soon as every cell in the current row exceeds the
+   template's threshold.
+
+The candidate windows are resampled and both lower bounds evaluated for all templates in a few
+vectorized NumPy operations; only the survivors run the (Python) DTW, so dozens of templates
+can be checked at sensor rate.
+"""
+import math
+import uuid
+from collections import deque
+import numpy as np
+
+RESAMPLE_LENGTH = 32
+DEFAULT_BAND_RADIUS = 4
+DEFAULT_THRESHOLD = 0.05
+# Query windows are tried at these multiples of the template duration to tolerate speed changes.
+DURATION_SCALES = (0.75, 1.0, 1.33)
+# Candidate windows whose path length is outside these multiples of the template's are skipped.
+MIN_LENGTH_RATIO = 0.5
+MAX_LENGTH_RATIO = 2.0
+
+
+def resample_path(points, length=RESAMPLE_LENGTH):
+    """Resamples an (N, 3) path to `length` points evenly spaced along its arc length."""
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) == 0:
+        return np.zeros((length, 3))
+    if len(points) == 1:
+        return np.repeat(points, length, axis=0)
+    segment_lengths = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    arc = np.concatenate(([0.0], np.cumsum(segment_lengths)))
+    if arc[-1] == 0.0:
+        return np.repeat(points[:1], length, axis=0)
+    targets = np.linspace(0.0, arc[-1], length)
+    return np.column_stack([np.interp(targets, arc, points[:, d]) for d in range(3)])
+
+
+def resample_windows(points, arc, starts, length=RESAMPLE_LENGTH):
+    """
+    Resamples every window points[start:] (one per entry of `starts`) to `length` points evenly
+    spaced along its arc length, in one vectorized pass. `arc` is the cumulative arc length of
+    the whole of `points`. Returns a (len(starts), length, 3) array.
+    """
+    starts = np.asarray(starts)
+    fractions = np.linspace(0.0, 1.0, length)
+    targets = arc[starts][:, np.newaxis] + (arc[-1] - arc[starts])[:, np.newaxis] * fractions
+    upper = np.minimum(np.searchsorted(arc, targets, side='right'), len(arc) - 1)
+    lower = np.maximum(upper - 1, starts[:, np.newaxis])
+    span = arc[upper] - arc[lower]
+    weight = np.divide(targets - arc[lower], span, out=np.zeros_like(targets), where=span > 0.0)
+    return points[lower] + weight[..., np.newaxis] * (points[upper] - points[lower])
+
+
+def normalize_path(points):
+    """Centers a resampled path (or a stack of them) on its centroid so gestures match wherever they are performed."""
+    return points - points.mean(axis=-2, keepdims=True)
+
+
+def warping_envelope(points, radius):
+    """Per-axis upper/lower envelopes of `points` over a +/- radius window (for LB_Keogh)."""
+    n = len(points)
+    upper = np.empty_like(points)
+    lower = np.empty_like(points)
+    for i in range(n):
+        window = points[max(0, i - radius):min(n, i + radius + 1)]
+        upper[i] = window.max(axis=0)
+        lower[i] = window.min(axis=0)
+    return upper, lower
+
+
+def lb_kim(query, candidate):
+    """First/last point distance; a lower bound on the DTW cost. Works on single paths or stacks of them."""
+    return (np.linalg.norm(query[..., 0, :] - candidate[..., 0, :], axis=-1) +
+            np.linalg.norm(query[..., -1, :] - candidate[..., -1, :], axis=-1))
+
+
+def lb_keogh(query, upper, lower):
+    """Distance from query to the candidate's warping envelope; a tighter lower bound on the DTW cost."""
+    above = np.maximum(query - upper, 0.0)
+    below = np.maximum(lower - query, 0.0)
+    return np.sqrt(np.sum(above * above + below * below, axis=-1)).sum(axis=-1)
+
+
+def dtw_distance(query, candidate, radius, abandon_above=math.inf):
+    """
+    Banded DTW with Euclidean point costs. Returns the total path cost, or math.inf as soon as
+    every cell of a row exceeds abandon_above.
+    """
+    n = len(query)
+    m = len(candidate)
+    costs = np.linalg.norm(query[:, np.newaxis, :] - candidate[np.newaxis, :, :], axis=2).tolist()
+    inf = math.inf
+    previous = [inf] * (m + 1)
+    previous[0] = 0.0
+    for i in range(1, n + 1):
+        current = [inf] * (m + 1)
+        row_costs = costs[i - 1]
+        row_min = inf
+        for j in range(max(1, i - radius), min(m, i + radius) + 1):
+            best = previous[j - 1]
+            if previous[j] < best: best = previous[j]
+            if current[j - 1] < best: best = current[j - 1]
+            value = row_costs[j - 1] + best
+            current[j] = value
+            if value < row_min: row_min = value
+        if row_min > abandon_above:
+            return inf
+        previous = current
+    return previous[m]
+
+
+class GestureTemplate:
+    def __init__(self, template_id, name, points, duration, group_id=None, threshold=DEFAULT_THRESHOLD,
+                 radius=DEFAULT_BAND_RADIUS):
+        self.id = template_id
+        self.name = name
+        self.raw_points = np.asarray(points, dtype=np.float64)
+        self.duration = float(duration)
+        self.group_id = group_id
+        self.threshold = float(threshold)
+        self.radius = radius
+        self.points = normalize_path(resample_path(self.raw_points))
+        self.path_length = float(np.linalg.norm(np.diff(self.raw_points, axis=0), axis=1).sum()) \
+            if len(self.raw_points) > 1 else 0.0
+        self.upper, self.lower = warping_envelope(self.points, radius)
+
+    def to_dict(self):
+        return {'name': self.name, 'group_id': self.group_id, 'threshold': self.threshold,
+                'duration': self.duration, 'points': self.raw_points.tolist()}
+
+    @classmethod
+    def from_dict(cls, template_id, data):
+        return cls(template_id, data.get('name', 'Gesture'), data.get('points', []), data.get('duration', 1.0),
+                   group_id=data.get('group_id'), threshold=data.get('threshold', DEFAULT_THRESHOLD))
+
+
+class GestureRecognizer:
+    """
+    Matches the tip path in a MotionHistory against the templates after each new sample.
+    Not thread-safe; callers hold controller_lock.
+    """
+
+    def __init__(self, history, stride=2):
+        self.history = history
+        self.templates = {}
+        self.enabled = False
+        self.stride = stride
+        self.matches = deque(maxlen=64)
+        self.stats = {'checked': 0, 'pruned_length': 0, 'pruned_kim': 0, 'pruned_keogh': 0, 'abandoned': 0,
+                      'matched': 0}
+        self._samples_since_check = 0
+        self._refractory_until = {}
+        self._recording = None
+
+    # --- Templates ---
+
+    def add_template(self, template):
+        self.templates[template.id] = template
+
+    def remove_template(self, template_id):
+        self.templates.pop(template_id, None)
+        self._refractory_until.pop(template_id, None)
+
+    def load_templates(self, templates_data):
+        self.templates = {}
+        for template_id, data in (templates_data or {}).items():
+            self.add_template(GestureTemplate.from_dict(template_id, data))
+
+    def templates_to_dict(self):
+        return {template_id: template.to_dict() for template_id, template in self.templates.items()}
+
+    # --- Recording ---
+
+    def start_recording(self):
+        """Starts a recording at the newest sample; the path is read back from the history on stop."""
+        self._recording = self.history.total_samples
+
+    def is_recording(self):
+        return self._recording is not None
+
+    def stop_recording(self, name, group_id=None, threshold=DEFAULT_THRESHOLD):
+        """Ends a recording and returns the new template, or None if too few samples were captured."""
+        recorded = self.history.total_samples - (self._recording or 0)
+        self._recording = None
+        times = self.history.times(recorded)
+        if len(times) < 4:
+            return None
+        tips = self.history.field('tip', recorded).copy()
+        template = GestureTemplate(f"gesture_{uuid.uuid4().hex[:6]}", name, tips, times[-1] - times[0],
+                                   group_id=group_id, threshold=threshold)
+        self.add_template(template)
+        return template
+
+    # --- Streaming ---
+
+    def update(self):
+        """Called after each sample is added to the history; every `stride` samples checks all templates."""
+        if self._recording is not None or not self.enabled or not self.templates or not len(self.history):
+            return
+        self._samples_since_check += 1
+        if self._samples_since_check < self.stride:
+            return
+        self._samples_since_check = 0
+        self._check_templates(float(self.history.times(1)[0]))
+
+    def _check_templates(self, timestamp):
+        # Views of just the tail long enough for the slowest template variant, plus one older sample
+        # so that window is fully covered.
+        longest = max(template.duration for template in self.templates.values()) * DURATION_SCALES[-1]
+        count = self.history.count_since(timestamp - longest) + 1
+        times = self.history.times(count)
+        tips = self.history.field('tip', count)
+        # Cumulative arc length lets every candidate window's path length be read in O(1).
+        arc = np.concatenate(([0.0], np.cumsum(np.linalg.norm(np.diff(tips, axis=0), axis=1))))
+
+        # Collect (template, window start) candidates that pass the path-length gate.
+        candidates = []
+        for template in self.templates.values():
+            if timestamp < self._refractory_until.get(template.id, 0.0):
+                continue
+            self.stats['checked'] += 1
+            for scale in DURATION_SCALES:
+                start_time = timestamp - template.duration * scale
+                if times[0] > start_time:
+                    continue  # Not enough history to cover this window yet.
+                # Windows starting within one stride of each other are treated as the same window.
+                start = int(times.searchsorted(start_time)) // self.stride * self.stride
+                if len(times) - start < 4:
+                    continue
+                # A movement much shorter or longer than the template cannot match it.
+                path_length = arc[-1] - arc[start]
+                if not MIN_LENGTH_RATIO * template.path_length <= path_length <= MAX_LENGTH_RATIO * template.path_length:
+                    self.stats['pruned_length'] += 1
+                    continue
+                candidates.append((template, start))
+        if not candidates:
+            return
+
+        # Resample each distinct window once, then apply both lower bounds to all candidates at once.
+        starts = sorted({start for _, start in candidates})
+        queries = normalize_path(resample_windows(tips, arc, starts))
+        query_index = np.searchsorted(starts, [start for _, start in candidates])
+        query_stack = queries[query_index]
+        budgets = np.array([template.threshold * RESAMPLE_LENGTH for template, _ in candidates])
+        kim = lb_kim(query_stack, np.array([template.points for template, _ in candidates]))
+        keogh = lb_keogh(query_stack, np.array([template.upper for template, _ in candidates]),
+                         np.array([template.lower for template, _ in candidates]))
+        self.stats['pruned_kim'] += int(np.count_nonzero(kim > budgets))
+        self.stats['pruned_keogh'] += int(np.count_nonzero((kim <= budgets) & (keogh > budgets)))
+
+        best = {}
+        for i in np.flatnonzero((kim <= budgets) & (keogh <= budgets)):
+            template = candidates[i][0]
+            limit = min(budgets[i], best.get(template.id, math.inf))
+            distance = dtw_distance(queries[query_index[i]], template.points, template.radius, abandon_above=limit)
+            if distance == math.inf:
+                self.stats['abandoned'] += 1
+                continue
+            best[template.id] = min(best.get(template.id, math.inf), distance)
+
+        for template_id, distance in best.items():
+            template = self.templates[template_id]
+            if distance <= template.threshold * RESAMPLE_LENGTH:
+                self.stats['matched'] += 1
+                self.matches.append((float(timestamp), template.id, template.group_id, distance / RESAMPLE_LENGTH))
+                # Don't fire again on the same movement.
+                self._refractory_until[template.id] = timestamp + template.duration
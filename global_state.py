@@ -2,6 +2,14 @@
 
 import threading
 import tkinter as tk
+from profiler import StageProfiler, SENSOR_STAGES, GUI_STAGES
+from motion_history import MotionHistory
+from event_bus import EventBus, PointEntered, PointExited, GroupCompleted, ButtonPressed
+from gesture_recognizer import GestureRecognizer
+from stockpile import Stockpile, DrainPacer
+from audio_cues import AudioCuePlayer
+from point_store import ReferencePointStore
+from motion_engine import GroupIndex
 
 # --- Constants ---
 DEFAULT_HOME_ORIENTATION = [0.75, 0.65, 0.0, 0.0]
@@ -30,7 +38,6 @@ controller_tip_position = [0.0, 0.0, 0.0]
 
 recenter_event = threading.Event()
 go_to_home_event = threading.Event()
-home_button_event = threading.Event()
 
 mapping_target = None
 home_button_map = 'b'
@@ -42,14 +49,22 @@ total_actions_completed = 0
 session_actions_completed = 0
 action_count_file_path = ""
 stockpile_mode_enabled = False
-stockpiled_actions = []
-execute_stockpiled_event = threading.Event()
+stockpiled_actions = Stockpile()  # journaled to stockpile.DEFAULT_JOURNAL once main_app opens it
+stockpile_drain = DrainPacer(rate=10.0)
 
 
 # --- Reference Points & Groups ---
-reference_points = []
+reference_points = ReferencePointStore()
 reference_point_groups = {}
 point_hit_history = {}
+# Bumped whenever reference_points is edited, so the sensor thread knows to rebuild its copy.
+reference_points_version = 0
+# Bumped whenever groups are added or removed or their point_ids change; with reference_points_version
+# it tells the engine when to rebuild group_index.
+reference_point_groups_version = 0
+group_index = GroupIndex()
+# Ids of the points the tip is currently inside, maintained from PointEntered/PointExited events.
+inside_points = set()
 last_hit_details = {} # MODIFIED: Added missing variable
 triggered_groups = set()
 previously_completed_groups = set()
@@ -58,12 +73,44 @@ group_grace_period = 2.0
 hit_tolerance = 0.15
 distance_offset = 0.5
 show_ref_point_labels = True
+show_motion_trail = False
+motion_trail_seconds = 2.0
+# Full-rate history of recent samples (about 20 s at 200 Hz), written by the sensor thread.
+motion_history = MotionHistory(capacity=4096)
+
+# --- Events ---
+event_bus = EventBus()
+engine_events = event_bus.subscribe('engine', event_types=(PointEntered, PointExited), keep_types=(PointExited,))
+action_events = event_bus.subscribe('actions', event_types=(GroupCompleted,))
+button_events = event_bus.subscribe('buttons', event_types=(ButtonPressed,))
+
+# --- Telemetry ---
+telemetry_enabled = False
+telemetry_address = "udp://127.0.0.1:5555"
+
+# --- Trigger Audit Log ---
+audit_log_enabled = False
+audit_log = None  # AuditLog writer, started by main_app
+
+# --- Config Hot-Reload ---
+loaded_config_path = None
+config_watcher = None  # ConfigWatcher on loaded_config_path, created by main_app
+
+# --- Gesture Templates ---
+gestures_enabled = False
+gesture_recognizer = GestureRecognizer(motion_history)
 
 # --- Filter Settings ---
 beta_gain = 0.1
 drift_correction_gain = 0.05
 accelerometer_smoothing = 0.5
 correct_drift_when_still_enabled = True
+sensor_filter_type = "Exponential"  # One of filter_bank.FILTER_TYPES
+filter_gyro_enabled = False
+gyro_smoothing = 0.5
+one_euro_min_cutoff = 1.0  # Hz
+one_euro_beta = 0.05
+biquad_cutoff_hz = 20.0
 
 # --- Dimensions ---
 object_dimensions = [1.6, 0.8, 0.4]
@@ -75,10 +122,16 @@ camera_zoom = -6.0
 camera_roll = 0.0
 
 # --- Thread-safe settings bridge ---
+# Kept in sync with their *_var by main_app's SettingsStore; bumped on every change.
+settings_version = 0
+settings_store = None
+# Immutable settings_store.EngineSettings snapshot for the sensor thread; replaced, never mutated.
+engine_settings = None
 pause_sensor_updates_enabled = False
 log_to_console_enabled = False
 play_action_sound = True
 action_sound_path = None
+audio_cues = AudioCuePlayer()  # decoded-sound cache and playback worker, started by main_app
 track_pitch = True
 track_yaw = True
 track_roll = True
@@ -98,6 +151,14 @@ lock_roll_to = 0.0
 axis_lock_strength = 0.1  # How quickly the orientation snaps to the locked position.
 unintended_movement_detected = False
 
+# --- Profiling ---
+profiling_enabled = False
+sensor_profiler = StageProfiler(SENSOR_STAGES)
+gui_profiler = StageProfiler(GUI_STAGES)
+ui_scheduler = None  # UiScheduler running the GUI's periodic tasks, created by main_app
+# Latest DeadlineScheduler.stats() from the sensor loop (None until it has run for a second).
+sensor_timing = None
+
 
 # --- Tkinter Variables (for GUI only) ---
 dimension_w_var, dimension_h_var, dimension_d_var = None, None, None
@@ -110,8 +171,20 @@ ref_x_var, ref_y_var, ref_z_var = None, None, None
 hit_tolerance_var = None
 distance_offset_var = None
 show_ref_point_labels_var = None
+show_motion_trail_var = None
+telemetry_enabled_var = None
+telemetry_address_var = None
+config_hot_reload_var = None
+audit_log_enabled_var = None
+motion_trail_seconds_var = None
 edit_id_var, edit_x_var, edit_y_var, edit_z_var = None, None, None, None
 accelerometer_smoothing_var = None
+sensor_filter_type_var = None
+filter_gyro_var = None
+gyro_smoothing_var = None
+one_euro_min_cutoff_var = None
+one_euro_beta_var = None
+biquad_cutoff_hz_var = None
 log_to_console_var = None
 correct_drift_when_still_var = None
 home_name_var, home_q_w_var, home_q_x_var, home_q_y_var, home_q_z_var = None, None, None, None, None
@@ -132,6 +205,7 @@ actions_completed_this_session_var = None
 action_count_file_path_var = None
 stockpile_mode_var = None
 stockpiled_actions_count_var = None
+stockpile_drain_rate_var = None
 mapping_home_status_var = None
 mapping_stockpile_status_var = None
 log_tip_position_var = None
@@ -142,4 +216,13 @@ lock_pitch_to_var = None
 lock_yaw_to_var = None
 lock_roll_to_var = None
 axis_lock_strength_var = None
-unintended_movement_status_var = None
\ No newline at end of file
+unintended_movement_status_var = None
+
+# Tkinter variables for gesture templates
+gestures_enabled_var = None
+gesture_name_var = None
+gesture_group_var = None
+gesture_threshold_var = None
+
+# Tkinter variables for the profiler panel
+profiling_enabled_var = None
\ No newline at end of file
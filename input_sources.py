@@ -0,0 +1,286 @@
+# In input_sources.py
+"""
+Pluggable sensor input sources for the sensor loop (see sensor_loop.py).
+
+An InputSource delivers SensorSample tuples in the pipeline's axis convention (gyro in rad/s,
+accel in m/s^2, the same frame the SDL source produces) plus the names of buttons pressed since
+the last poll. SDL lives in sdl_controller.py; this module has the source interface and a
+network source speaking the DSU ("cemuhook") UDP motion protocol, so the mapper can run on a
+different machine from the controller or be driven by other tools (see dsu_sender.py).
+"""
+import heapq
+import math
+import socket
+import struct
+import time
+import zlib
+from collections import namedtuple
+
+SensorSample = namedtuple('SensorSample', 'timestamp gyro accel')
+
+STANDARD_GRAVITY = 9.80665
+
+
+class InputSource:
+    """
+    Interface implemented by every sensor source. The sensor loop calls open() once, then
+    repeatedly poll_buttons(), read_samples() and idle() until the app exits, then close().
+    """
+    name = "Input"
+    sample_rate = 200.0
+    # Polled sources return the current reading whenever asked, so the sensor loop paces them
+    # at sample_rate; others block in read_samples() until data arrives and pace themselves.
+    polled = False
+
+    def open(self):
+        """Connects to the device. Returns True on success; sets `status_text` either way."""
+        raise NotImplementedError
+
+    def poll_buttons(self):
+        """Names of buttons pressed since the last call (same names as sdl_controller.BUTTON_MAP)."""
+        return []
+
+    def read_samples(self):
+        """Returns the samples that are ready, oldest first (possibly none)."""
+        raise NotImplementedError
+
+    def idle(self):
+        """Called at the end of every loop iteration; polled sources pace themselves here."""
+
+    def close(self):
+        pass
+
+
+# --- DSU (cemuhook) protocol ---
+
+DSU_DEFAULT_PORT = 26760
+DSU_PROTOCOL_VERSION = 1001
+DSU_HEADER = struct.Struct('<4sHHII')         # magic, version, payload length, crc32, sender id
+DSU_MESSAGE_TYPE = struct.Struct('<I')
+DSU_MSG_PAD_DATA = 0x100002
+# Pad data request payload: registration flags (1 = by slot), slot, MAC address.
+DSU_PAD_REQUEST = struct.Struct('<BB6s')
+# Pad data response payload after the message type: slot info, packet number, buttons, sticks,
+# analog buttons, two touches, motion timestamp (us), accel (g) and gyro (deg/s).
+DSU_PAD_DATA = struct.Struct('<BBBB6sBBIBBBB4B12B6s6sQ3f3f')
+DSU_PAD_DATA_SIZE = DSU_HEADER.size + DSU_MESSAGE_TYPE.size + DSU_PAD_DATA.size
+# Servers stop streaming to clients that haven't re-requested data for a few seconds.
+DSU_REQUEST_INTERVAL = 1.0
+
+# (byte index into (buttons1, buttons2, home, touch), bit mask) -> button name
+DSU_BUTTONS = {
+    (0, 0x01): 'back', (0, 0x02): 'leftstick', (0, 0x04): 'rightstick', (0, 0x08): 'start',
+    (0, 0x10): 'dpup', (0, 0x20): 'dpright', (0, 0x40): 'dpdown', (0, 0x80): 'dpleft',
+    (1, 0x01): 'lefttrigger', (1, 0x02): 'righttrigger', (1, 0x04): 'leftshoulder', (1, 0x08): 'rightshoulder',
+    (1, 0x10): 'y', (1, 0x20): 'b', (1, 0x40): 'a', (1, 0x80): 'x',
+    (2, 0x01): 'guide', (3, 0x01): 'touchpad',
+}
+
+
+def build_dsu_packet(magic, sender_id, message_type, payload):
+    """Frames a DSU message: header + message type + payload, with the CRC32 filled in."""
+    body = DSU_MESSAGE_TYPE.pack(message_type) + payload
+    header = DSU_HEADER.pack(magic, DSU_PROTOCOL_VERSION, len(body), 0, sender_id)
+    crc = zlib.crc32(header + body) & 0xFFFFFFFF
+    return DSU_HEADER.pack(magic, DSU_PROTOCOL_VERSION, len(body), crc, sender_id) + body
+
+
+def parse_dsu_packet(data, expected_magic):
+    """Validates a DSU datagram. Returns (message_type, payload) or None if it is malformed."""
+    if len(data) < DSU_HEADER.size + DSU_MESSAGE_TYPE.size:
+        return None
+    magic, version, length, crc, _ = DSU_HEADER.unpack_from(data)
+    if magic != expected_magic or version > DSU_PROTOCOL_VERSION or DSU_HEADER.size + length > len(data):
+        return None
+    zeroed = data[:8] + b'\0\0\0\0' + data[12:DSU_HEADER.size + length]
+    if zlib.crc32(zeroed) & 0xFFFFFFFF != crc:
+        return None
+    message_type, = DSU_MESSAGE_TYPE.unpack_from(data, DSU_HEADER.size)
+    return message_type, data[DSU_HEADER.size + DSU_MESSAGE_TYPE.size:DSU_HEADER.size + length]
+
+
+def sequence_delta(a, b):
+    """Signed difference a - b between two uint32 packet numbers, allowing for wrap-around."""
+    return ((a - b + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+
+
+class ReorderBuffer:
+    """
+    Restores packet order for a sequence-numbered stream. Out-of-order packets are held until
+    the gap before them fills or `depth` newer packets are waiting, at which point the missing
+    packets are counted as lost. Duplicates and packets older than the last one released are dropped.
+    A packet far behind the stream (the sender restarted its counter) starts a new stream.
+    """
+    RESYNC_DISTANCE = 1000
+
+    def __init__(self, depth=4):
+        self.depth = depth
+        self._heap = []
+        self._next = None
+        self.stats = {'received': 0, 'lost': 0, 'out_of_order': 0, 'late': 0, 'duplicates': 0}
+
+    def reset(self):
+        self._heap = []
+        self._next = None
+
+    def push(self, sequence, item):
+        """Adds a packet; returns the items that can now be released, in order."""
+        self.stats['received'] += 1
+        if self._next is None or sequence_delta(sequence, self._next) < -self.RESYNC_DISTANCE:
+            self.reset()
+            self._next = sequence
+        ahead = sequence_delta(sequence, self._next)
+        if ahead < 0:
+            self.stats['late'] += 1
+            return []
+        if any(held_ahead == ahead for held_ahead, _, _ in self._heap):
+            self.stats['duplicates'] += 1
+            return []
+        if ahead > 0:
+            self.stats['out_of_order'] += 1
+        # Keys are offsets from the next expected sequence number, so wrap-around doesn't matter.
+        heapq.heappush(self._heap, (ahead, sequence, item))
+        return self._release()
+
+    def _release(self):
+        released = []
+        while self._heap:
+            ahead, sequence, item = self._heap[0]
+            if ahead > 0 and len(self._heap) <= self.depth:
+                break
+            heapq.heappop(self._heap)
+            if ahead > 0:
+                # Gave up waiting for the gap: those packets are lost.
+                self.stats['lost'] += ahead
+            released.append(item)
+            self._next = (sequence + 1) & 0xFFFFFFFF
+            self._heap = [(sequence_delta(s, self._next), s, i) for _, s, i in self._heap]
+            heapq.heapify(self._heap)
+        return released
+
+
+class DsuInputSource(InputSource):
+    """
+    DSU client: requests pad data for one slot from a DSU server and converts its motion
+    reports to SensorSamples.
+
+    Device timestamps (microseconds on the controller's clock) are mapped onto time.monotonic()
+    with the smallest observed (arrival - device time) offset, so network jitter doesn't leak
+    into dt. The offset is allowed to creep up slowly to follow clock drift.
+    """
+    name = "DSU"
+    OFFSET_DRIFT_PER_SECOND = 1e-4
+
+    def __init__(self, host="127.0.0.1", port=DSU_DEFAULT_PORT, slot=0, timeout=0.05, reorder_depth=4):
+        self.server = (host, port)
+        self.slot = slot
+        self.timeout = timeout
+        self.client_id = int(time.monotonic() * 1e6) & 0xFFFFFFFF
+        self.reorder = ReorderBuffer(reorder_depth)
+        self.status_text = f"Connecting to DSU server {host}:{port}..."
+        self._socket = None
+        self._last_request = 0.0
+        self._clock_offset = None
+        self._last_offset_update = None
+        self._last_buttons = (0, 0, 0, 0)
+        self._pressed = []
+
+    def open(self):
+        try:
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._socket.settimeout(self.timeout)
+            self._request_pad_data()
+        except OSError as e:
+            self.status_text = f"DSU error: {e}"
+            return False
+        self.status_text = f"Connected: DSU {self.server[0]}:{self.server[1]} slot {self.slot}"
+        return True
+
+    def _request_pad_data(self):
+        payload = DSU_PAD_REQUEST.pack(1, self.slot, b'\0' * 6)
+        self._socket.sendto(build_dsu_packet(b'DSUC', self.client_id, DSU_MSG_PAD_DATA, payload), self.server)
+        self._last_request = time.monotonic()
+
+    def _to_local_time(self, device_us, arrival):
+        device_time = device_us * 1e-6
+        offset = arrival - device_time
+        if self._clock_offset is None:
+            self._clock_offset = offset
+        else:
+            elapsed = arrival - self._last_offset_update
+            self._clock_offset = min(self._clock_offset + self.OFFSET_DRIFT_PER_SECOND * elapsed, offset)
+        self._last_offset_update = arrival
+        return device_time + self._clock_offset
+
+    def poll_buttons(self):
+        pressed, self._pressed = self._pressed, []
+        return pressed
+
+    def read_samples(self):
+        if time.monotonic() - self._last_request >= DSU_REQUEST_INTERVAL:
+            try:
+                self._request_pad_data()
+            except OSError:
+                pass
+        try:
+            data, address = self._socket.recvfrom(1024)
+        except (socket.timeout, OSError):
+            return []
+        arrival = time.monotonic()
+        samples = []
+        for packet in self._drain_socket(data, arrival):
+            samples.extend(self._handle_packet(*packet))
+        return samples
+
+    def _drain_socket(self, first, arrival):
+        """Yields (data, arrival) for the packet just received and any others already queued."""
+        yield first, arrival
+        self._socket.setblocking(False)
+        try:
+            while True:
+                try:
+                    data, _ = self._socket.recvfrom(1024)
+                except (BlockingIOError, socket.timeout, OSError):
+                    return
+                yield data, time.monotonic()
+        finally:
+            self._socket.settimeout(self.timeout)
+
+    def _handle_packet(self, data, arrival):
+        parsed = parse_dsu_packet(data, b'DSUS')
+        if parsed is None or parsed[0] != DSU_MSG_PAD_DATA or len(parsed[1]) < DSU_PAD_DATA.size:
+            return []
+        fields = DSU_PAD_DATA.unpack_from(parsed[1])
+        slot, connected, packet_number = fields[0], fields[6], fields[7]
+        if slot != self.slot or not connected:
+            return []
+        buttons = fields[8:12]
+        motion_us = fields[30]
+        accel_x, accel_y, accel_z, gyro_pitch, gyro_yaw, gyro_roll = fields[31:37]
+        self._record_buttons(buttons)
+        # DSU reports accel in g and gyro in deg/s; convert to the SDL units and axis signs the
+        # pipeline expects (see sdl_controller.SdlInputSource).
+        gyro = (math.radians(gyro_pitch), -math.radians(gyro_yaw), -math.radians(gyro_roll))
+        accel = (accel_x * STANDARD_GRAVITY, -accel_y * STANDARD_GRAVITY, -accel_z * STANDARD_GRAVITY)
+        sample = SensorSample(self._to_local_time(motion_us, arrival), gyro, accel)
+        return self.reorder.push(packet_number, sample)
+
+    def _record_buttons(self, buttons):
+        for (index, mask), button_name in DSU_BUTTONS.items():
+            if buttons[index] & mask and not self._last_buttons[index] & mask:
+                self._pressed.append(button_name)
+        self._last_buttons = buttons
+
+    def close(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+
+def create_input_source(kind="sdl", dsu_server=f"127.0.0.1:{DSU_DEFAULT_PORT}", dsu_slot=0):
+    """Builds the source selected on the command line ('sdl' or 'dsu')."""
+    if kind == "dsu":
+        host, _, port = dsu_server.rpartition(':')
+        return DsuInputSource(host or "127.0.0.1", int(port), slot=dsu_slot)
+    from sdl_controller import SdlInputSource
+    return SdlInputSource()
@@ -0,0 +1,136 @@
+# In loop_scheduler.py
+"""
+Pacing for the sensor loop: absolute deadlines instead of a fixed sleep after each iteration,
+so the period doesn't stretch with however long the iteration took, plus period/jitter
+statistics and (Linux) thread priority and CPU affinity.
+"""
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+# spin: seconds before each deadline to busy-wait instead of sleeping (0 = sleep only).
+# nice: thread nice value (negative needs privileges). affinity: CPU indices for the thread.
+# realtime_priority: SCHED_FIFO priority 1-99 (needs privileges).
+SchedulingOptions = namedtuple('SchedulingOptions', 'spin nice affinity realtime_priority',
+                               defaults=(0.0, None, None, None))
+
+
+def configure_current_thread(options):
+    """Applies the priority/affinity parts of SchedulingOptions to the calling thread (Linux only)."""
+    if options.nice is None and not options.affinity and not options.realtime_priority:
+        return
+    if not sys.platform.startswith('linux'):
+        print("Sensor thread priority/affinity settings are only supported on Linux; ignoring them.")
+        return
+    # On Linux, pid 0 / the native thread id address just this thread, not the whole process.
+    if options.affinity:
+        try:
+            os.sched_setaffinity(0, options.affinity)
+        except (OSError, ValueError) as e:
+            print(f"Could not set sensor thread CPU affinity to {sorted(options.affinity)}: {e}")
+    if options.nice is not None:
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), options.nice)
+        except OSError as e:
+            print(f"Could not set sensor thread nice value to {options.nice}: {e}")
+    if options.realtime_priority:
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(options.realtime_priority))
+        except OSError as e:
+            print(f"Could not switch the sensor thread to SCHED_FIFO {options.realtime_priority}: {e}")
+
+
+def parse_cpu_list(text):
+    """'0,2-3' -> {0, 2, 3}; empty text -> None."""
+    if not text:
+        return None
+    cpus = set()
+    for part in text.split(','):
+        first, _, last = part.strip().partition('-')
+        cpus.update(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+class DeadlineScheduler:
+    """
+    Wakes the loop at start + n * period. wait() sleeps until the next deadline, busy-waiting
+    for the last `spin` seconds because sleep() commonly overshoots by a millisecond or more.
+    An iteration that ends more than a whole period past its deadline is an overrun: the missed
+    deadlines are skipped rather than run back to back.
+
+    With pace=False (sources that block until data arrives) wait() doesn't sleep and only
+    records the period; lateness and overruns stay at zero.
+    """
+
+    def __init__(self, period, spin=0.0, pace=True, capacity=1024):
+        self.period = period
+        self.spin = spin
+        self.pace = pace
+        self.capacity = capacity
+        self._periods = np.zeros(capacity)
+        self._lateness = np.zeros(capacity)
+        self.reset_stats()
+        self.restart()
+
+    def restart(self):
+        """Starts a new deadline series from now (e.g. after a pause)."""
+        self._deadline = time.perf_counter() + self.period
+        self._last_wake = None
+
+    def reset_stats(self):
+        self._cursor = 0
+        self._count = 0
+        self.overruns = 0
+        self.iterations = 0
+
+    def wait(self):
+        deadline = self._deadline
+        now = time.perf_counter()
+        if self.pace:
+            remaining = deadline - now
+            if remaining > self.spin:
+                time.sleep(remaining - self.spin)
+            if self.spin > 0:
+                while time.perf_counter() < deadline:
+                    pass
+            now = time.perf_counter()
+
+        if not self.pace:
+            lateness = 0.0
+            self._deadline = now + self.period
+        else:
+            lateness = now - deadline
+            if lateness > self.period:
+                self.overruns += 1
+                self._deadline = now + self.period
+            else:
+                self._deadline = deadline + self.period
+
+        if self._last_wake is not None:
+            cursor = self._cursor
+            self._periods[cursor] = now - self._last_wake
+            self._lateness[cursor] = max(lateness, 0.0)
+            self._cursor = (cursor + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+        self._last_wake = now
+        self.iterations += 1
+
+    def stats(self):
+        """
+        Rolling-window timing in milliseconds: mean/max period, jitter (standard deviation of
+        the period), mean/max lateness past the deadline, plus the overrun count.
+        """
+        count = self._count
+        if not count:
+            return {'target_ms': self.period * 1000.0, 'period_ms': 0.0, 'max_period_ms': 0.0, 'jitter_ms': 0.0,
+                    'lateness_ms': 0.0, 'max_lateness_ms': 0.0, 'overruns': self.overruns, 'samples': 0}
+        periods = self._periods[:count]
+        lateness = self._lateness[:count]
+        return {'target_ms': self.period * 1000.0, 'period_ms': float(periods.mean()) * 1000.0,
+                'max_period_ms': float(periods.max()) * 1000.0, 'jitter_ms': float(periods.std()) * 1000.0,
+                'lateness_ms': float(lateness.mean()) * 1000.0, 'max_lateness_ms': float(lateness.max()) * 1000.0,
+                'overruns': self.overruns, 'samples': count}
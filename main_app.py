@@ -1,4 +1,6 @@
 # In main_app.py
+import argparse
+import multiprocessing
 import os
 import sys
 import threading
@@ -6,60 +8,39 @@ import tkinter as tk
 import uuid
 from tkinter import ttk, messagebox, filedialog
 from action_executor import ActionExecutor
+from action_scheduler import parse_macro
+from stockpile import DEFAULT_JOURNAL, MAX_DRAIN_RATE
+from audit_log import AuditLog, DEFAULT_AUDIT_PATH
+from audio_cues import FileSinkBackend
+from point_store import detach_invalid_chains
+from app_logging import get_logger, setup_logging, shutdown_logging
 import numpy as np
 from OpenGL import GLUT
 import time
 import global_state
-from config_manager import save_config, load_config, log_error
-from sdl_controller import poll_controller_data
+from config_manager import save_config, load_config, log_error, read_config_file, diff_config, apply_config_diff, \
+    describe_config_diff, UNCHANGED
+from config_watcher import ConfigWatcher
+from settings_store import SettingsStore
+from ui_scheduler import UiScheduler, HIGH, NORMAL, LOW
+from input_sources import DSU_DEFAULT_PORT, create_input_source
+from sensor_loop import run_sensor_loop
+from sensor_process import SensorProcess
+from loop_scheduler import SchedulingOptions, parse_cpu_list
 from visualization import VisFrame
-from madgwick_ahrs import MadgwickAHRS, quaternion_to_euler
+from motion_engine import apply_point_events, points_inside, evaluate_groups, collect_gesture_triggers
+from event_bus import ActionDispatched
+from filter_bank import FILTER_TYPES
+from quaternion_math import quaternion_multiply, quaternion_inverse, quaternion_to_euler, \
+    rotate_points_by_quaternion_batch
 
+pose_log = get_logger('pose')
+action_log = get_logger('actions')
+config_log = get_logger('config')
 
-def quaternion_multiply(q1, q2):
-    w1, x1, y1, z1 = q1
-    w2, x2, y2, z2 = q2
-    w = w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2
-    x = w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2
-    y = w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2
-    z = w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2
-    return np.array([w, x, y, z])
-
-
-def quaternion_inverse(q):
-    w, x, y, z = q
-    return np.array([w, -x, -y, -z])
-
-
-def rotate_point_by_quaternion(point, q):
-    q_point = np.array([0, point[0], point[1], point[2]])
-    q_conj = quaternion_inverse(q)
-    q_rotated = quaternion_multiply(quaternion_multiply(q, q_point), q_conj)
-    return q_rotated[1:]
-
-
-def euler_to_quaternion(pitch, yaw, roll):
-    """
-    Converts Euler angles (in degrees) to a quaternion.
-    Assumes a ZYX rotation order, which matches the OpenGL glRotatef sequence.
-    """
-    pitch_rad = np.deg2rad(pitch)  # X
-    yaw_rad = np.deg2rad(yaw)  # Y
-    roll_rad = np.deg2rad(roll)  # Z
-
-    cy = np.cos(yaw_rad * 0.5)
-    sy = np.sin(yaw_rad * 0.5)
-    cp = np.cos(pitch_rad * 0.5)
-    sp = np.sin(pitch_rad * 0.5)
-    cr = np.cos(roll_rad * 0.5)
-    sr = np.sin(roll_rad * 0.5)
-
-    w = cy * cp * cr + sy * sp * sr
-    x = cy * sp * cr - sy * cp * sr
-    y = sy * cp * cr + cy * sp * sr
-    z = cy * cp * sr - sy * sp * cr
-
-    return np.array([w, x, y, z])
+# GUI task scheduling: engine (point events, groups, actions) rate and the per-tick time budget.
+ENGINE_RATE = 200
+UI_FRAME_BUDGET = 0.012
 
 
 class CollapsibleFrame(ttk.Frame):
@@ -115,42 +96,70 @@ def update_home_position_ui():
             if var: var.set("")
 
 
-def sync_settings_to_global_state():
-    if not global_state.running: return
-    with global_state.controller_lock:
+def bind_settings():
+    """Propagates each engine setting from its Tk variable whenever the variable changes."""
+    def set_audit_log_enabled(enabled):
+        if global_state.audit_log is not None:
+            global_state.audit_log.enabled = enabled
+
+    def set_profiling_enabled(enabled):
+        global_state.sensor_profiler.enabled = enabled
+        global_state.gui_profiler.enabled = enabled
+
+    def set_drain_rate():
         try:
-            global_state.log_to_console_enabled = global_state.log_to_console_var.get()
-            global_state.play_action_sound = global_state.play_action_sound_var.get()
-            global_state.group_grace_period = global_state.group_grace_period_var.get()
-            global_state.beta_gain = global_state.beta_gain_var.get()
-            global_state.drift_correction_gain = global_state.drift_correction_gain_var.get()
-            global_state.correct_drift_when_still_enabled = global_state.correct_drift_when_still_var.get()
-            global_state.accelerometer_smoothing = global_state.accelerometer_smoothing_var.get()
-            global_state.pause_sensor_updates_enabled = global_state.pause_sensor_updates_var.get()
-            global_state.hit_tolerance = global_state.hit_tolerance_var.get()
-            global_state.distance_offset = global_state.distance_offset_var.get()
-            global_state.track_pitch = global_state.track_pitch_var.get()
-            global_state.track_yaw = global_state.track_yaw_var.get()
-            global_state.track_roll = global_state.track_roll_var.get()
-            global_state.action_interval = global_state.action_interval_var.get() / 1000.0
-            global_state.stockpile_mode_enabled = global_state.stockpile_mode_var.get()
-            global_state.action_count_file_path = global_state.action_count_file_path_var.get()
-            new_total_actions = global_state.total_actions_completed_var.get()
-            if new_total_actions != global_state.total_actions_completed:
-                global_state.total_actions_completed = new_total_actions
-                write_action_count_to_file()
-
-            global_state.log_tip_position_enabled = global_state.log_tip_position_var.get()
-            global_state.console_log_interval = global_state.console_log_interval_var.get()
-
-            global_state.lock_pitch_to = global_state.lock_pitch_to_var.get()
-            global_state.lock_yaw_to = global_state.lock_yaw_to_var.get()
-            global_state.lock_roll_to = global_state.lock_roll_to_var.get()
-            global_state.axis_lock_strength = global_state.axis_lock_strength_var.get()
-
-        except (AttributeError, tk.TclError, ValueError):
+            global_state.stockpile_drain.rate = global_state.stockpile_drain_rate_var.get()
+        except (tk.TclError, ValueError):
             pass
 
+    def filter_type(value):
+        if value not in FILTER_TYPES:
+            raise ValueError(value)
+        return value
+
+    store = global_state.settings_store = SettingsStore()
+    for name, var in (('log_to_console_enabled', global_state.log_to_console_var),
+                      ('play_action_sound', global_state.play_action_sound_var),
+                      ('group_grace_period', global_state.group_grace_period_var),
+                      ('beta_gain', global_state.beta_gain_var),
+                      ('drift_correction_gain', global_state.drift_correction_gain_var),
+                      ('correct_drift_when_still_enabled', global_state.correct_drift_when_still_var),
+                      ('accelerometer_smoothing', global_state.accelerometer_smoothing_var),
+                      ('filter_gyro_enabled', global_state.filter_gyro_var),
+                      ('gyro_smoothing', global_state.gyro_smoothing_var),
+                      ('one_euro_min_cutoff', global_state.one_euro_min_cutoff_var),
+                      ('one_euro_beta', global_state.one_euro_beta_var),
+                      ('biquad_cutoff_hz', global_state.biquad_cutoff_hz_var),
+                      ('pause_sensor_updates_enabled', global_state.pause_sensor_updates_var),
+                      ('hit_tolerance', global_state.hit_tolerance_var),
+                      ('distance_offset', global_state.distance_offset_var),
+                      ('show_motion_trail', global_state.show_motion_trail_var),
+                      ('motion_trail_seconds', global_state.motion_trail_seconds_var),
+                      ('telemetry_enabled', global_state.telemetry_enabled_var),
+                      ('track_pitch', global_state.track_pitch_var),
+                      ('track_yaw', global_state.track_yaw_var),
+                      ('track_roll', global_state.track_roll_var),
+                      ('stockpile_mode_enabled', global_state.stockpile_mode_var),
+                      ('action_count_file_path', global_state.action_count_file_path_var),
+                      ('log_tip_position_enabled', global_state.log_tip_position_var),
+                      ('console_log_interval', global_state.console_log_interval_var),
+                      ('lock_pitch_to', global_state.lock_pitch_to_var),
+                      ('lock_yaw_to', global_state.lock_yaw_to_var),
+                      ('lock_roll_to', global_state.lock_roll_to_var),
+                      ('axis_lock_strength', global_state.axis_lock_strength_var)):
+        store.bind(name, var)
+    store.bind('sensor_filter_type', global_state.sensor_filter_type_var, filter_type)
+    store.bind('telemetry_address', global_state.telemetry_address_var, str.strip)
+    store.bind('action_interval', global_state.action_interval_var, lambda ms: ms / 1000.0)
+    store.bind('audit_log_enabled', global_state.audit_log_enabled_var, on_change=set_audit_log_enabled)
+    store.bind('gestures_enabled', global_state.gestures_enabled_var,
+               on_change=lambda enabled: setattr(global_state.gesture_recognizer, 'enabled', enabled))
+    store.bind('profiling_enabled', global_state.profiling_enabled_var, on_change=set_profiling_enabled)
+    # Only an edit of the counter entry changes the total here; actions update both sides already.
+    store.bind('total_actions_completed', global_state.total_actions_completed_var,
+               on_change=lambda total: write_action_count_to_file())
+    global_state.stockpile_drain_rate_var.trace_add('write', lambda *_: set_drain_rate())
+
 
 def update_camera_settings(*args):
     try:
@@ -181,13 +190,55 @@ def toggle_point_labels():
 
 def load_config_and_update_gui(root, ref_tree, group_tree, collapsible_frames, filepath=None, initial_load=False):
     if load_config(root, ref_tree, group_tree, collapsible_frames, filepath, initial_load):
+        global_state.loaded_config_path = filepath
+        if global_state.config_watcher is not None:
+            global_state.config_watcher.watch(filepath)
         update_camera_settings()
         update_object_dimensions()
         update_home_position_ui()
+        gesture_tree = getattr(collapsible_frames.get('gestures'), 'template_tree', None)
+        if gesture_tree is not None:
+            refresh_gesture_tree(gesture_tree)
+        preload_action_sounds()
         if not initial_load:
             zero_orientation()
 
 
+def hot_reload_config(filepath):
+    """Applies only what changed in the config file, keeping hit history and cooldowns elsewhere."""
+    try:
+        config_data = read_config_file(filepath)
+    except (OSError, ValueError) as e:
+        # Usually a script mid-write; the next change notification will retry.
+        config_log.warning("Hot-reload skipped, could not read %s: %s", filepath, e)
+        return
+    _, chain_problems = detach_invalid_chains(config_data.get('reference_points', []))
+    if chain_problems:
+        config_log.warning("Hot-reload skipped, invalid chains in %s: %s", filepath, '; '.join(chain_problems))
+        return
+    diff = diff_config(config_data)
+    summary = describe_config_diff(diff)
+    if not summary:
+        return
+    apply_config_diff(diff, ref_tree, group_tree)
+    if diff.settings:
+        update_camera_settings()
+        update_object_dimensions()
+    if diff.gesture_templates is not UNCHANGED:
+        refresh_gesture_tree(gesture_cf.template_tree)
+    refresh_edit_dropdowns(ref_tree, group_combo, chain_combo)
+    preload_action_sounds()
+    config_log.info("Hot-reloaded from %s: %s", filepath, summary)
+
+
+def preload_action_sounds():
+    """Decodes the global action sound and any per-group 'sound_path' before they're first triggered."""
+    with global_state.controller_lock:
+        paths = {global_state.action_sound_path}
+        paths.update(group.get('sound_path') for group in global_state.reference_point_groups.values())
+    global_state.audio_cues.preload(sorted(path for path in paths if path))
+
+
 def load_action_sound():
     def open_dialog():
         root.update_idletasks()
@@ -195,10 +246,11 @@ def load_action_sound():
             filepath = filedialog.askopenfilename(
                 parent=root,
                 title="Load Action Sound",
-                filetypes=[("Audio Files", "*.wav *.mp3"), ("All Files", "*.*")]
+                filetypes=[("WAV Files", "*.wav"), ("All Files", "*.*")]
             )
             if filepath and os.path.exists(filepath):
                 global_state.action_sound_path = filepath
+                global_state.audio_cues.preload([filepath])
                 print(f"Action sound set to: {filepath}")
         except Exception as e:
             messagebox.showerror("Load Sound Error", f"Could not open file dialog or load sound.\n\nError: {e}")
@@ -225,15 +277,19 @@ def start_mapping(target_button):
     update_mapping_ui()
 
 
+def set_if_changed(var, value):
+    """Sets a Tk variable only when the value differs, sparing the bound widgets a redraw."""
+    if var is not None and var.get() != value:
+        var.set(value)
+
+
 def update_mapping_ui():
     with global_state.controller_lock:
         current_target = global_state.mapping_target
         home_status = "Listening..." if current_target == 'home' else f"({global_state.home_button_map})"
-        if global_state.mapping_home_status_var:
-            global_state.mapping_home_status_var.set(home_status)
         stockpile_status = "Listening..." if current_target == 'stockpile' else f"({global_state.execute_stockpiled_action_button or 'None'})"
-        if global_state.mapping_stockpile_status_var:
-            global_state.mapping_stockpile_status_var.set(stockpile_status)
+    set_if_changed(global_state.mapping_home_status_var, home_status)
+    set_if_changed(global_state.mapping_stockpile_status_var, stockpile_status)
 
 
 def toggle_visualization(root, vis_container, controls_container):
@@ -278,10 +334,20 @@ def bind_mousewheel_recursively(widget, canvas):
 
 def on_closing():
     global_state.running = False
+    if global_state.ui_scheduler is not None:
+        global_state.ui_scheduler.stop()
+    if global_state.config_watcher is not None:
+        global_state.config_watcher.stop()
+    action_executor.stop()
+    if global_state.audit_log is not None:
+        global_state.audit_log.stop()
+    global_state.stockpiled_actions.close()
+    global_state.audio_cues.stop()
     if global_state.controller_thread and global_state.controller_thread.is_alive():
         print("Joining controller thread...")
         global_state.controller_thread.join(timeout=2)
     print("Closing application window.")
+    shutdown_logging()
     root.destroy()
 
 
@@ -290,8 +356,8 @@ def add_reference_point(tree, position=None):
         if position is None:
             position = global_state.controller_tip_position
         point_id = str(uuid.uuid4().hex[:6])
-        new_point = {'id': point_id, 'position': list(position), 'hit': False, 'is_active': True, 'chain_parent': None}
-        global_state.reference_points.append(new_point)
+        global_state.reference_points.add({'id': point_id, 'position': list(position)})
+        global_state.reference_points_version += 1
         tree.insert('', 'end', iid=point_id,
                     values=(point_id, f"{position[0]:.2f}", f"{position[1]:.2f}", f"{position[2]:.2f}"))
     refresh_edit_dropdowns(ref_tree, group_combo, chain_combo)
@@ -314,11 +380,11 @@ def delete_reference_point(tree):
         return
 
     with global_state.controller_lock:
+        points = global_state.reference_points
         for item_id in selected_items:
-            global_state.reference_points = [p for p in global_state.reference_points if p['id'] != item_id]
-            for p in global_state.reference_points:
-                if p.get('chain_parent') == item_id:
-                    p['chain_parent'] = None
+            # Points chained to it become unchained.
+            points.remove([item_id])
+            global_state.reference_points_version += 1
             if item_id in global_state.point_hit_history:
                 del global_state.point_hit_history[item_id]
             for group_id, group_data in global_state.reference_point_groups.items():
@@ -341,15 +407,15 @@ def refresh_edit_dropdowns(point_tree, group_combo, chain_combo):
 
         point_ids_for_chain = ['None']
         if selected_iid:
-            point_ids_for_chain.extend([p['id'] for p in global_state.reference_points if p['id'] != selected_iid[0]])
+            point_ids_for_chain.extend([pid for pid in global_state.reference_points.ids if pid != selected_iid[0]])
         else:
-            point_ids_for_chain.extend([p['id'] for p in global_state.reference_points])
+            point_ids_for_chain.extend(global_state.reference_points.ids)
 
         chain_combo['values'] = point_ids_for_chain
 
     if selected_iid:
         with global_state.controller_lock:
-            point = next((p for p in global_state.reference_points if p['id'] == selected_iid[0]), None)
+            point = global_state.reference_points.get(selected_iid[0])
             if point:
                 current_group_name = 'None'
                 for group_id, group_data in global_state.reference_point_groups.items():
@@ -374,7 +440,7 @@ def on_point_select(event, tree, edit_frame, group_combo, chain_combo):
 
     selected_iid = selected_iid[0]
     with global_state.controller_lock:
-        point = next((p for p in global_state.reference_points if p['id'] == selected_iid), None)
+        point = global_state.reference_points.get(selected_iid)
         if point:
             global_state.edit_id_var.set(point['id'])
             global_state.edit_x_var.set(f"{point['position'][0]:.2f}")
@@ -400,6 +466,7 @@ def create_group(tree):
         new_group = {"name": new_name, "point_ids": set(), "hit_timestamps": {},
                      "action": {"type": "Key Press", "detail": ""}}
         global_state.reference_point_groups[group_id] = new_group
+        global_state.reference_point_groups_version += 1
 
     tree.insert('', 'end', iid=group_id, values=(new_group['name'],))
     tree.selection_set(group_id)
@@ -417,6 +484,7 @@ def delete_group(tree):
                            f"Are you sure you want to delete group '{global_state.reference_point_groups[selected_id]['name']}'?"):
         with global_state.controller_lock:
             del global_state.reference_point_groups[selected_id]
+            global_state.reference_point_groups_version += 1
         tree.delete(selected_id)
     refresh_edit_dropdowns(ref_tree, group_combo, chain_combo)
 
@@ -448,8 +516,8 @@ def on_group_select(event, tree, details_frame, member_list_tree):
             global_state.group_action_type_var.set(action.get('type', 'Key Press'))
             global_state.group_action_detail_var.set(action.get('detail', ''))
             for point_id in group_data.get('point_ids', set()):
-                point = next((p for p in global_state.reference_points if p['id'] == point_id), None)
-                if point: member_list_tree.insert('', 'end', iid=f"member_{point_id}", values=(point_id,))
+                if point_id in global_state.reference_points:
+                    member_list_tree.insert('', 'end', iid=f"member_{point_id}", values=(point_id,))
 
 
 def update_group_details(tree):
@@ -457,6 +525,13 @@ def update_group_details(tree):
     if not selected_id: messagebox.showinfo("No Selection", "Please select a group to update."); return
     selected_id = selected_id[0]
 
+    if global_state.group_action_type_var.get() == 'Macro':
+        try:
+            parse_macro(global_state.group_action_detail_var.get())
+        except ValueError as e:
+            messagebox.showerror("Invalid Macro", f"{e}\n\nExample: down:ctrl, tap:c, up:ctrl, wait:20, click:left")
+            return
+
     with global_state.controller_lock:
         group_data = global_state.reference_point_groups.get(selected_id)
         if group_data:
@@ -483,6 +558,15 @@ def update_selected_point(tree, edit_frame, group_combo):
         new_values = (new_id, f"{new_x:.2f}", f"{new_y:.2f}", f"{new_z:.2f}")
 
         with global_state.controller_lock:
+            points = global_state.reference_points
+            if new_id != original_iid and new_id in points:
+                raise ValueError(f"A point with id '{new_id}' already exists.")
+            if original_iid in points:
+                # First, so a chain cycle is rejected (ChainError) before anything has changed.
+                points.set_parent(original_iid, new_chain_parent)
+                points.rename(original_iid, new_id)
+                points.positions[points.index[new_id]] = (new_x, new_y, new_z)
+                global_state.reference_points_version += 1
             for g_id, g_data in list(global_state.reference_point_groups.items()):
                 if original_iid in g_data.get('point_ids', set()):
                     g_data['point_ids'].remove(original_iid)
@@ -494,12 +578,7 @@ def update_selected_point(tree, edit_frame, group_combo):
                 if group_id in global_state.reference_point_groups:
                     global_state.reference_point_groups[group_id]['point_ids'].add(new_id)
                     print(f"Assigned point {new_id} to group '{group_name}'")
-
-            point_to_update = next((p for p in global_state.reference_points if p['id'] == original_iid), None)
-            if point_to_update:
-                point_to_update['id'] = new_id
-                point_to_update['position'] = [new_x, new_y, new_z]
-                point_to_update['chain_parent'] = new_chain_parent
+            global_state.reference_point_groups_version += 1
 
         if original_iid != new_id:
             index = tree.index(original_iid)
@@ -533,13 +612,12 @@ def set_home_and_update_points(ref_tree):
         q_old_inv = quaternion_inverse(q_old)
         q_delta = quaternion_multiply(q_new, q_old_inv)
 
-        for point in global_state.reference_points:
-            p_old = np.array(point['position'])
-            p_new = rotate_point_by_quaternion(p_old, q_delta)
-            point['position'] = list(p_new)
-            point_id = point['id']
+        points = global_state.reference_points
+        points.positions[:] = rotate_points_by_quaternion_batch(points.positions.astype(float), q_delta)
+        for point_id, p_new in zip(points.ids, points.positions.tolist()):
             new_values = (point_id, f"{p_new[0]:.2f}", f"{p_new[1]:.2f}", f"{p_new[2]:.2f}")
             if ref_tree.exists(point_id): ref_tree.item(point_id, values=new_values)
+        global_state.reference_points_version += 1
 
         d_pitch, d_yaw, d_roll = quaternion_to_euler(q_delta)
         global_state.camera_orbit_x -= d_pitch
@@ -599,6 +677,44 @@ def write_action_count_to_file():
             log_error(e)
 
 
+def update_stockpile_count():
+    if global_state.stockpiled_actions_count_var:
+        draining = " - draining" if global_state.stockpile_drain.active else ""
+        global_state.stockpiled_actions_count_var.set(f"({len(global_state.stockpiled_actions)}{draining})")
+
+
+def toggle_stockpile_drain():
+    """Starts or stops replaying every stockpiled action at the configured rate."""
+    with global_state.controller_lock:
+        if global_state.stockpile_drain.active:
+            global_state.stockpile_drain.stop()
+        elif len(global_state.stockpiled_actions):
+            global_state.stockpile_drain.start(time.monotonic())
+        update_stockpile_count()
+
+
+def clear_stockpile():
+    if messagebox.askyesno("Confirm Clear", "Discard all stockpiled actions?"):
+        with global_state.controller_lock:
+            global_state.stockpiled_actions.clear()
+            global_state.stockpile_drain.stop()
+            update_stockpile_count()
+
+
+def drain_stockpile(action_executor, now):
+    """Executes the stockpiled actions due this tick while a 'drain all' is running."""
+    with global_state.controller_lock:
+        due = global_state.stockpile_drain.due(now)
+        if not due:
+            return
+        actions = global_state.stockpiled_actions.pop_many(due)
+        if not len(global_state.stockpiled_actions):
+            global_state.stockpile_drain.stop()
+        update_stockpile_count()
+    for entry in actions:
+        dispatch_action(action_executor, entry.action, entry.group_id, stockpiled=True)
+
+
 def reset_action_count():
     if messagebox.askyesno("Confirm Reset", "Are you sure you want to reset the total action count to 0?"):
         with global_state.controller_lock:
@@ -631,7 +747,110 @@ def browse_for_action_count_file():
     root.after_idle(open_dialog)
 
 
-def handle_action_completion(group_data, action_executor):
+def group_name_for_id(group_id):
+    group_data = global_state.reference_point_groups.get(group_id)
+    return group_data.get('name', 'Unnamed Group') if group_data else 'None'
+
+
+def refresh_gesture_tree(tree):
+    tree.delete(*tree.get_children())
+    with global_state.controller_lock:
+        for template_id, template in global_state.gesture_recognizer.templates.items():
+            tree.insert('', 'end', iid=template_id,
+                        values=(template.name, group_name_for_id(template.group_id), f"{template.threshold:.3f}"))
+
+
+def refresh_gesture_group_choices(combo):
+    with global_state.controller_lock:
+        group_names = ['None'] + [g['name'] for g in global_state.reference_point_groups.values()]
+        combo.name_to_id_map = {g['name']: gid for gid, g in global_state.reference_point_groups.items()}
+    combo['values'] = group_names
+
+
+def toggle_gesture_recording(tree, record_button, group_combo):
+    recognizer = global_state.gesture_recognizer
+    with global_state.controller_lock:
+        if not recognizer.is_recording():
+            recognizer.start_recording()
+            record_button.config(text="Stop Recording")
+            print("Recording gesture... perform the motion, then click Stop Recording.")
+            return
+        name = global_state.gesture_name_var.get().strip() or f"Gesture {len(recognizer.templates) + 1}"
+        group_id = getattr(group_combo, 'name_to_id_map', {}).get(global_state.gesture_group_var.get())
+        template = recognizer.stop_recording(name, group_id=group_id,
+                                             threshold=global_state.gesture_threshold_var.get())
+    record_button.config(text="Start Recording")
+    if template is None:
+        messagebox.showwarning("Gesture Too Short", "Not enough motion was recorded for a gesture template.")
+        return
+    print(f"Recorded gesture '{template.name}' ({template.duration:.2f}s)")
+    refresh_gesture_tree(tree)
+
+
+def update_selected_gesture(tree, group_combo):
+    selected = tree.selection()
+    if not selected: messagebox.showinfo("No Selection", "Please select a gesture to update."); return
+    with global_state.controller_lock:
+        template = global_state.gesture_recognizer.templates.get(selected[0])
+        if template:
+            template.name = global_state.gesture_name_var.get().strip() or template.name
+            template.group_id = getattr(group_combo, 'name_to_id_map', {}).get(global_state.gesture_group_var.get())
+            template.threshold = global_state.gesture_threshold_var.get()
+    refresh_gesture_tree(tree)
+
+
+def delete_selected_gesture(tree):
+    selected = tree.selection()
+    if not selected: messagebox.showinfo("No Selection", "Please select a gesture to delete."); return
+    with global_state.controller_lock:
+        for template_id in selected:
+            global_state.gesture_recognizer.remove_template(template_id)
+    refresh_gesture_tree(tree)
+
+
+def on_gesture_select(tree):
+    selected = tree.selection()
+    if not selected: return
+    with global_state.controller_lock:
+        template = global_state.gesture_recognizer.templates.get(selected[0])
+        if template:
+            global_state.gesture_name_var.set(template.name)
+            global_state.gesture_group_var.set(group_name_for_id(template.group_id))
+            global_state.gesture_threshold_var.set(template.threshold)
+
+
+def reset_profiler_stats():
+    global_state.sensor_profiler.reset()
+    global_state.gui_profiler.reset()
+
+
+def update_profiler_ui(profiler_tree, timing_label=None, ui_scheduler=None):
+    """Refreshes the rolling mean/max table for every instrumented stage, GUI task and the sensor loop timing."""
+    rows = []
+    for prefix, profiler in (('sensor', global_state.sensor_profiler), ('gui', global_state.gui_profiler)):
+        for stage, (mean_ms, max_ms, count) in profiler.stats().items():
+            rows.append((f"{prefix}.{stage}", mean_ms, max_ms, count))
+    if ui_scheduler is not None:
+        ui_stats = ui_scheduler.stats()
+        rows.append(("ui.frame", ui_stats['frame_ms'], ui_stats['max_frame_ms'], ""))
+        for name, task in ui_stats['tasks'].items():
+            deferred = f" ({task['deferred']} deferred)" if task['deferred'] else ""
+            rows.append((f"ui.{name}", task['avg_ms'], task['max_ms'], f"{task['runs']}{deferred}"))
+    for iid, mean_ms, max_ms, count in rows:
+        values = (iid, f"{mean_ms:.3f}", f"{max_ms:.3f}", count)
+        if profiler_tree.exists(iid):
+            profiler_tree.item(iid, values=values)
+        else:
+            profiler_tree.insert('', 'end', iid=iid, values=values)
+    timing = global_state.sensor_timing
+    if timing_label is not None and timing:
+        timing_label.config(text=f"Sensor loop: period {timing['period_ms']:.2f} ms (target {timing['target_ms']:.2f}, "
+                                 f"max {timing['max_period_ms']:.2f}), jitter {timing['jitter_ms']:.3f} ms, "
+                                 f"late {timing['lateness_ms']:.3f} ms (max {timing['max_lateness_ms']:.2f}), "
+                                 f"overruns {timing['overruns']}")
+
+
+def handle_action_completion(group_data, action_executor, group_id=None):
     with global_state.controller_lock:
         global_state.total_actions_completed += 1
         global_state.session_actions_completed += 1
@@ -642,15 +861,47 @@ def handle_action_completion(group_data, action_executor):
         write_action_count_to_file()
 
         if global_state.stockpile_mode_enabled:
-            global_state.stockpiled_actions.append(group_data['action'])
-            if global_state.stockpiled_actions_count_var: global_state.stockpiled_actions_count_var.set(
-                f"({len(global_state.stockpiled_actions)})")
-            print(f"Action stockpiled. Total stockpiled: {len(global_state.stockpiled_actions)}")
-        else:
-            action_executor.execute(group_data['action'])
+            global_state.stockpiled_actions.push(group_data['action'], group_id)
+            update_stockpile_count()
+            action_log.info("Action stockpiled. Total stockpiled: %d", len(global_state.stockpiled_actions))
+            return
+    dispatch_action(action_executor, group_data['action'], group_id, group_data.get('sound_path'))
+
+
+def dispatch_action(action_executor, action, group_id, sound_path=None, stockpiled=False):
+    """Executes an action and publishes ActionDispatched for it (audit log, ...)."""
+    action_executor.execute(action, sound_path)
+    global_state.event_bus.publish(ActionDispatched(time.monotonic(), group_id, action, stockpiled))
+
+
+def parse_command_line(argv):
+    parser = argparse.ArgumentParser(description="PyDualSense MotionToKey")
+    parser.add_argument("--input", choices=("sdl", "dsu"), default="sdl",
+                        help="sensor source: a local SDL controller or a DSU (cemuhook) UDP server")
+    parser.add_argument("--dsu-server", default=f"127.0.0.1:{DSU_DEFAULT_PORT}", help="DSU server host:port")
+    parser.add_argument("--dsu-slot", type=int, default=0, help="DSU controller slot (0-3)")
+    parser.add_argument("--sensor-process", action="store_true",
+                        help="run sensor polling, filtering and hit detection in a separate process")
+    parser.add_argument("--sensor-spin-us", type=float, default=0.0,
+                        help="busy-wait this many microseconds before each sensor deadline for tighter timing")
+    parser.add_argument("--sensor-nice", type=int, default=None, help="nice value for the sensor thread (Linux)")
+    parser.add_argument("--sensor-affinity", default="", help="CPUs for the sensor thread, e.g. '2' or '2-3' (Linux)")
+    parser.add_argument("--sensor-realtime", type=int, default=None, metavar="PRIORITY",
+                        help="run the sensor thread under SCHED_FIFO at this priority (Linux, needs privileges)")
+    parser.add_argument("--log-level", default="INFO", choices=("DEBUG", "INFO", "WARNING", "ERROR"),
+                        help="diagnostics level; DEBUG shows every hit and group check")
+    parser.add_argument("--audio-sink", default=None, metavar="WAV",
+                        help="write action sounds to this WAV file instead of the audio device")
+    args, _ = parser.parse_known_args(argv)
+    return args
 
 
 if __name__ == "__main__":
+    # In a frozen (PyInstaller) build the spawned sensor process re-runs this script; this hands
+    # it to multiprocessing instead of opening a second GUI.
+    multiprocessing.freeze_support()
+    command_line = parse_command_line(sys.argv[1:])
+    setup_logging(command_line.log_level)
     GLUT.glutInit(sys.argv)
     root = tk.Tk()
     root.title("PyDualM2K")
@@ -661,6 +912,12 @@ if __name__ == "__main__":
     global_state.show_visualization_var = tk.BooleanVar(value=True)
     global_state.pause_sensor_updates_var = tk.BooleanVar(value=False)
     global_state.show_ref_point_labels_var = tk.BooleanVar(value=True)
+    global_state.show_motion_trail_var = tk.BooleanVar(value=global_state.show_motion_trail)
+    global_state.telemetry_enabled_var = tk.BooleanVar(value=global_state.telemetry_enabled)
+    global_state.telemetry_address_var = tk.StringVar(value=global_state.telemetry_address)
+    global_state.config_hot_reload_var = tk.BooleanVar(value=True)
+    global_state.audit_log_enabled_var = tk.BooleanVar(value=global_state.audit_log_enabled)
+    global_state.motion_trail_seconds_var = tk.DoubleVar(value=global_state.motion_trail_seconds)
     global_state.play_action_sound_var = tk.BooleanVar(value=True)
     global_state.save_filename_var = tk.StringVar(value="config.json")
     global_state.load_filename_var = tk.StringVar()
@@ -680,6 +937,12 @@ if __name__ == "__main__":
     global_state.log_to_console_var = tk.BooleanVar(value=False)
     global_state.correct_drift_when_still_var = tk.BooleanVar(value=global_state.correct_drift_when_still_enabled)
     global_state.accelerometer_smoothing_var = tk.DoubleVar(value=global_state.accelerometer_smoothing)
+    global_state.sensor_filter_type_var = tk.StringVar(value=global_state.sensor_filter_type)
+    global_state.filter_gyro_var = tk.BooleanVar(value=global_state.filter_gyro_enabled)
+    global_state.gyro_smoothing_var = tk.DoubleVar(value=global_state.gyro_smoothing)
+    global_state.one_euro_min_cutoff_var = tk.DoubleVar(value=global_state.one_euro_min_cutoff)
+    global_state.one_euro_beta_var = tk.DoubleVar(value=global_state.one_euro_beta)
+    global_state.biquad_cutoff_hz_var = tk.DoubleVar(value=global_state.biquad_cutoff_hz)
     global_state.home_name_var, global_state.home_q_w_var, global_state.home_q_x_var, global_state.home_q_y_var, global_state.home_q_z_var = tk.StringVar(), tk.StringVar(), tk.StringVar(), tk.StringVar(), tk.StringVar()
     global_state.group_name_var, global_state.group_action_type_var, global_state.group_action_detail_var = tk.StringVar(), tk.StringVar(
         value="Key Press"), tk.StringVar()
@@ -692,6 +955,7 @@ if __name__ == "__main__":
     global_state.action_count_file_path_var = tk.StringVar(value="")
     global_state.stockpile_mode_var = tk.BooleanVar(value=False)
     global_state.stockpiled_actions_count_var = tk.StringVar(value="(0)")
+    global_state.stockpile_drain_rate_var = tk.DoubleVar(value=global_state.stockpile_drain.rate)
     global_state.mapping_home_status_var = tk.StringVar()
     global_state.mapping_stockpile_status_var = tk.StringVar()
     global_state.log_tip_position_var = tk.BooleanVar(value=False)
@@ -701,6 +965,11 @@ if __name__ == "__main__":
     global_state.lock_roll_to_var = tk.DoubleVar(value=0.0)
     global_state.axis_lock_strength_var = tk.DoubleVar(value=0.1)
     global_state.unintended_movement_status_var = tk.StringVar(value="")
+    global_state.profiling_enabled_var = tk.BooleanVar(value=False)
+    global_state.gestures_enabled_var = tk.BooleanVar(value=global_state.gestures_enabled)
+    global_state.gesture_name_var = tk.StringVar()
+    global_state.gesture_group_var = tk.StringVar(value='None')
+    global_state.gesture_threshold_var = tk.DoubleVar(value=0.05)
 
     main_frame = ttk.Frame(root);
     main_frame.pack(fill="both", expand=True, padx=10, pady=10)
@@ -791,6 +1060,9 @@ if __name__ == "__main__":
     group_cf = CollapsibleFrame(scrollable_frame, "Point Groups & Actions", True);
     group_cf.pack(fill='x', expand=True, padx=5, pady=5);
     collapsible_frames['groups'] = group_cf
+    gesture_cf = CollapsibleFrame(scrollable_frame, "Gestures", True);
+    gesture_cf.pack(fill='x', expand=True, padx=5, pady=5);
+    collapsible_frames['gestures'] = gesture_cf
     ref_points_cf = CollapsibleFrame(scrollable_frame, "Reference Points", True);
     ref_points_cf.pack(fill='x', expand=True, padx=5, pady=5);
     collapsible_frames['ref_points'] = ref_points_cf
@@ -812,6 +1084,9 @@ if __name__ == "__main__":
     debug_cf = CollapsibleFrame(scrollable_frame, "Debug Tools", True);
     debug_cf.pack(fill='x', expand=True, padx=5, pady=5);
     collapsible_frames['debug'] = debug_cf
+    profiler_cf = CollapsibleFrame(scrollable_frame, "Performance Profiler", True);
+    profiler_cf.pack(fill='x', expand=True, padx=5, pady=5);
+    collapsible_frames['profiler'] = profiler_cf
     config_cf = CollapsibleFrame(scrollable_frame, "Configuration", True);
     config_cf.pack(fill='x', expand=True, padx=5, pady=5);
     collapsible_frames['config'] = config_cf
@@ -821,6 +1096,13 @@ if __name__ == "__main__":
                                                                                                         padx=5)
     ttk.Checkbutton(view_cf.content_frame, text="Pause Sensor Updates",
                     variable=global_state.pause_sensor_updates_var).pack(anchor='w', padx=5)
+    ttk.Checkbutton(view_cf.content_frame, text="Show Motion Trail",
+                    variable=global_state.show_motion_trail_var).pack(anchor='w', padx=5)
+    trail_frame = ttk.Frame(view_cf.content_frame)
+    trail_frame.pack(fill='x')
+    trail_frame.columnconfigure(1, weight=1)
+    create_slider_entry(trail_frame, "Trail Length (s):", global_state.motion_trail_seconds_var, 0.2, 10.0, 0,
+                        digits=1)
 
     controller_actions_frame = ttk.Frame(controller_cf.content_frame)
     controller_actions_frame.pack(fill='x', padx=5, pady=2)
@@ -877,6 +1159,16 @@ if __name__ == "__main__":
         side='left', padx=5, pady=2)
     ttk.Label(stockpile_map_frame, textvariable=global_state.mapping_stockpile_status_var, foreground="blue").pack(
         side='left', padx=5)
+    stockpile_drain_frame = ttk.Frame(stockpile_lf)
+    stockpile_drain_frame.grid(row=2, column=0, columnspan=3, sticky='ew')
+    ttk.Label(stockpile_drain_frame, text="Queued:").pack(side='left', padx=(5, 2))
+    ttk.Label(stockpile_drain_frame, textvariable=global_state.stockpiled_actions_count_var).pack(side='left')
+    ttk.Button(stockpile_drain_frame, text="Clear", command=clear_stockpile).pack(side='right', padx=5, pady=2)
+    ttk.Button(stockpile_drain_frame, text="Drain All", command=toggle_stockpile_drain).pack(side='right', padx=2,
+                                                                                            pady=2)
+    ttk.Label(stockpile_drain_frame, text="/s").pack(side='right')
+    ttk.Spinbox(stockpile_drain_frame, from_=0.5, to=MAX_DRAIN_RATE, increment=0.5, width=5,
+                textvariable=global_state.stockpile_drain_rate_var).pack(side='right', padx=(5, 2))
 
     stats_lf = ttk.LabelFrame(stats_content, text="Action Counter");
     stats_lf.pack(fill='x', padx=5, pady=5);
@@ -918,7 +1210,7 @@ if __name__ == "__main__":
                                                                                   pady=2)
     ttk.Label(group_details_frame, text="Action Type:").grid(row=3, column=0, sticky='w', padx=5, pady=2)
     action_type_combo = ttk.Combobox(group_details_frame, textvariable=global_state.group_action_type_var,
-                                     values=["Key Press", "Mouse Click"], state="readonly");
+                                     values=["Key Press", "Mouse Click", "Macro"], state="readonly");
     action_type_combo.grid(row=3, column=1, sticky='ew', padx=5, pady=2)
     ttk.Label(group_details_frame, text="Action Detail:").grid(row=4, column=0, sticky='w', padx=5, pady=2)
     ttk.Entry(group_details_frame, textvariable=global_state.group_action_detail_var).grid(row=4, column=1, sticky='ew',
@@ -935,6 +1227,40 @@ if __name__ == "__main__":
     group_tree.bind('<<TreeviewSelect>>',
                     lambda e: on_group_select(e, group_tree, group_details_frame, member_list_tree))
 
+    gesture_content = gesture_cf.content_frame
+    ttk.Checkbutton(gesture_content, text="Enable Gesture Recognition",
+                    variable=global_state.gestures_enabled_var).pack(anchor='w', padx=5)
+    gesture_details_frame = ttk.LabelFrame(gesture_content, text="Gesture Details")
+    gesture_details_frame.pack(fill='x', padx=5, pady=5)
+    ttk.Label(gesture_details_frame, text="Name:").grid(row=0, column=0, sticky='w', padx=5, pady=2)
+    ttk.Entry(gesture_details_frame, textvariable=global_state.gesture_name_var).grid(row=0, column=1, columnspan=2,
+                                                                                      sticky='ew', padx=5, pady=2)
+    ttk.Label(gesture_details_frame, text="Trigger Group:").grid(row=1, column=0, sticky='w', padx=5, pady=2)
+    gesture_group_combo = ttk.Combobox(gesture_details_frame, textvariable=global_state.gesture_group_var,
+                                       state="readonly")
+    gesture_group_combo.configure(postcommand=lambda: refresh_gesture_group_choices(gesture_group_combo))
+    gesture_group_combo.grid(row=1, column=1, columnspan=2, sticky='ew', padx=5, pady=2)
+    refresh_gesture_group_choices(gesture_group_combo)
+    create_slider_entry(gesture_details_frame, "Match Threshold:", global_state.gesture_threshold_var, 0.005, 0.3, 2,
+                        digits=3)
+    gesture_buttons_frame = ttk.Frame(gesture_content)
+    gesture_buttons_frame.pack(fill='x', padx=5, pady=2)
+    gesture_record_btn = ttk.Button(gesture_buttons_frame, text="Start Recording")
+    gesture_record_btn.pack(side='left', fill='x', expand=True, padx=(0, 5))
+    ttk.Button(gesture_buttons_frame, text="Update",
+               command=lambda: update_selected_gesture(gesture_tree, gesture_group_combo)).pack(side='left', padx=(0, 5))
+    ttk.Button(gesture_buttons_frame, text="Delete",
+               command=lambda: delete_selected_gesture(gesture_tree)).pack(side='left')
+    gesture_tree = ttk.Treeview(gesture_content, columns=('Name', 'Group', 'Threshold'), show='headings', height=4)
+    gesture_tree.pack(fill='x', expand=True, padx=5, pady=5)
+    for col, w in [('Name', 120), ('Group', 120), ('Threshold', 70)]:
+        gesture_tree.heading(col, text=col)
+        gesture_tree.column(col, width=w, anchor='w')
+    gesture_record_btn.configure(
+        command=lambda: toggle_gesture_recording(gesture_tree, gesture_record_btn, gesture_group_combo))
+    gesture_tree.bind('<<TreeviewSelect>>', lambda e: on_gesture_select(gesture_tree))
+    gesture_cf.template_tree = gesture_tree
+
     ref_content = ref_points_cf.content_frame
     ttk.Button(ref_content, text="Record Current Tip Position", command=lambda: add_reference_point(ref_tree)).pack(
         fill='x', padx=5, pady=2)
@@ -997,6 +1323,19 @@ if __name__ == "__main__":
                         1.0, 2, digits=2)
     ttk.Checkbutton(filter_cf.content_frame, text="Drift-Correct Only When Still",
                     variable=global_state.correct_drift_when_still_var).grid(row=3, columnspan=3, sticky='w', padx=5)
+    ttk.Label(filter_cf.content_frame, text="Sensor Filter:").grid(row=4, column=0, sticky='w', padx=5, pady=2)
+    ttk.Combobox(filter_cf.content_frame, textvariable=global_state.sensor_filter_type_var, values=list(FILTER_TYPES),
+                 state="readonly", width=12).grid(row=4, column=1, columnspan=2, sticky='ew', padx=5, pady=2)
+    ttk.Checkbutton(filter_cf.content_frame, text="Filter Gyroscope",
+                    variable=global_state.filter_gyro_var).grid(row=5, columnspan=3, sticky='w', padx=5)
+    create_slider_entry(filter_cf.content_frame, "Gyro Smoothing:", global_state.gyro_smoothing_var, 0.01, 1.0, 6,
+                        digits=2)
+    create_slider_entry(filter_cf.content_frame, "One-Euro Min Cutoff (Hz):", global_state.one_euro_min_cutoff_var,
+                        0.1, 10.0, 7, digits=2)
+    create_slider_entry(filter_cf.content_frame, "One-Euro Beta:", global_state.one_euro_beta_var, 0.0, 1.0, 8,
+                        digits=3)
+    create_slider_entry(filter_cf.content_frame, "Biquad Cutoff (Hz):", global_state.biquad_cutoff_hz_var, 1.0, 90.0,
+                        9, digits=1)
 
     create_slider_entry(camera_cf.content_frame, "Orbit X (Pitch):", global_state.camera_orbit_x_var, -180, 180, 0,
                         digits=2, cmd=update_camera_settings)
@@ -1061,6 +1400,34 @@ if __name__ == "__main__":
                                                                                                          padx=5)
     create_slider_entry(log_frame, "Log Interval (ms):", global_state.console_log_interval_var, 5, 1000, 2, digits=0)
 
+    telemetry_frame = ttk.LabelFrame(debug_content, text="Telemetry Stream")
+    telemetry_frame.pack(fill='x', padx=5, pady=5)
+    telemetry_frame.columnconfigure(1, weight=1)
+    ttk.Checkbutton(telemetry_frame, text="Publish Pose Telemetry",
+                    variable=global_state.telemetry_enabled_var).grid(row=0, columnspan=2, sticky='w', padx=5)
+    ttk.Label(telemetry_frame, text="Address:").grid(row=1, column=0, sticky='w', padx=5, pady=2)
+    ttk.Entry(telemetry_frame, textvariable=global_state.telemetry_address_var).grid(row=1, column=1, sticky='ew',
+                                                                                    padx=5, pady=2)
+    ttk.Checkbutton(debug_content, text="Write Trigger Audit Log (trigger_audit.jsonl)",
+                    variable=global_state.audit_log_enabled_var).pack(anchor='w', padx=5, pady=(0, 5))
+
+    profiler_content = profiler_cf.content_frame
+    profiler_controls_frame = ttk.Frame(profiler_content)
+    profiler_controls_frame.pack(fill='x', padx=5, pady=2)
+    ttk.Checkbutton(profiler_controls_frame, text="Enable Stage Profiling",
+                    variable=global_state.profiling_enabled_var).pack(side='left')
+    ttk.Button(profiler_controls_frame, text="Reset", command=reset_profiler_stats).pack(side='right')
+    profiler_tree = ttk.Treeview(profiler_content, columns=('Stage', 'Mean', 'Max', 'Samples'), show='headings',
+                                 height=11)
+    profiler_tree.pack(fill='x', expand=True, padx=5, pady=5)
+    for col, text, w in [('Stage', 'Stage', 130), ('Mean', 'Mean (ms)', 70), ('Max', 'Max (ms)', 70),
+                         ('Samples', 'Samples', 60)]:
+        profiler_tree.heading(col, text=text)
+        profiler_tree.column(col, width=w, anchor='w' if col == 'Stage' else 'e')
+    sensor_timing_label = ttk.Label(profiler_content, text="Sensor loop: waiting for data...", wraplength=380)
+    sensor_timing_label.pack(fill='x', padx=5, pady=(0, 5))
+    update_profiler_ui(profiler_tree, sensor_timing_label)
+
     config_content = config_cf.content_frame
     save_frame = ttk.LabelFrame(config_content, text="Save Configuration");
     save_frame.pack(fill='x', padx=5, pady=5)
@@ -1092,43 +1459,120 @@ if __name__ == "__main__":
                                                           filepath=global_state.load_filename_var.get())).pack(
         side='left', padx=(2, 5))
     refresh_load_list()
-    ttk.Button(config_content, text="Load Action Sound (.wav, .mp3)",
+    ttk.Checkbutton(config_content, text="Reload Changes Made to the Loaded File",
+                    variable=global_state.config_hot_reload_var).pack(anchor='w', padx=5)
+    ttk.Button(config_content, text="Load Action Sound (.wav)",
                command=lambda: root.after_idle(load_action_sound)).pack(fill='x', padx=5, pady=(10, 5))
 
     status_label = ttk.Label(root, textvariable=global_state.connection_status_text, anchor='w')
     status_label.pack(side="bottom", fill="x", padx=10, pady=2)
 
     action_executor = ActionExecutor()
-    global_state.controller_thread = threading.Thread(target=poll_controller_data, daemon=True)
+    global_state.stockpiled_actions.open(os.path.join(os.getcwd(), DEFAULT_JOURNAL))
+    update_stockpile_count()
+    global_state.config_watcher = ConfigWatcher()
+    global_state.config_watcher.start()
+    global_state.audit_log = AuditLog(global_state.event_bus, os.path.join(os.getcwd(), DEFAULT_AUDIT_PATH))
+    global_state.audit_log.start()
+    if command_line.audio_sink:
+        global_state.audio_cues.backend = FileSinkBackend(command_line.audio_sink)
+    global_state.audio_cues.start()
+    bind_settings()
+    source_args = (command_line.input, command_line.dsu_server, command_line.dsu_slot)
+    scheduling = SchedulingOptions(command_line.sensor_spin_us * 1e-6, command_line.sensor_nice,
+                                   parse_cpu_list(command_line.sensor_affinity), command_line.sensor_realtime)
+    if command_line.sensor_process:
+        sensor_process = SensorProcess(source_args, scheduling=scheduling, log_level=command_line.log_level)
+        global_state.controller_thread = threading.Thread(target=sensor_process.run_bridge, daemon=True)
+    else:
+        global_state.controller_thread = threading.Thread(target=run_sensor_loop,
+                                                          args=(create_input_source(*source_args), scheduling),
+                                                          daemon=True)
     global_state.controller_thread.start()
 
 
-    def update_gui():
+    # The GUI's periodic work, each part at its own rate (see ui_scheduler).
+    def run_engine():
+        """Applies the sensor thread's point events, evaluates groups and dispatches actions."""
         if not global_state.running: return
-        sync_settings_to_global_state()
-        update_mapping_ui()
+        profiler = global_state.gui_profiler
+        profiling = profiler.enabled
+        with global_state.controller_lock:
+            if profiling: stage_start = profiler.start()
+            current_time = time.monotonic()
+            grace_period = global_state.group_grace_period
 
-        if global_state.home_button_event.is_set():
-            zero_orientation();
-            global_state.home_button_event.clear()
+            # The sensor thread publishes point enter/exit events; only the changes are applied here.
+            # If the queue overflowed (e.g. while the GUI was stalled), rescan which points the tip is in.
+            events = global_state.engine_events.drain()
+            inside_now = None
+            if global_state.engine_events.take_overflow():
+                inside_now = points_inside(global_state.reference_points, global_state.controller_tip_position,
+                                           global_state.hit_tolerance)
+            newly_hit_points = apply_point_events(events, global_state.reference_points,
+                                                  global_state.point_hit_history, global_state.inside_points,
+                                                  current_time, grace_period, inside_now)
+
+            if profiling: stage_start = profiler.record('hit_detection', stage_start)
+
+            global_state.group_index.refresh(global_state.reference_point_groups, global_state.reference_points,
+                                             (global_state.reference_points_version,
+                                              global_state.reference_point_groups_version))
+            completed_groups = evaluate_groups(global_state.reference_point_groups, global_state.reference_points,
+                                               global_state.point_hit_history, newly_hit_points, current_time,
+                                               grace_period, global_state.action_interval,
+                                               global_state.group_last_triggered, global_state.group_index)
+            completed_groups += collect_gesture_triggers(global_state.gesture_recognizer,
+                                                         global_state.reference_point_groups, current_time,
+                                                         global_state.action_interval,
+                                                         global_state.group_last_triggered)
+
+        for event in completed_groups:
+            global_state.event_bus.publish(event)
 
-        if global_state.execute_stockpiled_event.is_set():
+        # Process queued actions outside of the main controller lock to prevent deadlocks
+        for event in global_state.action_events.drain():
+            handle_action_completion(event.group, action_executor, event.group_id)
+
+        if profiling: profiler.record('group_evaluation', stage_start)
+
+    def handle_requests():
+        """Config file changes, controller button requests and a running stockpile drain."""
+        if global_state.config_watcher.take_change() and global_state.config_hot_reload_var.get():
+            hot_reload_config(global_state.config_watcher.path)
+
+        for event in global_state.button_events.drain():
+            handle_button_press(event.button)
+        if global_state.stockpile_drain.active:
+            drain_stockpile(action_executor, time.monotonic())
+
+    def handle_button_press(button_name):
+        """Applies a controller button press: button mapping, homing or running a stockpiled action."""
+        target = global_state.mapping_target
+        if target:
+            if target == 'home':
+                global_state.home_button_map = button_name
+                if global_state.mapping_home_status_var:
+                    global_state.mapping_home_status_var.set(f"Set to: '{button_name}'")
+            elif target == 'stockpile':
+                global_state.execute_stockpiled_action_button = button_name
+                if global_state.mapping_stockpile_status_var:
+                    global_state.mapping_stockpile_status_var.set(f"Set to: '{button_name}'")
+            global_state.mapping_target = None
+        elif button_name and button_name == global_state.home_button_map:
+            zero_orientation()
+        elif button_name and button_name == global_state.execute_stockpiled_action_button:
             with global_state.controller_lock:
-                if global_state.stockpiled_actions:
-                    action_to_execute = global_state.stockpiled_actions.pop(0)
-                    action_executor.execute(action_to_execute)
-                    if global_state.stockpiled_actions_count_var: global_state.stockpiled_actions_count_var.set(
-                        f"({len(global_state.stockpiled_actions)})")
-            global_state.execute_stockpiled_event.clear()
-
-        triggered_groups_to_process = []
-
+                entry = global_state.stockpiled_actions.pop()
+                update_stockpile_count()
+            if entry is not None:
+                dispatch_action(action_executor, entry.action, entry.group_id, stockpiled=True)
+
+    def log_pose():
+        profiler = global_state.gui_profiler
+        profiling = profiler.enabled
+        if profiling: stage_start = profiler.start()
         with global_state.controller_lock:
-            if global_state.unintended_movement_detected:
-                global_state.unintended_movement_status_var.set("WARNING: Locked axis moved!")
-            else:
-                global_state.unintended_movement_status_var.set("")
-
             now = time.monotonic()
             if (now - global_state.last_console_log_time) * 1000 >= global_state.console_log_interval:
                 if global_state.log_to_console_enabled or global_state.log_tip_position_enabled:
@@ -1145,101 +1589,34 @@ if __name__ == "__main__":
                         log_msg += f"Tip -> X: {tx:>6.2f}, Y: {ty:>6.2f}, Z: {tz:>6.2f}"
 
                     if log_msg:
-                        print(log_msg)
-
-            # --- START: HIT DETECTION LOGIC ---
-            current_time = time.monotonic()
-            grace_period = global_state.group_grace_period
-
-            # Expire old hits from the global history
-            expired_ids = [pid for pid, hit_time in global_state.point_hit_history.items() if
-                           current_time - hit_time > grace_period]
-            if expired_ids:
-                for pid in expired_ids:
-                    if pid in global_state.point_hit_history:
-                        del global_state.point_hit_history[pid]
-
-            # Register new hits
-            newly_hit_points = set()
-            for point in global_state.reference_points:
-                parent_id = point.get('chain_parent')
-                point['is_active'] = not parent_id or parent_id in global_state.point_hit_history
-
-                is_within_distance = np.linalg.norm(
-                    global_state.controller_tip_position - np.array(point['position'])) < global_state.hit_tolerance
-
-                point['hit'] = point['is_active'] and is_within_distance
-
-                if point['hit']:
-                    if point['id'] not in global_state.point_hit_history:
-                        newly_hit_points.add(point['id'])
-                        global_state.point_hit_history[point['id']] = current_time
-                        print(f"DEBUG: New hit for point '{point['id']}' at time {current_time:.2f}")
+                        pose_log.info(log_msg)
+        if profiling: profiler.record('logging', stage_start)
 
-            points_to_clear_from_history = set()
-            # Check for group completion only if there was a new hit
-            if newly_hit_points:
-                all_point_ids_in_world = {p['id'] for p in global_state.reference_points}
-
-                for group_id, group_data in global_state.reference_point_groups.items():
-                    required_points_from_config = group_data.get('point_ids', set())
-
-                    # Filter for points that actually exist in the world
-                    valid_required_points = required_points_from_config.intersection(all_point_ids_in_world)
-
-                    if not valid_required_points or not newly_hit_points.intersection(valid_required_points):
-                        continue
-
-                    group_name = group_data.get('name', 'Unnamed')
-                    hit_history_keys = set(global_state.point_hit_history.keys())
-
-                    if valid_required_points.issubset(hit_history_keys):
-                        hit_times = [global_state.point_hit_history[pid] for pid in valid_required_points]
-                        if not hit_times: continue
-
-                        time_span = max(hit_times) - min(hit_times)
-                        is_within_grace = time_span <= grace_period
-
-                        print(f"\n--- Group Check: '{group_name}' ---")
-                        print(f"  Required (from config): {required_points_from_config}")
-                        print(f"  Required (and valid):   {valid_required_points}")
-                        print(f"  Current Hit History:    {hit_history_keys}")
-                        print(
-                            f"  Time Span of hits: {time_span:.2f}s <= Grace Period: {grace_period:.2f}s? -> {is_within_grace}")
-
-                        if is_within_grace:
-                            cooldown = global_state.action_interval
-                            last_triggered = global_state.group_last_triggered.get(group_id, 0)
-                            time_since_last_trigger = current_time - last_triggered
-                            has_cooldown_passed = time_since_last_trigger > cooldown
-
-                            print(
-                                f"  Cooldown check: {cooldown:.2f}s < Time Since Last: {time_since_last_trigger:.2f}s? -> {has_cooldown_passed}")
-
-                            if has_cooldown_passed:
-                                print(f"  >>> SUCCESS: Group '{group_name}' queued for action!")
-                                triggered_groups_to_process.append(group_data.copy())
-                                global_state.group_last_triggered[group_id] = current_time
-                                points_to_clear_from_history.update(valid_required_points)
-
-            # After checking all groups, clear the points from all triggered groups
-            if points_to_clear_from_history:
-                print(f"DEBUG: Clearing triggered points from history: {points_to_clear_from_history}")
-                for pid in points_to_clear_from_history:
-                    if pid in global_state.point_hit_history:
-                        del global_state.point_hit_history[pid]
-            # --- END: HIT DETECTION LOGIC ---
-
-        # Process queued actions outside of the main controller lock to prevent deadlocks
-        if triggered_groups_to_process:
-            for group_data in triggered_groups_to_process:
-                handle_action_completion(group_data, action_executor)
+    def update_widgets():
+        update_mapping_ui()
+        with global_state.controller_lock:
+            unintended = global_state.unintended_movement_detected
+        set_if_changed(global_state.unintended_movement_status_var, "WARNING: Locked axis moved!" if unintended else "")
 
+    def render():
         if global_state.show_visualization_var.get():
+            profiler = global_state.gui_profiler
+            if profiler.enabled: stage_start = profiler.start()
             vis_frame.redraw()
+            if profiler.enabled: profiler.record('redraw', stage_start)
 
-        root.after(16, update_gui)
+    def update_stats():
+        if global_state.gui_profiler.enabled:
+            update_profiler_ui(profiler_tree, sensor_timing_label, ui_scheduler)
 
+    ui_scheduler = UiScheduler(root, budget=UI_FRAME_BUDGET)
+    ui_scheduler.add('engine', run_engine, ENGINE_RATE, HIGH)
+    ui_scheduler.add('requests', handle_requests, 30, HIGH)
+    ui_scheduler.add('render', render, 60, NORMAL)
+    ui_scheduler.add('pose_log', log_pose, 60, LOW)
+    ui_scheduler.add('widgets', update_widgets, 10, LOW)
+    ui_scheduler.add('stats', update_stats, 2, LOW)
+    global_state.ui_scheduler = ui_scheduler
 
     root.protocol("WM_DELETE_WINDOW", on_closing)
     load_config_and_update_gui(root, ref_tree, group_tree, collapsible_frames,
@@ -1252,7 +1629,7 @@ if __name__ == "__main__":
     toggle_visualization(root, vis_container, controls_container)
     update_mapping_ui()
     root.after(2500, zero_orientation)
-    root.after(150, update_gui)
+    ui_scheduler.start(150)
 
     try:
         root.mainloop()
@@ -0,0 +1,341 @@
+# In motion_engine.py
+import numpy as np
+from app_logging import get_logger
+from event_bus import PointEntered, PointExited, GroupCompleted
+
+hit_log = get_logger('hits')
+group_log = get_logger('groups')
+
+
+def swept_entry_times(positions, path, path_times, radius):
+    """
+    For each sphere centre in `positions` (M, 3), the earliest time the polyline `path` (K, 3),
+    sampled at `path_times` (K,), comes within `radius`. The entry time is interpolated inside the
+    entering segment by solving |a + t * (b - a) - c|^2 = radius^2. Returns an (M,) array holding
+    inf for spheres the path never touches.
+    """
+    r2 = radius * radius
+    if len(path) < 2:
+        within = np.sum((positions - path[-1]) ** 2, axis=1) < r2
+        return np.where(within, path_times[-1], np.inf)
+    starts = path[:-1]
+    directions = np.diff(path, axis=0)                            # (S, 3)
+    offsets = starts[:, np.newaxis, :] - positions[np.newaxis]    # (S, M, 3)
+    a = np.sum(directions * directions, axis=1)[:, np.newaxis]   # (S, 1)
+    b = np.einsum('smk,sk->sm', offsets, directions)
+    c = np.einsum('smk,smk->sm', offsets, offsets) - r2
+    inside = c < 0.0
+    discriminant = b * b - a * c
+    moving = a > 0.0
+    t = (-b - np.sqrt(np.maximum(discriminant, 0.0))) / np.where(moving, a, 1.0)
+    enters = moving & (discriminant >= 0.0) & (t >= 0.0) & (t <= 1.0)
+    t = np.where(inside, 0.0, t)
+    segment_times = path_times[:-1, np.newaxis] + t * np.diff(path_times)[:, np.newaxis]
+    return np.where(inside | enters, segment_times, np.inf).min(axis=0)
+
+
+def detect_point_hits(reference_points, tip_position, hit_tolerance, point_hit_history, current_time, grace_period,
+                      tip_path=None, path_times=None):
+    """
+    Expires stale entries from point_hit_history, refreshes the store's active/hit flags against
+    the tip position and records first-time hits in the history. `reference_points` is a
+    ReferencePointStore.
+    When tip_path/path_times are given, the whole path swept since the last check is tested, so fast
+    swings can't pass through a point between checks, and hits are recorded at their entry time.
+    Returns the set of point ids that were newly hit on this call.
+    """
+    # Expire old hits from the global history
+    expired_ids = [pid for pid, hit_time in point_hit_history.items() if
+                   current_time - hit_time > grace_period]
+    if expired_ids:
+        for pid in expired_ids:
+            if pid in point_hit_history:
+                del point_hit_history[pid]
+
+    newly_hit_points = set()
+    if not len(reference_points):
+        return newly_hit_points
+
+    positions = reference_points.positions.astype(np.float64)
+    tip = np.asarray(tip_position, dtype=np.float64)
+    within_now = np.sum((positions - tip) ** 2, axis=1) < hit_tolerance * hit_tolerance
+    if tip_path is not None and len(tip_path) > 1:
+        entry_times = swept_entry_times(positions, tip_path, path_times, hit_tolerance)
+    else:
+        entry_times = np.where(within_now, current_time, np.inf)
+
+    # Register new hits in order of entry, parents before children at equal times, so a chained
+    # point can follow its parent within one sweep (or one sample, however deep the chain).
+    ids, parent = reference_points.ids, reference_points.parent
+    touched = np.flatnonzero(np.isfinite(entry_times))
+    for index in touched[np.lexsort((reference_points.rank[touched], entry_times[touched]))]:
+        parent_index = parent[index]
+        if parent_index >= 0 and ids[parent_index] not in point_hit_history:
+            continue
+        point_id = ids[index]
+        if point_id not in point_hit_history:
+            hit_time = float(entry_times[index])
+            newly_hit_points.add(point_id)
+            point_hit_history[point_id] = hit_time
+            hit_log.debug("New hit for point '%s' at time %.2f", point_id, hit_time)
+
+    reference_points.update_flags(point_hit_history, within_now | reference_points.mask_of(newly_hit_points))
+    return newly_hit_points
+
+
+class PointTracker:
+    """
+    Runs on the sensor thread: tests the segment between consecutive tip samples against every
+    reference point and publishes PointEntered/PointExited events as the tip crosses a sphere.
+    Entry times are interpolated within the sample interval.
+    """
+
+    def __init__(self, event_bus):
+        self.event_bus = event_bus
+        self._version = None
+        self._ids = []
+        self._positions = np.zeros((0, 3))
+        self._inside = np.zeros(0, dtype=bool)
+        self.reset()
+
+    def reset(self):
+        """Forgets the previous tip sample so the next one isn't swept from it (e.g. after a recenter)."""
+        self._last_tip = None
+        self._last_time = None
+
+    def _refresh_points(self, reference_points, version):
+        """Rebuilds the position array when the point list has changed, keeping enter state by id."""
+        if version == self._version:
+            return
+        was_inside = dict(zip(self._ids, self._inside.tolist()))
+        self._ids = list(reference_points.ids)
+        self._positions = reference_points.positions.astype(np.float64)
+        self._inside = np.array([was_inside.get(pid, False) for pid in self._ids], dtype=bool)
+        self._version = version
+
+    def inside_summary(self):
+        """(number of points the tip is inside, bit mask of those among the first 64 points by index)"""
+        indices = np.flatnonzero(self._inside)
+        mask = 0
+        for index in indices[indices < 64]:
+            mask |= 1 << int(index)
+        return len(indices), mask
+
+    def update(self, reference_points, version, tip, timestamp, hit_tolerance):
+        """
+        Processes one tip sample. `version` must change whenever the reference point store is edited.
+        The caller must hold global_state.controller_lock.
+        """
+        self._refresh_points(reference_points, version)
+        tip = np.asarray(tip, dtype=np.float64)
+        if self._last_tip is None:
+            path, path_times = tip[np.newaxis], np.array([timestamp])
+        else:
+            path, path_times = np.array((self._last_tip, tip)), np.array((self._last_time, timestamp))
+        self._last_tip = tip
+        self._last_time = timestamp
+        if not self._ids:
+            return
+
+        entry_times = swept_entry_times(self._positions, path, path_times, hit_tolerance)
+        within = np.sum((self._positions - tip) ** 2, axis=1) < hit_tolerance * hit_tolerance
+        entered = np.isfinite(entry_times) & ~self._inside
+        # Points left since the last sample, or swept straight through within it.
+        exited = (self._inside | entered) & ~within
+        self._inside = within
+        if not entered.any() and not exited.any():
+            return
+
+        publish = self.event_bus.publish
+        entered_indices = np.flatnonzero(entered)
+        for index in entered_indices[np.argsort(entry_times[entered_indices], kind='stable')]:
+            publish(PointEntered(float(entry_times[index]), self._ids[index]))
+        for index in np.flatnonzero(exited):
+            publish(PointExited(float(timestamp), self._ids[index]))
+
+
+def points_inside(reference_points, tip_position, hit_tolerance):
+    """The ids of the points the tip is inside, by rescanning every point."""
+    if not len(reference_points):
+        return set()
+    offsets = reference_points.positions.astype(np.float64) - np.asarray(tip_position, dtype=np.float64)
+    within = np.sum(offsets * offsets, axis=1) < hit_tolerance * hit_tolerance
+    return {reference_points.ids[index] for index in np.flatnonzero(within)}
+
+
+def apply_point_events(events, reference_points, point_hit_history, inside_points, current_time, grace_period,
+                       inside_now=None):
+    """
+    GUI-side counterpart of detect_point_hits driven by PointTracker events instead of a rescan.
+    Updates the set of points the tip is inside, records hits of active points in point_hit_history
+    at their entry time and refreshes the store's active/hit flags when anything changed.
+    If events were lost, `inside_now` (e.g. from points_inside()) replaces the inside set after the
+    events are applied, so no point stays inside because its exit was missed and points entered
+    meanwhile still register. Returns the set of point ids that were newly hit.
+    """
+    expired_ids = [pid for pid, hit_time in point_hit_history.items() if
+                   current_time - hit_time > grace_period]
+    for pid in expired_ids:
+        del point_hit_history[pid]
+
+    newly_hit_points = set()
+    if not events and not expired_ids and not inside_points and inside_now is None:
+        return newly_hit_points
+
+    ids, index_of, parent = reference_points.ids, reference_points.index, reference_points.parent
+
+    def register_hit(point_id, hit_time):
+        index = index_of.get(point_id)
+        if index is None or point_id in point_hit_history:
+            return
+        parent_index = parent[index]
+        if parent_index >= 0 and ids[parent_index] not in point_hit_history:
+            return
+        newly_hit_points.add(point_id)
+        point_hit_history[point_id] = hit_time
+        hit_log.debug("New hit for point '%s' at time %.2f", point_id, hit_time)
+
+    for event in events:
+        if isinstance(event, PointEntered):
+            inside_points.add(event.point_id)
+            register_hit(event.point_id, event.timestamp)
+        elif isinstance(event, PointExited):
+            inside_points.discard(event.point_id)
+    if inside_now is not None:
+        inside_points.clear()
+        inside_points.update(inside_now)
+
+    # A point the tip is resting in registers again once its hit expires or its chain parent is hit.
+    # Parents go first, so a whole chain of overlapping points activates on the same tick.
+    inside_points.intersection_update(index_of)
+    for point_id in reference_points.in_chain_order(inside_points):
+        register_hit(point_id, current_time)
+
+    if events or expired_ids or newly_hit_points or inside_now is not None:
+        reference_points.update_flags(point_hit_history, reference_points.mask_of(inside_points))
+
+    return newly_hit_points
+
+
+class GroupIndex:
+    """
+    Which groups require each point, and each group's members that exist in the point store, so
+    evaluate_groups only visits the groups a new hit touches. refresh() rebuilds it when `version`
+    changes; callers pass a value that changes whenever the points or group memberships do.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.groups_of = {}
+        self.members = {}
+        self.order = {}
+
+    def refresh(self, reference_point_groups, reference_points, version=None):
+        if version is not None and version == self.version:
+            return
+        point_index = reference_points.index
+        groups_of = {}
+        members = {}
+        order = {}
+        for group_id, group_data in reference_point_groups.items():
+            # Only points that actually exist in the world count towards a group.
+            valid_required_points = [pid for pid in group_data.get('point_ids', ()) if pid in point_index]
+            if not valid_required_points:
+                continue
+            members[group_id] = valid_required_points
+            order[group_id] = len(order)
+            for pid in valid_required_points:
+                groups_of.setdefault(pid, []).append(group_id)
+        self.groups_of = groups_of
+        self.members = members
+        self.order = order
+        self.version = version
+
+
+def evaluate_groups(reference_point_groups, reference_points, point_hit_history, newly_hit_points, current_time,
+                    grace_period, cooldown, group_last_triggered, group_index=None):
+    """
+    Checks every group touched by a new hit for completion within the grace period and cooldown.
+    Points belonging to triggered groups are cleared from point_hit_history.
+    Returns a GroupCompleted event (carrying a copy of the group dict) for each group whose action
+    should run, stamped with the time of the hit that completed it.
+    `group_index` is a GroupIndex already refreshed for these groups and points (one is built
+    when it's omitted).
+    """
+    triggered_groups = []
+    if not newly_hit_points:
+        return triggered_groups
+    if group_index is None:
+        group_index = GroupIndex()
+        group_index.refresh(reference_point_groups, reference_points)
+
+    points_to_clear_from_history = set()
+    groups_of = group_index.groups_of
+    touched_groups = set()
+    for pid in newly_hit_points:
+        touched_groups.update(groups_of.get(pid, ()))
+
+    for group_id in sorted(touched_groups, key=group_index.order.get):
+        group_data = reference_point_groups.get(group_id)
+        if group_data is None:
+            continue
+        valid_required_points = group_index.members[group_id]
+        group_name = group_data.get('name', 'Unnamed')
+
+        if all(pid in point_hit_history for pid in valid_required_points):
+            hit_times = [point_hit_history[pid] for pid in valid_required_points]
+
+            time_span = max(hit_times) - min(hit_times)
+            is_within_grace = time_span <= grace_period
+
+            group_log.debug("Group check '%s': required %s, hit history %s, "
+                            "time span %.2fs <= grace period %.2fs? -> %s", group_name, valid_required_points,
+                            point_hit_history, time_span, grace_period, is_within_grace)
+
+            if is_within_grace:
+                last_triggered = group_last_triggered.get(group_id, 0)
+                time_since_last_trigger = current_time - last_triggered
+                has_cooldown_passed = time_since_last_trigger > cooldown
+
+                group_log.debug("Cooldown check '%s': %.2fs < time since last %.2fs? -> %s", group_name, cooldown,
+                                time_since_last_trigger, has_cooldown_passed)
+
+                if has_cooldown_passed:
+                    group_log.info("Group '%s' completed, queued for action", group_name)
+                    triggered_groups.append(GroupCompleted(max(hit_times), group_id, group_data.copy(),
+                                                           {pid: point_hit_history[pid] for pid in valid_required_points},
+                                                           current_time))
+                    group_last_triggered[group_id] = current_time
+                    points_to_clear_from_history.update(valid_required_points)
+
+    # After checking all groups, clear the points from all triggered groups
+    if points_to_clear_from_history:
+        group_log.debug("Clearing triggered points from history: %s", points_to_clear_from_history)
+        for pid in points_to_clear_from_history:
+            if pid in point_hit_history:
+                del point_hit_history[pid]
+
+    return triggered_groups
+
+
+def collect_gesture_triggers(gesture_recognizer, reference_point_groups, current_time, cooldown,
+                             group_last_triggered):
+    """
+    Drains gesture matches reported by the recognizer and returns GroupCompleted events for the
+    bound groups whose cooldown has passed, in the same form as evaluate_groups.
+    """
+    triggered_groups = []
+    while gesture_recognizer.matches:
+        match_time, template_id, group_id, distance = gesture_recognizer.matches.popleft()
+        group_data = reference_point_groups.get(group_id)
+        if not group_data:
+            continue
+        template = gesture_recognizer.templates.get(template_id)
+        gesture_name = template.name if template else template_id
+        if current_time - group_last_triggered.get(group_id, 0) <= cooldown:
+            continue
+        group_log.info("Gesture '%s' matched (distance %.3f), triggering group '%s'", gesture_name, distance,
+                       group_data.get('name', 'Unnamed'))
+        triggered_groups.append(GroupCompleted(match_time, group_id, group_data.copy(), None, current_time))
+        group_last_triggered[group_id] = current_time
+    return triggered_groups
@@ -0,0 +1,108 @@
+# In motion_history.py
+"""
+A fixed-size, preallocated history of sensor samples shared by every consumer that needs more
+than the latest pose (trail rendering, gesture analysis, "where was the tip at time t").
+
+Each field lives in one NumPy array holding every sample twice: sample i is written at slot
+i % capacity and again at slot i % capacity + capacity. Any run of the most recent `capacity`
+samples is therefore one contiguous slice, so windows are returned as zero-copy views instead of
+being stitched together from the two ends of a ring.
+
+The views alias the live buffer and are overwritten as new samples arrive. Readers on another
+thread should hold global_state.controller_lock while using them, or copy what they keep.
+"""
+import numpy as np
+from quaternion_math import quaternion_slerp
+
+# Field name -> number of columns per sample.
+FIELDS = (('quaternion', 4), ('euler', 3), ('tip', 3), ('gyro', 3), ('accel', 3))
+
+
+class MotionHistory:
+    def __init__(self, capacity=4096, buffers=None):
+        """`buffers` optionally supplies preallocated (timestamps, {field: array}) of 2 * capacity rows."""
+        self.capacity = capacity
+        if buffers is None:
+            buffers = np.zeros(2 * capacity), {name: np.zeros((2 * capacity, width)) for name, width in FIELDS}
+        self.timestamps, self._fields = buffers
+        self.total_samples = 0
+
+    def __len__(self):
+        return min(self.total_samples, self.capacity)
+
+    def clear(self):
+        self.total_samples = 0
+
+    def append(self, timestamp, quaternion, euler, tip, gyro, accel):
+        """Records one sample. Timestamps must be non-decreasing."""
+        slot = self.total_samples % self.capacity
+        mirror = slot + self.capacity
+        self.timestamps[slot] = self.timestamps[mirror] = timestamp
+        fields = self._fields
+        fields['quaternion'][slot] = fields['quaternion'][mirror] = quaternion
+        fields['euler'][slot] = fields['euler'][mirror] = euler
+        fields['tip'][slot] = fields['tip'][mirror] = tip
+        fields['gyro'][slot] = fields['gyro'][mirror] = gyro
+        fields['accel'][slot] = fields['accel'][mirror] = accel
+        self.total_samples += 1
+
+    # --- Windowed views ---
+
+    def _span(self, count):
+        """Slice covering the `count` most recent samples (oldest first) in the mirrored buffer."""
+        count = max(0, min(count, len(self)))
+        end = (self.total_samples - 1) % self.capacity + self.capacity + 1 if self.total_samples else 0
+        return slice(end - count, end)
+
+    def times(self, count=None):
+        """View of the last `count` timestamps (all retained samples by default)."""
+        return self.timestamps[self._span(len(self) if count is None else count)]
+
+    def field(self, name, count=None):
+        """View of the last `count` rows of a field ('quaternion', 'euler', 'tip', 'gyro' or 'accel')."""
+        return self._fields[name][self._span(len(self) if count is None else count)]
+
+    def count_since(self, start_time):
+        """Number of retained samples with timestamp >= start_time."""
+        times = self.times()
+        return len(times) - int(times.searchsorted(start_time, side='left'))
+
+    def window(self, start_time, *names):
+        """
+        Views of the timestamps and the named fields for every sample at or after start_time,
+        e.g. `times, tips = history.window(now - 1.0, 'tip')`.
+        """
+        count = self.count_since(start_time)
+        span = self._span(count)
+        return (self.timestamps[span],) + tuple(self._fields[name][span] for name in names)
+
+    def latest(self, name):
+        """The most recent row of a field, or None if the history is empty."""
+        if not self.total_samples:
+            return None
+        return self._fields[name][(self.total_samples - 1) % self.capacity]
+
+    # --- Time queries ---
+
+    def pose_at(self, timestamp):
+        """
+        Interpolated (quaternion, tip) at `timestamp`: slerp between the bracketing samples for the
+        orientation and linear interpolation for the tip. Times outside the retained range are
+        clamped to the oldest/newest sample. Returns None if the history is empty.
+        """
+        if not self.total_samples:
+            return None
+        times = self.times()
+        quaternions = self.field('quaternion')
+        tips = self.field('tip')
+        index = int(times.searchsorted(timestamp, side='right'))
+        if index == 0:
+            return tuple(quaternions[0].tolist()), tips[0].copy()
+        if index == len(times):
+            return tuple(quaternions[-1].tolist()), tips[-1].copy()
+        t0 = times[index - 1]
+        t1 = times[index]
+        fraction = 0.0 if t1 == t0 else (timestamp - t0) / (t1 - t0)
+        quaternion = quaternion_slerp(quaternions[index - 1].tolist(), quaternions[index].tolist(), fraction)
+        tip = tips[index - 1] + fraction * (tips[index] - tips[index - 1])
+        return quaternion, tip
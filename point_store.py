@@ -0,0 +1,312 @@
+# In point_store.py
+"""
+Reference points stored column-wise instead of as one dict per point.
+
+    ids        list of str        index -> point id
+    index      dict               point id -> index
+    positions  float32 (n, 3)     contiguous, so hit detection and re-homing work on it directly
+    hit        bool (n,)          the tip is inside the (active) point
+    active     bool (n,)          the point has no chain parent, or its parent is in the hit history
+    parent     int32 (n,)         index of the chain parent, or NO_PARENT
+    order      int32 (n,)         point indices in topological order (every parent before its children)
+    rank       int32 (n,)         each point's position in `order`
+
+Chains are compiled whenever the points or their parents change: a chain parent that names no
+point, a point chained to itself and a cycle of chained points all raise ChainError, and the
+store is left as it was. The store therefore always holds a forest, so activation is a single
+vectorized step over the parent array however deep the chains are, and processing points in
+`order` lets a whole chain the tip rests in activate in one pass.
+
+Keys a config gives a point beyond these are kept per point and written back out by to_dicts().
+PointView gives the dict interface ('id', 'position', 'hit', 'is_active', 'chain_parent') the
+UI and config code use; a view addresses its point by index, so it is only valid until the next
+add/remove. Structural edits reallocate the arrays: they're rare, reads happen every sample.
+Callers still bump global_state.reference_points_version after editing, as before.
+"""
+import numpy as np
+
+NO_PARENT = -1
+CORE_KEYS = ('id', 'position', 'hit', 'is_active', 'chain_parent')
+
+
+class ChainError(ValueError):
+    """An invalid chain; `point_ids` are the points whose chain_parent causes it."""
+
+    def __init__(self, message, point_ids):
+        super().__init__(message)
+        self.point_ids = point_ids
+
+
+def compile_chains(ids, parent_ids):
+    """
+    Compiles chain parents into (id -> index map, parent index array, topological order, rank).
+    Raises ChainError for parents that name no point (or the point itself) and for cycles.
+    """
+    index = {point_id: i for i, point_id in enumerate(ids)}
+    parent = np.full(len(ids), NO_PARENT, dtype=np.int32)
+    dangling = []
+    for i, parent_id in enumerate(parent_ids):
+        if parent_id is None:
+            continue
+        parent_index = index.get(parent_id)
+        if parent_index is None or parent_index == i:
+            dangling.append(ids[i])
+        else:
+            parent[i] = parent_index
+    if dangling:
+        raise ChainError("Chain parent missing or the point itself for: " + ", ".join(map(str, dangling)), dangling)
+
+    # Depth of every point below its chain root, walking up each chain once.
+    depth = np.full(len(ids), -1, dtype=np.int64)
+    for start in range(len(ids)):
+        path = []
+        on_path = set()
+        i = start
+        while i != NO_PARENT and depth[i] < 0:
+            if i in on_path:
+                cycle = [ids[j] for j in path[path.index(i):]]
+                raise ChainError("Chain cycle: " + " -> ".join(map(str, cycle)), cycle)
+            path.append(i)
+            on_path.add(i)
+            i = parent[i]
+        level = -1 if i == NO_PARENT else depth[i]
+        for j in reversed(path):
+            level += 1
+            depth[j] = level
+    order = np.argsort(depth, kind='stable').astype(np.int32)
+    rank = np.empty(len(ids), dtype=np.int32)
+    rank[order] = np.arange(len(ids), dtype=np.int32)
+    return index, parent, order, rank
+
+
+def detach_invalid_chains(points):
+    """
+    For loading a config: clears the chain_parent of every point dict whose chain is dangling
+    or cyclic (on copies) until the rest compiles. Returns (points, list of problem messages).
+    """
+    points = [dict(point) for point in points if 'id' in point]
+    problems = []
+    while True:
+        try:
+            compile_chains([point['id'] for point in points], [point.get('chain_parent') or None for point in points])
+            return points, problems
+        except ChainError as e:
+            problems.append(str(e))
+            broken = set(e.point_ids)
+            for point in points:
+                if point['id'] in broken:
+                    point['chain_parent'] = None
+
+
+def stored_position(position):
+    """A position as the store holds it (float32), converted back to floats; e.g. for comparing with config data."""
+    return [float(str(value)) for value in np.asarray(position, dtype=np.float32).reshape(3)]
+
+
+class PointView:
+    __slots__ = ('_store', '_index')
+
+    def __init__(self, store, index):
+        self._store = store
+        self._index = index
+
+    def __getitem__(self, key):
+        store, index = self._store, self._index
+        if key == 'id':
+            return store.ids[index]
+        if key == 'position':
+            return stored_position(store.positions[index])
+        if key == 'hit':
+            return bool(store.hit[index])
+        if key == 'is_active':
+            return bool(store.active[index])
+        if key == 'chain_parent':
+            return store.parent_ids[index]
+        extras = store.extras[index]
+        if extras is None:
+            raise KeyError(key)
+        return extras[key]
+
+    def __setitem__(self, key, value):
+        store, index = self._store, self._index
+        if key == 'id':
+            store.rename(store.ids[index], value)
+        elif key == 'position':
+            store.positions[index] = value
+        elif key == 'hit':
+            store.hit[index] = bool(value)
+        elif key == 'is_active':
+            store.active[index] = bool(value)
+        elif key == 'chain_parent':
+            store.set_parent(store.ids[index], value)
+        else:
+            if store.extras[index] is None:
+                store.extras[index] = {}
+            store.extras[index][key] = value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        extras = self._store.extras[self._index]
+        return list(CORE_KEYS) + (list(extras) if extras else [])
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def copy(self):
+        """A plain dict of the point, as written to a config file."""
+        return dict(self.items())
+
+
+def _extras(point):
+    return {key: value for key, value in point.items() if key not in CORE_KEYS} or None
+
+
+class ReferencePointStore:
+    def __init__(self, points=()):
+        self.load(points)
+
+    @classmethod
+    def from_positions(cls, ids, positions):
+        """A store with just ids and positions (e.g. the sensor process's copy)."""
+        store = cls()
+        store.load([{'id': point_id, 'position': position} for point_id, position in zip(ids, positions)])
+        return store
+
+    def load(self, points):
+        """Replaces the contents with a list of point dicts (config format). Raises ChainError."""
+        points = [point for point in points if 'id' in point]
+        ids = [point['id'] for point in points]
+        parent_ids = [point.get('chain_parent') or None for point in points]
+        chains = compile_chains(ids, parent_ids)
+        self.ids = ids
+        self.parent_ids = parent_ids
+        self.positions = np.array([point.get('position', (0.0, 0.0, 0.0)) for point in points],
+                                  dtype=np.float32).reshape(-1, 3)
+        self.hit = np.array([bool(point.get('hit', False)) for point in points], dtype=bool)
+        self.active = np.array([bool(point.get('is_active', True)) for point in points], dtype=bool)
+        self.extras = [_extras(point) for point in points]
+        self._set_chains(chains)
+
+    def _set_chains(self, chains):
+        self.index, self.parent, self.order, self.rank = chains
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return (PointView(self, i) for i in range(len(self.ids)))
+
+    def __contains__(self, point_id):
+        return point_id in self.index
+
+    def __getitem__(self, point_id):
+        return PointView(self, self.index[point_id])
+
+    def get(self, point_id, default=None):
+        index = self.index.get(point_id)
+        return default if index is None else PointView(self, index)
+
+    # --- Edits (each one validates the chains first and changes nothing if they're invalid) ---
+
+    def add(self, point):
+        """Appends a point dict; returns its view. Raises ValueError if the id is taken or the chain is invalid."""
+        point_id = point['id']
+        if point_id in self.index:
+            raise ValueError(f"Reference point '{point_id}' already exists")
+        parent_ids = self.parent_ids + [point.get('chain_parent') or None]
+        chains = compile_chains(self.ids + [point_id], parent_ids)
+        self.ids.append(point_id)
+        self.parent_ids = parent_ids
+        self.positions = np.vstack((self.positions, np.asarray(point['position'], dtype=np.float32).reshape(1, 3)))
+        self.hit = np.append(self.hit, bool(point.get('hit', False)))
+        self.active = np.append(self.active, bool(point.get('is_active', True)))
+        self.extras.append(_extras(point))
+        self._set_chains(chains)
+        return PointView(self, len(self.ids) - 1)
+
+    def replace(self, point):
+        """Overwrites an existing point's position, chain parent and extra keys from a point dict."""
+        index = self.index[point['id']]
+        self.set_parent(point['id'], point.get('chain_parent'))
+        self.positions[index] = point['position']
+        self.extras[index] = _extras(point)
+
+    def remove(self, point_ids):
+        """Removes points by id; points chained to a removed point become unchained."""
+        removed = set(point_ids)
+        keep = np.array([point_id not in removed for point_id in self.ids], dtype=bool)
+        self.ids = [point_id for point_id, kept in zip(self.ids, keep) if kept]
+        self.parent_ids = [None if parent_id in removed else parent_id
+                           for parent_id, kept in zip(self.parent_ids, keep) if kept]
+        self.positions = self.positions[keep]
+        self.hit = self.hit[keep]
+        self.active = self.active[keep]
+        self.extras = [extras for extras, kept in zip(self.extras, keep) if kept]
+        self._set_chains(compile_chains(self.ids, self.parent_ids))
+
+    def rename(self, old_id, new_id):
+        """Changes a point's id; chain children follow it. Raises ValueError if new_id is taken."""
+        if new_id == old_id:
+            return
+        if new_id in self.index:
+            raise ValueError(f"Reference point '{new_id}' already exists")
+        self.ids[self.index[old_id]] = new_id
+        self.parent_ids = [new_id if parent_id == old_id else parent_id for parent_id in self.parent_ids]
+        self._set_chains(compile_chains(self.ids, self.parent_ids))
+
+    def set_parent(self, point_id, parent_id):
+        """Chains `point_id` to `parent_id` (None unchains it). Raises ChainError for a missing parent or a cycle."""
+        parent_ids = list(self.parent_ids)
+        parent_ids[self.index[point_id]] = parent_id or None
+        chains = compile_chains(self.ids, parent_ids)
+        self.parent_ids = parent_ids
+        self._set_chains(chains)
+
+    def set_parents(self, parents):
+        """Sets several chain parents ({point id: parent id or None}) at once, validated as a whole."""
+        parent_ids = list(self.parent_ids)
+        for point_id, parent_id in parents.items():
+            parent_ids[self.index[point_id]] = parent_id or None
+        chains = compile_chains(self.ids, parent_ids)
+        self.parent_ids = parent_ids
+        self._set_chains(chains)
+
+    # --- Bulk access ---
+
+    def mask_of(self, point_ids):
+        """Boolean array marking the given ids (ids not in the store are ignored)."""
+        mask = np.zeros(len(self.ids), dtype=bool)
+        indices = [self.index[point_id] for point_id in point_ids if point_id in self.index]
+        if indices:
+            mask[indices] = True
+        return mask
+
+    def in_chain_order(self, point_ids):
+        """The given ids (all in the store) sorted parents-first."""
+        rank = self.rank
+        return sorted(point_ids, key=lambda point_id: rank[self.index[point_id]])
+
+    def update_flags(self, hit_history, inside):
+        """
+        Recomputes every point's active flag from the chain parents in `hit_history` (ids) and its
+        hit flag from `inside` (bool array by index), in one vectorized step.
+        """
+        parent = self.parent
+        has_parent = parent >= 0
+        self.active = ~has_parent | self.mask_of(hit_history)[np.where(has_parent, parent, 0)]
+        self.hit = self.active & inside
+
+    def to_dicts(self):
+        """The points as a list of plain dicts (config format)."""
+        return [PointView(self, i).copy() for i in range(len(self.ids))]
@@ -0,0 +1,59 @@
+# In profiler.py
+import time
+import numpy as np
+
+# Stage names for the two instrumented loops, in display order.
+SENSOR_STAGES = ('event_poll', 'sensor_read', 'filtering', 'update_imu', 'axis_lock', 'tip_rotation')
+GUI_STAGES = ('logging', 'hit_detection', 'group_evaluation', 'redraw')
+
+
+class StageProfiler:
+    """
+    Records per-stage durations into preallocated ring buffers.
+    Callers check `enabled` once per iteration and only then call `start()`/`record()`,
+    so a disabled profiler costs a single attribute read per loop.
+    """
+
+    def __init__(self, stages, capacity=512):
+        self.stages = tuple(stages)
+        self.capacity = capacity
+        self.enabled = False
+        self._stage_index = {name: i for i, name in enumerate(self.stages)}
+        self._durations = np.zeros((len(self.stages), capacity), dtype=np.float64)
+        self._cursors = [0] * len(self.stages)
+        self._counts = [0] * len(self.stages)
+
+    @staticmethod
+    def start():
+        return time.perf_counter()
+
+    def record(self, stage, start_time):
+        """
+        Stores the time elapsed since `start_time` for `stage`.
+        Returns the current time so consecutive stages can be chained.
+        """
+        now = time.perf_counter()
+        i = self._stage_index[stage]
+        cursor = self._cursors[i]
+        self._durations[i, cursor] = now - start_time
+        self._cursors[i] = (cursor + 1) % self.capacity
+        if self._counts[i] < self.capacity:
+            self._counts[i] += 1
+        return now
+
+    def stats(self):
+        """Returns {stage: (mean_ms, max_ms, sample_count)} over the rolling window."""
+        result = {}
+        for i, stage in enumerate(self.stages):
+            count = self._counts[i]
+            if count == 0:
+                result[stage] = (0.0, 0.0, 0)
+                continue
+            window = self._durations[i, :count]
+            result[stage] = (float(window.mean()) * 1000.0, float(window.max()) * 1000.0, count)
+        return result
+
+    def reset(self):
+        self._durations.fill(0.0)
+        self._cursors = [0] * len(self.stages)
+        self._counts = [0] * len(self.stages)
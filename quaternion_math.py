@@ -0,0 +1,260 @@
+# In quaternion_math.py
+"""
+Quaternion and Euler math shared by the sensor pipeline, the GUI and offline tools.
+
+Quaternions are (w, x, y, z). Euler angles are (pitch, yaw, roll) in degrees, i.e. rotations
+about the X, Y and Z axes.
+
+The scalar functions work on single quaternions/points, use the `math` module and return plain
+tuples so the per-sample path does not allocate NumPy arrays. The `*_batch` functions take
+(N, 4) quaternion and (N, 3) point arrays (or anything that broadcasts to them) and are meant
+for bulk work such as re-homing every reference point or analysing a recorded trajectory.
+"""
+import math
+import numpy as np
+
+IDENTITY_QUATERNION = (1.0, 0.0, 0.0, 0.0)
+
+# Below this |cos(theta)| slerp falls back to normalized linear interpolation.
+SLERP_DOT_THRESHOLD = 0.9995
+
+
+# --- Scalar fast paths ---
+
+def quaternion_multiply(q1, q2):
+    w1, x1, y1, z1 = q1
+    w2, x2, y2, z2 = q2
+    return (w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2,
+            w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2,
+            w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2,
+            w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2)
+
+
+def quaternion_inverse(q):
+    """Inverse of a unit quaternion (its conjugate)."""
+    w, x, y, z = q
+    return (w, -x, -y, -z)
+
+
+def quaternion_normalize(q):
+    w, x, y, z = q
+    norm = math.sqrt(w * w + x * x + y * y + z * z)
+    if norm == 0.0:
+        return IDENTITY_QUATERNION
+    inv = 1.0 / norm
+    return (w * inv, x * inv, y * inv, z * inv)
+
+
+def rotate_point_by_quaternion(point, q):
+    """
+    Rotates a 3D point by a unit quaternion.
+    Uses v' = v + 2w(u x v) + 2u x (u x v), which is equivalent to q * v * q^-1 without
+    building the intermediate quaternions.
+    """
+    px, py, pz = point
+    w, x, y, z = q
+    # t = 2 * (u x v)
+    tx = 2.0 * (y * pz - z * py)
+    ty = 2.0 * (z * px - x * pz)
+    tz = 2.0 * (x * py - y * px)
+    return (px + w * tx + (y * tz - z * ty),
+            py + w * ty + (z * tx - x * tz),
+            pz + w * tz + (x * ty - y * tx))
+
+
+def euler_to_quaternion(pitch, yaw, roll):
+    """
+    Converts Euler angles (in degrees) to a quaternion.
+    Assumes a ZYX rotation order, which matches the OpenGL glRotatef sequence.
+    """
+    half = math.pi / 360.0
+    cy = math.cos(yaw * half)
+    sy = math.sin(yaw * half)
+    cp = math.cos(pitch * half)
+    sp = math.sin(pitch * half)
+    cr = math.cos(roll * half)
+    sr = math.sin(roll * half)
+
+    return (cy * cp * cr + sy * sp * sr,
+            cy * sp * cr - sy * cp * sr,
+            sy * cp * cr + cy * sp * sr,
+            cy * cp * sr - sy * sp * cr)
+
+
+def quaternion_to_euler(q):
+    """
+    Converts a quaternion into Euler angles (pitch, yaw, roll) in degrees.
+    This corresponds to rotations around the X, Y, and Z axes respectively.
+    """
+    w, x, y, z = q
+
+    # Pitch (X-axis rotation)
+    pitch_x = math.degrees(math.atan2(2.0 * (w * x + y * z), 1.0 - 2.0 * (x * x + y * y)))
+
+    # Yaw (Y-axis rotation), clamped to avoid a domain error with asin
+    t2 = 2.0 * (w * y - z * x)
+    t2 = 1.0 if t2 > 1.0 else (-1.0 if t2 < -1.0 else t2)
+    yaw_y = math.degrees(math.asin(t2))
+
+    # Roll (Z-axis rotation)
+    roll_z = math.degrees(math.atan2(2.0 * (w * z + x * y), 1.0 - 2.0 * (y * y + z * z)))
+
+    return pitch_x, yaw_y, roll_z
+
+
+def quaternion_slerp(q1, q2, t):
+    """
+    Spherical linear interpolation between two quaternions.
+    Smoothly transitions from q1 to q2 based on t (0.0 to 1.0).
+    """
+    w1, x1, y1, z1 = quaternion_normalize(q1)
+    w2, x2, y2, z2 = quaternion_normalize(q2)
+
+    dot = w1 * w2 + x1 * x2 + y1 * y2 + z1 * z2
+
+    # If the dot product is negative, slerp won't take the shortest path.
+    if dot < 0.0:
+        w2, x2, y2, z2 = -w2, -x2, -y2, -z2
+        dot = -dot
+
+    if dot > SLERP_DOT_THRESHOLD:
+        return quaternion_normalize((w1 + t * (w2 - w1), x1 + t * (x2 - x1),
+                                     y1 + t * (y2 - y1), z1 + t * (z2 - z1)))
+
+    theta_0 = math.acos(dot)
+    theta = theta_0 * t
+    sin_theta = math.sin(theta)
+    sin_theta_0 = math.sin(theta_0)
+
+    s0 = math.cos(theta) - dot * sin_theta / sin_theta_0
+    s1 = sin_theta / sin_theta_0
+    return (s0 * w1 + s1 * w2, s0 * x1 + s1 * x2, s0 * y1 + s1 * y2, s0 * z1 + s1 * z2)
+
+
+def axis_rotation(axis_index, angle):
+    """Quaternion for a rotation of `angle` degrees about basis axis `axis_index`."""
+    half = math.radians(angle) * 0.5
+    q = [math.cos(half), 0.0, 0.0, 0.0]
+    q[axis_index + 1] = math.sin(half)
+    return tuple(q)
+
+
+def constrain_euler_angle(q, axis_index, angle):
+    """
+    Sets one of q's Euler angles (0 = pitch, 1 = yaw, 2 = roll, as quaternion_to_euler reports
+    them) to `angle` degrees and leaves the other two unchanged. Returns (constrained_q,
+    current_angle). As q == qZ(roll) * qY(yaw) * qX(pitch), the correction is a rotation about the
+    world Z axis for roll, about X applied first (body frame) for pitch, and about the Y axis of
+    the frame after roll for yaw.
+    """
+    euler = quaternion_to_euler(q)
+    current = euler[axis_index]
+    delta = axis_rotation(axis_index, angle - current)
+    if axis_index == 0:
+        constrained = quaternion_multiply(q, delta)
+    elif axis_index == 2:
+        constrained = quaternion_multiply(delta, q)
+    else:
+        roll = axis_rotation(2, euler[2])
+        constrained = quaternion_multiply(quaternion_multiply(roll, delta),
+                                          quaternion_multiply(quaternion_inverse(roll), q))
+    return quaternion_normalize(constrained), current
+
+
+def angle_difference(a, b):
+    """Smallest signed difference a - b between two angles in degrees."""
+    return (a - b + 180.0) % 360.0 - 180.0
+
+
+# --- Batch APIs over (N, 4) quaternions and (N, 3) points ---
+
+def _as_quaternions(q):
+    return np.asarray(q, dtype=np.float64)
+
+
+def quaternion_multiply_batch(q1, q2):
+    """Hamilton product of broadcastable (..., 4) arrays."""
+    q1 = _as_quaternions(q1)
+    q2 = _as_quaternions(q2)
+    w1, x1, y1, z1 = np.moveaxis(q1, -1, 0)
+    w2, x2, y2, z2 = np.moveaxis(q2, -1, 0)
+    return np.stack((w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2,
+                     w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2,
+                     w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2,
+                     w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2), axis=-1)
+
+
+def quaternion_inverse_batch(q):
+    result = np.array(q, dtype=np.float64)
+    result[..., 1:] *= -1.0
+    return result
+
+
+def quaternion_normalize_batch(q):
+    q = _as_quaternions(q)
+    norms = np.linalg.norm(q, axis=-1, keepdims=True)
+    safe = np.where(norms == 0.0, 1.0, norms)
+    result = q / safe
+    result[(norms == 0.0)[..., 0]] = IDENTITY_QUATERNION
+    return result
+
+
+def rotate_points_by_quaternion_batch(points, q):
+    """
+    Rotates (..., 3) points by broadcastable (..., 4) unit quaternions.
+    A single quaternion rotates every point; an (N, 4) array rotates point i by q[i].
+    """
+    points = np.asarray(points, dtype=np.float64)
+    q = _as_quaternions(q)
+    w = q[..., :1]
+    u = q[..., 1:]
+    t = 2.0 * np.cross(u, points)
+    return points + w * t + np.cross(u, t)
+
+
+def euler_to_quaternion_batch(pitch, yaw, roll):
+    """Vectorized euler_to_quaternion for arrays of angles in degrees. Returns (..., 4)."""
+    half = np.pi / 360.0
+    pitch = np.asarray(pitch, dtype=np.float64) * half
+    yaw = np.asarray(yaw, dtype=np.float64) * half
+    roll = np.asarray(roll, dtype=np.float64) * half
+    cy, sy = np.cos(yaw), np.sin(yaw)
+    cp, sp = np.cos(pitch), np.sin(pitch)
+    cr, sr = np.cos(roll), np.sin(roll)
+    return np.stack((cy * cp * cr + sy * sp * sr,
+                     cy * sp * cr - sy * cp * sr,
+                     sy * cp * cr + cy * sp * sr,
+                     cy * cp * sr - sy * sp * cr), axis=-1)
+
+
+def quaternion_to_euler_batch(q):
+    """Vectorized quaternion_to_euler. Returns a (..., 3) array of (pitch, yaw, roll) in degrees."""
+    w, x, y, z = np.moveaxis(_as_quaternions(q), -1, 0)
+    pitch_x = np.degrees(np.arctan2(2.0 * (w * x + y * z), 1.0 - 2.0 * (x * x + y * y)))
+    yaw_y = np.degrees(np.arcsin(np.clip(2.0 * (w * y - z * x), -1.0, 1.0)))
+    roll_z = np.degrees(np.arctan2(2.0 * (w * z + x * y), 1.0 - 2.0 * (y * y + z * z)))
+    return np.stack((pitch_x, yaw_y, roll_z), axis=-1)
+
+
+def quaternion_slerp_batch(q1, q2, t):
+    """Vectorized quaternion_slerp over broadcastable (..., 4) arrays; t broadcasts against (...)."""
+    q1 = quaternion_normalize_batch(q1)
+    q2 = quaternion_normalize_batch(q2)
+    q1, q2 = np.broadcast_arrays(q1, q2)
+    t = np.asarray(t, dtype=np.float64)[..., np.newaxis]
+
+    dot = np.sum(q1 * q2, axis=-1, keepdims=True)
+    q2 = np.where(dot < 0.0, -q2, q2)
+    dot = np.abs(dot)
+
+    linear = dot > SLERP_DOT_THRESHOLD
+    theta_0 = np.arccos(np.clip(dot, -1.0, 1.0))
+    sin_theta_0 = np.sin(theta_0)
+    safe_sin_theta_0 = np.where(linear, 1.0, sin_theta_0)
+    theta = theta_0 * t
+    sin_theta = np.sin(theta)
+    s0 = np.where(linear, 1.0 - t, np.cos(theta) - dot * sin_theta / safe_sin_theta_0)
+    s1 = np.where(linear, t, sin_theta / safe_sin_theta_0)
+    result = s0 * q1 + s1 * q2
+    # Only the linear branch needs renormalizing; doing it everywhere is harmless for unit results.
+    return quaternion_normalize_batch(result)
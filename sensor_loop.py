@@ -0,0 +1,108 @@
+# In sensor_loop.py
+import time
+import numpy as np
+import global_state
+from event_bus import ButtonPressed
+from loop_scheduler import DeadlineScheduler, SchedulingOptions, configure_current_thread
+from sensor_pipeline import SensorPipeline
+from settings_store import current_engine_settings
+
+CALIBRATION_SAMPLES = 400
+# A gap longer than this (e.g. a network stall) restarts dt instead of integrating across it.
+MAX_SAMPLE_GAP = 0.25
+PAUSE_POLL_INTERVAL = 0.01
+# How often the loop publishes its timing statistics to global_state.sensor_timing.
+TIMING_PUBLISH_INTERVAL = 1.0
+
+
+def calibrate_gyro_bias(source, sample_count=CALIBRATION_SAMPLES):
+    """Averages the gyro over `sample_count` samples while the controller is held still."""
+    gyro_sum = np.zeros(3)
+    collected = 0
+    while collected < sample_count and global_state.running:
+        for sample in source.read_samples():
+            gyro_sum += sample.gyro
+            collected += 1
+        source.idle()
+    return gyro_sum / max(collected, 1)
+
+
+def run_sensor_loop(source, scheduling=SchedulingOptions()):
+    """Opens `source`, calibrates the gyro and feeds every sample through the SensorPipeline until exit."""
+    configure_current_thread(scheduling)
+    if not source.open():
+        with global_state.controller_lock:
+            global_state.connection_status_text = source.status_text
+        print(source.status_text)
+        return
+
+    try:
+        with global_state.controller_lock:
+            global_state.connection_status_text = "Calibrating... Keep controller still."
+        print("Calibrating gyroscope... Keep the controller still for 2 seconds.")
+
+        initial_bias = calibrate_gyro_bias(source)
+        print(f"Calibration complete. Initial bias set to: {initial_bias}")
+
+        pipeline = SensorPipeline(sample_rate=source.sample_rate, initial_bias=initial_bias)
+
+        with global_state.controller_lock:
+            global_state.is_controller_connected = True
+            global_state.connection_status_text = source.status_text
+            global_state.is_calibrated = True
+
+        scheduler = DeadlineScheduler(1.0 / source.sample_rate, spin=scheduling.spin, pace=source.polled)
+        last_timing_publish = time.monotonic()
+        last_timestamp = None
+        while global_state.running:
+            profiler = global_state.sensor_profiler
+            profiling = profiler.enabled
+            if profiling: stage_start = profiler.start()
+
+            # Button mapping, homing and the stockpile are handled by the GUI (global_state.button_events).
+            for button_name in source.poll_buttons():
+                global_state.event_bus.publish(ButtonPressed(time.monotonic(), button_name))
+
+            if profiling: stage_start = profiler.record('event_poll', stage_start)
+
+            samples = source.read_samples()
+
+            if profiling: stage_start = profiler.record('sensor_read', stage_start)
+
+            if global_state.recenter_event.is_set():
+                pipeline.reset_orientation(global_state.DEFAULT_HOME_ORIENTATION)
+                global_state.recenter_event.clear()
+
+            if global_state.go_to_home_event.is_set():
+                with global_state.controller_lock:
+                    if global_state.home_position and 'orientation' in global_state.home_position:
+                        pipeline.reset_orientation(global_state.home_position['orientation'])
+                global_state.go_to_home_event.clear()
+
+            if current_engine_settings().pause_sensor_updates_enabled:
+                # Sleep outside the lock so the GUI isn't blocked while paused.
+                time.sleep(PAUSE_POLL_INTERVAL)
+                last_timestamp = None
+                scheduler.restart()
+                continue
+
+            with global_state.controller_lock:
+                for sample in samples:
+                    dt = 1.0 / source.sample_rate if last_timestamp is None else sample.timestamp - last_timestamp
+                    if dt <= 0:
+                        continue
+                    if dt > MAX_SAMPLE_GAP:
+                        dt = 1.0 / source.sample_rate
+                    last_timestamp = sample.timestamp
+                    pipeline.process_sample(sample.gyro, sample.accel, dt, profiler, timestamp=sample.timestamp)
+
+            if not source.polled:
+                source.idle()
+            scheduler.wait()
+
+            now = time.monotonic()
+            if now - last_timing_publish >= TIMING_PUBLISH_INTERVAL:
+                last_timing_publish = now
+                global_state.sensor_timing = scheduler.stats()
+    finally:
+        source.close()
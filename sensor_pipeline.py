@@ -0,0 +1,180 @@
+# In sensor_pipeline.py
+import time
+import numpy as np
+import global_state
+from app_logging import get_logger
+from filter_bank import SensorFilterBank
+from madgwick_ahrs import MadgwickAHRS
+from motion_engine import PointTracker
+from settings_store import current_engine_settings
+from telemetry import TelemetryPublisher, FLAG_CALIBRATED, FLAG_UNINTENDED_MOVEMENT
+from quaternion_math import quaternion_to_euler, rotate_point_by_quaternion, quaternion_slerp, constrain_euler_angle, \
+    angle_difference
+
+telemetry_log = get_logger('telemetry')
+
+# Euler angle index (as quaternion_to_euler reports it) of each lockable axis. A lock changes only
+# that angle, so it matches the angles the UI locks and displays.
+PITCH_AXIS = 0
+YAW_AXIS = 1
+ROLL_AXIS = 2
+
+
+class SensorPipeline:
+    """
+    The per-sample processing chain shared by every sensor source:
+    sensor filter bank -> Madgwick update -> axis locking -> tip rotation.
+    It has no SDL dependency so it can also be driven by recorded or synthetic data.
+    """
+
+    def __init__(self, sample_rate=200.0, initial_bias=None):
+        self.madgwick_filter = MadgwickAHRS(sample_period=(1.0 / sample_rate))
+        self.initial_bias = np.zeros(3) if initial_bias is None else np.array(initial_bias, dtype=float)
+        self.madgwick_filter.gyro_bias = self.initial_bias.copy()
+
+        # Channels are (ax, ay, az, gx, gy, gz).
+        self.filter_bank = SensorFilterBank(channels=6, sample_rate=sample_rate)
+        self._filter_settings = None
+        # The EngineSettings snapshot in use, and the (axis, lock angle) pairs derived from it.
+        self.settings = None
+        self._locked_axes = ()
+        self.point_tracker = PointTracker(global_state.event_bus)
+        self.telemetry = None
+        self._failed_telemetry_address = None
+
+    def _apply_settings(self, settings):
+        """Reconfigures the filters for a new EngineSettings snapshot."""
+        self.madgwick_filter.beta = settings.beta_gain
+        self.madgwick_filter.zeta = settings.drift_correction_gain
+        self.madgwick_filter.correct_only_when_still = settings.correct_drift_when_still_enabled
+
+        filter_settings = (settings.sensor_filter_type, settings.accelerometer_smoothing, settings.gyro_smoothing,
+                           settings.filter_gyro_enabled, settings.one_euro_min_cutoff, settings.one_euro_beta,
+                           settings.biquad_cutoff_hz)
+        if filter_settings != self._filter_settings:
+            filter_type, accel_alpha, gyro_alpha, filter_gyro, min_cutoff, beta, cutoff_hz = filter_settings
+            self.filter_bank.configure(filter_type=filter_type,
+                                       enabled=[True, True, True, filter_gyro, filter_gyro, filter_gyro],
+                                       alpha=[accel_alpha] * 3 + [gyro_alpha] * 3,
+                                       min_cutoff=min_cutoff, beta=beta, cutoff_hz=cutoff_hz)
+            self._filter_settings = filter_settings
+
+        locked_axes = []
+        if not settings.track_pitch: locked_axes.append((PITCH_AXIS, settings.lock_pitch_to))
+        if not settings.track_yaw: locked_axes.append((YAW_AXIS, settings.lock_yaw_to))
+        if not settings.track_roll: locked_axes.append((ROLL_AXIS, settings.lock_roll_to))
+        self._locked_axes = tuple(locked_axes)
+        self.settings = settings
+
+    def _telemetry_publisher(self, settings):
+        """Opens, re-targets or closes the telemetry publisher to follow the settings. Returns it or None."""
+        address = settings.telemetry_address
+        if not settings.telemetry_enabled or address == self._failed_telemetry_address:
+            if self.telemetry is not None:
+                self.telemetry.close()
+                self.telemetry = None
+            return None
+        if self.telemetry is None or self.telemetry.address != address:
+            if self.telemetry is not None:
+                self.telemetry.close()
+                self.telemetry = None
+            try:
+                self.telemetry = TelemetryPublisher(address)
+                telemetry_log.info("Publishing to %s", address)
+            except (ValueError, OSError) as e:
+                telemetry_log.warning("Cannot publish to '%s': %s", address, e)
+                self._failed_telemetry_address = address
+        return self.telemetry
+
+    def reset_orientation(self, orientation):
+        """Snaps the filter to `orientation` and restores the calibrated gyro bias."""
+        self.madgwick_filter.quaternion = np.array(orientation, dtype=float)
+        self.madgwick_filter.gyro_bias = self.initial_bias.copy()
+        # The tip jumps with the orientation; don't sweep hits along that jump.
+        self.point_tracker.reset()
+
+    def process_sample(self, raw_gyro, raw_accel, dt, profiler=None, timestamp=None):
+        """
+        Runs one sample through the pipeline and publishes the result to global_state.
+        `timestamp` is the sample's monotonic time (defaults to now).
+        The caller must hold global_state.controller_lock.
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        # One reference to an immutable snapshot; the filters are only reconfigured when it changes.
+        settings = global_state.engine_settings or current_engine_settings()
+        if self.settings is None or settings.version != self.settings.version:
+            self._apply_settings(settings)
+        madgwick_filter = self.madgwick_filter
+        madgwick_filter.sample_period = dt
+        raw_gx, raw_gy, raw_gz = raw_gyro
+        raw_ax, raw_ay, raw_az = raw_accel
+
+        profiling = profiler is not None and profiler.enabled
+        if profiling: stage_start = profiler.start()
+
+        filtered = self.filter_bank.update((raw_ax, raw_ay, raw_az, raw_gx, raw_gy, raw_gz), dt)
+
+        global_state.raw_gyro = [raw_gx, raw_gy, raw_gz]
+        global_state.raw_accel = [raw_ax, raw_ay, raw_az]
+
+        if profiling: stage_start = profiler.record('filtering', stage_start)
+
+        madgwick_filter.update_imu(filtered[3:], filtered[:3])
+
+        if profiling: stage_start = profiler.record('update_imu', stage_start)
+
+        # --- AXIS LOCKING LOGIC ---
+        q = tuple(madgwick_filter.quaternion.tolist())
+        locked_axes = self._locked_axes
+        if locked_axes:
+            # Set each locked Euler angle to its lock angle directly on the quaternion, and flag
+            # unintended movement when the measured angle strays from the lock.
+            target_q = q
+            unintended_movement = False
+            for axis_index, lock_angle in locked_axes:
+                target_q, current_angle = constrain_euler_angle(target_q, axis_index, lock_angle)
+                if abs(angle_difference(current_angle, lock_angle)) > 1.5:
+                    unintended_movement = True
+            global_state.unintended_movement_detected = unintended_movement
+
+            # Instead of a hard overwrite, smoothly interpolate towards the target quaternion.
+            # This eliminates jitter caused by snapping the orientation.
+            corrected_q = quaternion_slerp(q, target_q, settings.axis_lock_strength)
+            madgwick_filter.quaternion = np.array(corrected_q)
+        else:
+            # Nothing is locked, so the filter output is used as-is.
+            corrected_q = q
+            global_state.unintended_movement_detected = False
+
+        global_state.orientation_quaternion = list(corrected_q)
+
+        # Euler angles are only needed for display, so they are computed once from the final state.
+        final_pitch, final_yaw, final_roll = quaternion_to_euler(corrected_q)
+        global_state.gyro_rotation = [final_pitch, final_yaw, final_roll]
+        global_state.last_good_pitch = final_pitch
+        global_state.last_good_yaw = final_yaw
+        global_state.last_good_roll = final_roll
+
+        if profiling: stage_start = profiler.record('axis_lock', stage_start)
+
+        # Calculate tip position based on the FINAL corrected orientation
+        tip_pos = rotate_point_by_quaternion((0.0, 0.0, settings.distance_offset), corrected_q)
+        global_state.controller_tip_position = np.array(tip_pos)
+
+        if profiling: profiler.record('tip_rotation', stage_start)
+
+        global_state.motion_history.append(timestamp, corrected_q, (final_pitch, final_yaw, final_roll), tip_pos,
+                                           (raw_gx, raw_gy, raw_gz), (raw_ax, raw_ay, raw_az))
+        global_state.gesture_recognizer.update()
+        self.point_tracker.update(global_state.reference_points, global_state.reference_points_version, tip_pos,
+                                  timestamp, settings.hit_tolerance)
+
+        telemetry = self._telemetry_publisher(settings)
+        if telemetry is not None:
+            flags = FLAG_CALIBRATED if global_state.is_calibrated else 0
+            if global_state.unintended_movement_detected:
+                flags |= FLAG_UNINTENDED_MOVEMENT
+            inside_count, inside_mask = self.point_tracker.inside_summary()
+            telemetry.publish(timestamp, corrected_q, (final_pitch, final_yaw, final_roll), tip_pos, flags,
+                              inside_count, inside_mask)
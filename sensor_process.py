@@ -0,0 +1,358 @@
+# In sensor_process.py
+"""
+Runs input polling, filtering and hit detection in a separate process (`--sensor-process`), so
+sampling jitter no longer depends on the GUI thread holding the interpreter.
+
+The child process runs the normal sensor loop and publishes its output through one
+multiprocessing.shared_memory block:
+
+    counters   int64[2]        samples written, snapshot sequence (odd while being written)
+    snapshot   float64[20]     latest timestamp, quaternion, Euler angles, tip, raw gyro/accel, flags
+    history    MotionHistory   mirrored ring of every sample (see motion_history.py)
+
+The ring has a single writer, which fills a slot before bumping the sample counter, so the GUI
+side can copy new rows without locks and discards any it was lapped on while copying. The
+snapshot is a seqlock: readers retry if the sequence was odd or changed while they copied.
+
+Settings, reference points and recenter/go-home commands travel to the child over a Pipe, and
+point and button events come back over a second one. On the GUI side, SensorProcess.run_bridge
+takes the sensor thread's place: it mirrors the child's output into global_state, the local
+MotionHistory and the event bus, and forwards each new EngineSettings snapshot.
+"""
+import multiprocessing
+import threading
+import time
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import global_state
+from app_logging import setup_logging, shutdown_logging
+from event_bus import ButtonPressed, EventsDropped, PointEntered, PointExited
+from input_sources import create_input_source
+from loop_scheduler import SchedulingOptions
+from motion_history import FIELDS, MotionHistory
+from sensor_loop import run_sensor_loop
+from settings_store import current_engine_settings
+from point_store import ReferencePointStore
+
+# Snapshot slots: timestamp, quaternion (4), Euler (3), tip (3), gyro (3), accel (3), then flags.
+SNAPSHOT_SIZE = 20
+SNAPSHOT_UNINTENDED = 17
+SNAPSHOT_CALIBRATED = 18
+SNAPSHOT_CONNECTED = 19
+
+# Sent back with the events whenever the child's connection status or loop timing changes.
+SensorStatus = namedtuple('SensorStatus', 'text')
+SensorTiming = namedtuple('SensorTiming', 'stats')
+
+# How often the child checks for commands and the GUI side copies new samples.
+BRIDGE_INTERVAL = 0.002
+
+
+def shared_memory_size(capacity):
+    row_width = 1 + sum(width for _, width in FIELDS)
+    return 8 * (2 + SNAPSHOT_SIZE + 2 * capacity * row_width)
+
+
+class SharedMotionHistory(MotionHistory):
+    """A MotionHistory (plus counters and snapshot) laid out in a SharedMemory block."""
+
+    def __init__(self, shm, capacity):
+        offset = 0
+        self._counters = np.ndarray((2,), dtype=np.int64, buffer=shm.buf, offset=offset)
+        offset += self._counters.nbytes
+        self.snapshot = np.ndarray((SNAPSHOT_SIZE,), dtype=np.float64, buffer=shm.buf, offset=offset)
+        offset += self.snapshot.nbytes
+        timestamps = np.ndarray((2 * capacity,), dtype=np.float64, buffer=shm.buf, offset=offset)
+        offset += timestamps.nbytes
+        fields = {}
+        for name, width in FIELDS:
+            fields[name] = np.ndarray((2 * capacity, width), dtype=np.float64, buffer=shm.buf, offset=offset)
+            offset += fields[name].nbytes
+        super().__init__(capacity, buffers=(timestamps, fields))
+
+    @property
+    def total_samples(self):
+        return int(self._counters[0])
+
+    @total_samples.setter
+    def total_samples(self, value):
+        self._counters[0] = value
+
+    def release(self):
+        """Drops the views into the shared buffer so the SharedMemory block can be closed."""
+        self._counters = self.snapshot = self.timestamps = self._fields = None
+
+    # --- Writer (child process) ---
+
+    def append(self, timestamp, quaternion, euler, tip, gyro, accel):
+        super().append(timestamp, quaternion, euler, tip, gyro, accel)
+        self.write_snapshot(timestamp, quaternion, euler, tip, gyro, accel)
+
+    def write_snapshot(self, timestamp, quaternion, euler, tip, gyro, accel):
+        snapshot = self.snapshot
+        self._counters[1] += 1
+        snapshot[0] = timestamp
+        snapshot[1:5] = quaternion
+        snapshot[5:8] = euler
+        snapshot[8:11] = tip
+        snapshot[11:14] = gyro
+        snapshot[14:17] = accel
+        self._write_flags()
+        self._counters[1] += 1
+
+    def _write_flags(self):
+        snapshot = self.snapshot
+        snapshot[SNAPSHOT_UNINTENDED] = global_state.unintended_movement_detected
+        snapshot[SNAPSHOT_CALIBRATED] = global_state.is_calibrated
+        snapshot[SNAPSHOT_CONNECTED] = global_state.is_controller_connected
+
+    def write_flags(self):
+        """Refreshes only the flags (used while no samples are flowing, e.g. during calibration)."""
+        self._counters[1] += 1
+        self._write_flags()
+        self._counters[1] += 1
+
+    # --- Reader (GUI process) ---
+
+    def read_snapshot(self):
+        """A consistent copy of the snapshot, or None if the writer kept interrupting the read."""
+        for _ in range(100):
+            sequence = self._counters[1]
+            if sequence % 2 == 0:
+                snapshot = self.snapshot.copy()
+                if self._counters[1] == sequence:
+                    return snapshot
+        return None
+
+    def read_since(self, first_index):
+        """
+        Copies samples first_index.. onwards. Returns (index of the first returned sample,
+        timestamps, {field: rows}); samples already overwritten by the writer are skipped.
+        """
+        total = self.total_samples
+        first_index = max(first_index, total - self.capacity)
+        count = total - first_index
+        if count <= 0:
+            return total, np.empty(0), {}
+        span = slice(first_index % self.capacity, first_index % self.capacity + count)
+        times = self.timestamps[span].copy()
+        rows = {name: array[span].copy() for name, array in self._fields.items()}
+        # Rows the writer reached while we were copying (including the one it may be writing) may be torn.
+        torn = min(count, max(0, self.total_samples - self.capacity + 1 - first_index))
+        if torn:
+            times = times[torn:]
+            rows = {name: values[torn:] for name, values in rows.items()}
+        return first_index + torn, times, rows
+
+
+# --- Child process ---
+
+def _serve_commands(connection, event_connection, history, forwarded_events):
+    """Child-side command thread: applies settings/commands and sends events and status back."""
+    last_status = None
+    last_timing = None
+    while global_state.running:
+        if connection.poll(BRIDGE_INTERVAL):
+            try:
+                command, payload = connection.recv()
+            except EOFError:
+                command, payload = 'stop', None
+            if command == 'stop':
+                global_state.running = False
+            elif command == 'settings':
+                global_state.engine_settings = payload
+            elif command == 'reference_points':
+                with global_state.controller_lock:
+                    global_state.reference_points = ReferencePointStore.from_positions(*payload)
+                    global_state.reference_points_version += 1
+            elif command == 'recenter':
+                global_state.recenter_event.set()
+            elif command == 'go_home':
+                with global_state.controller_lock:
+                    global_state.home_position = {'orientation': payload}
+                global_state.go_to_home_event.set()
+
+        events = forwarded_events.drain()
+        if forwarded_events.take_overflow():
+            events.append(EventsDropped(time.monotonic(), forwarded_events.dropped))
+        status = (global_state.connection_status_text, global_state.is_calibrated, global_state.is_controller_connected)
+        if status != last_status:
+            history.write_flags()
+            events.append(SensorStatus(status[0]))
+            last_status = status
+        if global_state.sensor_timing is not last_timing:
+            last_timing = global_state.sensor_timing
+            events.append(SensorTiming(last_timing))
+        if events:
+            try:
+                event_connection.send(events)
+            except (BrokenPipeError, OSError):
+                global_state.running = False
+
+
+def sensor_process_main(shm_name, capacity, connection, event_connection, source_args, scheduling, log_level):
+    """Entry point of the sensor process."""
+    # A spawned child starts without the GUI process's logging setup (hit, group and telemetry
+    # diagnostics are logged from here).
+    setup_logging(log_level)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    history = SharedMotionHistory(shm, capacity)
+    global_state.motion_history = history
+    # Gestures and group evaluation stay in the GUI process; only forward raw events from here.
+    global_state.event_bus.unsubscribe(global_state.engine_events)
+    global_state.event_bus.unsubscribe(global_state.action_events)
+    global_state.event_bus.unsubscribe(global_state.button_events)
+    forwarded_events = global_state.event_bus.subscribe('sensor_process',
+                                                        event_types=(PointEntered, PointExited, ButtonPressed),
+                                                        keep_types=(PointExited,))
+    command_thread = threading.Thread(target=_serve_commands,
+                                      args=(connection, event_connection, history, forwarded_events), daemon=True)
+    command_thread.start()
+    try:
+        run_sensor_loop(create_input_source(*source_args), scheduling)
+    finally:
+        global_state.running = False
+        command_thread.join(timeout=1)
+        history.release()
+        shm.close()
+        shutdown_logging()
+
+
+# --- GUI process ---
+
+class SensorProcess:
+    """GUI-side handle on the sensor process; run_bridge() replaces the sensor thread."""
+
+    def __init__(self, source_args, capacity=4096, scheduling=SchedulingOptions(), log_level='INFO'):
+        self.source_args = tuple(source_args)
+        self.scheduling = scheduling
+        self.log_level = log_level
+        self.capacity = capacity
+        self.process = None
+        self._shm = None
+        self._history = None
+        self._connection = None
+        self._event_connection = None
+        self._samples_seen = 0
+        self._last_settings_version = None
+        self._last_points_version = None
+
+    def start(self):
+        self._shm = shared_memory.SharedMemory(create=True, size=shared_memory_size(self.capacity))
+        self._history = SharedMotionHistory(self._shm, self.capacity)
+        self._history.snapshot[:] = 0.0
+        self._history._counters[:] = 0
+        # Spawn rather than fork: the child must not inherit Tk, OpenGL or the GUI's threads.
+        context = multiprocessing.get_context('spawn')
+        self._connection, child_connection = context.Pipe()
+        self._event_connection, child_events = context.Pipe(duplex=False)
+        self.process = context.Process(
+            target=sensor_process_main, name="sensor-process", daemon=True,
+            args=(self._shm.name, self.capacity, child_connection, child_events, self.source_args,
+                  self.scheduling, self.log_level))
+        self.process.start()
+        child_connection.close()
+        child_events.close()
+
+    def run_bridge(self):
+        """Mirrors the sensor process into this process until the app exits or the child dies."""
+        if self.process is None:
+            self.start()
+        try:
+            while global_state.running and self.process.is_alive():
+                self._send_commands()
+                self._receive_events()
+                self._copy_samples()
+                time.sleep(BRIDGE_INTERVAL)
+        finally:
+            self.stop()
+
+    def _send(self, command, payload=None):
+        try:
+            self._connection.send((command, payload))
+        except (BrokenPipeError, OSError):
+            pass
+
+    def _send_commands(self):
+        with global_state.controller_lock:
+            settings = current_engine_settings()
+            points_version = global_state.reference_points_version
+            points = None
+            if points_version != self._last_points_version:
+                points = (list(global_state.reference_points.ids), global_state.reference_points.positions.copy())
+            home = global_state.home_position
+
+        if settings.version != self._last_settings_version:
+            self._send('settings', settings)
+            self._last_settings_version = settings.version
+        if points is not None:
+            self._send('reference_points', points)
+            self._last_points_version = points_version
+        if global_state.recenter_event.is_set():
+            global_state.recenter_event.clear()
+            self._send('recenter')
+        if global_state.go_to_home_event.is_set():
+            global_state.go_to_home_event.clear()
+            if home and 'orientation' in home:
+                self._send('go_home', list(home['orientation']))
+
+    def _receive_events(self):
+        while self._event_connection.poll():
+            try:
+                events = self._event_connection.recv()
+            except EOFError:
+                return
+            for event in events:
+                if isinstance(event, EventsDropped):
+                    # Point events were lost on the way; make the engine resynchronize.
+                    global_state.engine_events.overflowed = True
+                elif isinstance(event, SensorStatus):
+                    with global_state.controller_lock:
+                        global_state.connection_status_text = event.text
+                elif isinstance(event, SensorTiming):
+                    global_state.sensor_timing = event.stats
+                else:
+                    global_state.event_bus.publish(event)
+
+    def _copy_samples(self):
+        first_index, times, rows = self._history.read_since(self._samples_seen)
+        snapshot = self._history.read_snapshot()
+        if not len(times) and snapshot is None:
+            return
+        self._samples_seen = first_index + len(times)
+        with global_state.controller_lock:
+            history = global_state.motion_history
+            quaternions, eulers, tips = rows.get('quaternion'), rows.get('euler'), rows.get('tip')
+            for i in range(len(times)):
+                history.append(times[i], quaternions[i], eulers[i], tips[i], rows['gyro'][i], rows['accel'][i])
+                global_state.gesture_recognizer.update()
+            if snapshot is not None:
+                global_state.unintended_movement_detected = bool(snapshot[SNAPSHOT_UNINTENDED])
+                global_state.is_calibrated = bool(snapshot[SNAPSHOT_CALIBRATED])
+                global_state.is_controller_connected = bool(snapshot[SNAPSHOT_CONNECTED])
+                if len(times):
+                    pitch, yaw, roll = snapshot[5:8].tolist()
+                    global_state.orientation_quaternion = snapshot[1:5].tolist()
+                    global_state.gyro_rotation = [pitch, yaw, roll]
+                    global_state.last_good_pitch, global_state.last_good_yaw, global_state.last_good_roll = \
+                        pitch, yaw, roll
+                    global_state.controller_tip_position = snapshot[8:11].copy()
+                    global_state.raw_gyro = snapshot[11:14].tolist()
+                    global_state.raw_accel = snapshot[14:17].tolist()
+
+    def stop(self):
+        if self.process is not None and self.process.is_alive():
+            self._send('stop')
+            self.process.join(timeout=2)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join(timeout=1)
+        if self._shm is not None:
+            self._history.release()
+            self._history = None
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
@@ -0,0 +1,90 @@
+# In settings_store.py
+"""
+Pushes UI settings into global_state when their Tk variable changes, instead of polling every
+variable each GUI tick.
+
+bind(name, var) copies the variable's value into global_state.<name> immediately and again from
+a Tk write trace whenever it changes. Every accepted change bumps global_state.settings_version,
+so consumers on other threads (the sensor process bridge, ...) only rebuild their view of the
+settings when the version moves, as with reference_points_version. Values a user is halfway
+through typing (an empty spinbox, "0.") fail to convert and are skipped until they are valid.
+
+The settings the sensor thread reads are also published together as one immutable EngineSettings
+snapshot in global_state.engine_settings, replaced (a single reference assignment) on every change
+to one of them. The sensor pipeline keeps a local reference and reconfigures its filters only when
+the snapshot's version changes, and never sees half of a multi-field update.
+
+Traces run on the Tk thread, sometimes while that thread already holds controller_lock (e.g.
+when the action counter is updated), so the store only uses its own lock. Each setting is a
+single attribute assignment, which other threads see atomically.
+"""
+import threading
+import tkinter as tk
+from collections import namedtuple
+
+import global_state
+
+# Settings the sensor thread uses, in EngineSettings field order.
+ENGINE_SETTING_NAMES = (
+    'beta_gain', 'drift_correction_gain', 'correct_drift_when_still_enabled', 'sensor_filter_type',
+    'accelerometer_smoothing', 'gyro_smoothing', 'filter_gyro_enabled', 'one_euro_min_cutoff', 'one_euro_beta',
+    'biquad_cutoff_hz', 'track_pitch', 'track_yaw', 'track_roll', 'lock_pitch_to', 'lock_yaw_to', 'lock_roll_to',
+    'axis_lock_strength', 'distance_offset', 'hit_tolerance', 'pause_sensor_updates_enabled', 'telemetry_enabled',
+    'telemetry_address',
+)
+EngineSettings = namedtuple('EngineSettings', ('version',) + ENGINE_SETTING_NAMES)
+
+
+def publish_engine_settings():
+    """
+    Snapshots the engine settings from global_state into global_state.engine_settings and returns
+    it. For code that sets the globals directly instead of through a SettingsStore binding.
+    """
+    global_state.settings_version += 1
+    settings = EngineSettings(global_state.settings_version,
+                              *(getattr(global_state, name) for name in ENGINE_SETTING_NAMES))
+    global_state.engine_settings = settings
+    return settings
+
+
+def current_engine_settings():
+    """The published EngineSettings, publishing the current globals first if nothing has been yet."""
+    settings = global_state.engine_settings
+    return settings if settings is not None else publish_engine_settings()
+
+
+class SettingsStore:
+    def __init__(self):
+        self._bindings = {}
+        self._lock = threading.Lock()
+
+    def bind(self, name, var, convert=None, on_change=None):
+        """
+        Keeps global_state.<name> equal to convert(var.get()). `convert` may raise ValueError to
+        reject a value; `on_change(value)` runs after each accepted change.
+        """
+        self._bindings[name] = (var, convert, on_change)
+        var.trace_add('write', lambda *_: self._update(name))
+        self._update(name, force=True)
+
+    def _update(self, name, force=False):
+        var, convert, on_change = self._bindings[name]
+        try:
+            value = var.get()
+            if convert is not None:
+                value = convert(value)
+        except (tk.TclError, ValueError):
+            return
+        with self._lock:
+            if not force and getattr(global_state, name, None) == value:
+                return
+            setattr(global_state, name, value)
+            if name in ENGINE_SETTING_NAMES:
+                publish_engine_settings()
+            else:
+                global_state.settings_version += 1
+        if on_change is not None:
+            on_change(value)
+
+    def names(self):
+        return tuple(self._bindings)
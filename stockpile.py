@@ -0,0 +1,173 @@
+# In stockpile.py
+"""
+The queue of stockpiled actions, persisted in an append-only journal so it survives restarts
+and crashes.
+
+Entries are StockpiledAction(action, group_id), the group id attributing the action to the
+group that earned it (None for journals written before it was recorded).
+
+Each push appends {"push": action, "group_id": ...} and each pop appends {"pop": n} as one JSON line, flushed
+to the OS right away (so a crash of the app loses nothing; a power cut can lose the last
+few lines). On open the journal is replayed, ignoring a torn final line. Once the journal holds
+many more records than there are queued actions, it is compacted: the current queue is written
+to a temporary file as pushes, which then atomically replaces the journal.
+"""
+import json
+import os
+from collections import deque, namedtuple
+
+from app_logging import get_logger
+
+DEFAULT_JOURNAL = "stockpile.journal"
+# Compact when the journal has this many records and more than twice as many as queued actions.
+COMPACT_MIN_RECORDS = 256
+
+stockpile_log = get_logger('stockpile')
+
+StockpiledAction = namedtuple('StockpiledAction', 'action group_id')
+
+
+def _push_record(entry):
+    return {'push': entry.action, 'group_id': entry.group_id}
+
+
+class Stockpile:
+    def __init__(self, journal_path=None):
+        self._actions = deque()
+        self._journal = None
+        self._records = 0
+        self.journal_path = None
+        if journal_path:
+            self.open(journal_path)
+
+    def __len__(self):
+        return len(self._actions)
+
+    def __iter__(self):
+        return iter(self._actions)
+
+    def open(self, journal_path):
+        """Loads the queue from `journal_path` (if it exists) and journals further changes to it."""
+        self.close()
+        self.journal_path = journal_path
+        self._actions = deque()
+        if os.path.exists(journal_path):
+            with open(journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn write from a crash
+                    if 'push' in record:
+                        self._actions.append(StockpiledAction(record['push'], record.get('group_id')))
+                    elif 'pop' in record:
+                        for _ in range(min(record['pop'], len(self._actions))):
+                            self._actions.popleft()
+                    elif 'clear' in record:
+                        self._actions.clear()
+        self.compact()
+        if self._actions:
+            print(f"Restored {len(self._actions)} stockpiled actions from {journal_path}")
+
+    def _append(self, record):
+        if self._journal is None:
+            return
+        try:
+            self._journal.write(json.dumps(record) + '\n')
+            self._journal.flush()
+            self._records += 1
+        except OSError as e:
+            stockpile_log.warning("Could not write to stockpile journal '%s': %s", self.journal_path, e)
+            return
+        if self._records >= COMPACT_MIN_RECORDS and self._records > 2 * len(self._actions):
+            self.compact()
+
+    def push(self, action, group_id=None):
+        entry = StockpiledAction(action, group_id)
+        self._actions.append(entry)
+        self._append(_push_record(entry))
+
+    def pop(self):
+        """Removes and returns the oldest StockpiledAction, or None if the stockpile is empty."""
+        if not self._actions:
+            return None
+        action = self._actions.popleft()
+        self._append({'pop': 1})
+        return action
+
+    def pop_many(self, count):
+        """Removes and returns up to `count` of the oldest StockpiledActions with a single journal record."""
+        count = min(count, len(self._actions))
+        if count <= 0:
+            return []
+        actions = [self._actions.popleft() for _ in range(count)]
+        self._append({'pop': count})
+        return actions
+
+    def clear(self):
+        self._actions.clear()
+        self._append({'clear': True})
+
+    def compact(self):
+        """Rewrites the journal to hold just the queued actions."""
+        if not self.journal_path:
+            return
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        temp_path = self.journal_path + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                for entry in self._actions:
+                    f.write(json.dumps(_push_record(entry)) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.journal_path)
+            self._records = len(self._actions)
+        except OSError as e:
+            stockpile_log.warning("Could not compact stockpile journal '%s': %s", self.journal_path, e)
+        try:
+            self._journal = open(self.journal_path, 'a', encoding='utf-8')
+        except OSError as e:
+            stockpile_log.warning("Stockpile journal '%s' is not writable, stockpile won't persist: %s",
+                                  self.journal_path, e)
+
+    def close(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+
+# A Key Press holds its key up to 90 ms, so faster than this the same key's presses would run
+# into each other (the scheduler then queues them and the drain falls behind its rate anyway).
+MAX_DRAIN_RATE = 10.0
+
+
+class DrainPacer:
+    """
+    Releases queued actions at `rate` per second (capped at MAX_DRAIN_RATE) for a 'drain all': at
+    most `max_per_tick` per call, so after a GUI stall at most that many go out at once and no
+    further backlog is kept.
+    """
+
+    def __init__(self, rate=10.0, max_per_tick=10):
+        self.rate = rate
+        self.max_per_tick = max_per_tick
+        self.active = False
+        self._next_time = 0.0
+
+    def start(self, now):
+        self.active = True
+        self._next_time = now
+
+    def stop(self):
+        self.active = False
+
+    def due(self, now):
+        """Number of actions to release at `now`."""
+        if not self.active or now < self._next_time:
+            return 0
+        interval = 1.0 / min(max(self.rate, 0.1), MAX_DRAIN_RATE)
+        count = min(self.max_per_tick, int((now - self._next_time) / interval) + 1)
+        self._next_time = max(self._next_time + count * interval, now)
+        return count
@@ -0,0 +1,151 @@
+# In telemetry.py
+"""
+Binary telemetry of the filtered controller pose, for overlays and analytics tools.
+
+Every processed sensor sample can be sent as one fixed-size little-endian datagram over a local
+UDP or Unix domain datagram socket:
+
+    offset  type        field
+    0       uint32      magic (TELEMETRY_MAGIC)
+    4       uint32      sequence number (wraps)
+    8       float64     sample timestamp (time.monotonic() seconds)
+    16      float32[4]  orientation quaternion (w, x, y, z)
+    32      float32[3]  Euler angles (pitch, yaw, roll) in degrees
+    44      float32[3]  tip position
+    56      uint16      flags (FLAG_*)
+    58      uint16      number of reference points the tip is inside
+    60      uint64      bit i set = the tip is inside reference point i (first 64 points)
+
+Sending never blocks: with no listener, or a full socket buffer, the sample is dropped.
+
+Run `python telemetry.py udp://127.0.0.1:5555` to print a live stream.
+"""
+import argparse
+import os
+import socket
+import struct
+import sys
+from collections import namedtuple
+
+TELEMETRY_MAGIC = 0x4D32_4B31  # "1K2M" little-endian
+PACKET = struct.Struct('<IId4f3f3fHHQ')
+DEFAULT_ADDRESS = "udp://127.0.0.1:5555"
+
+FLAG_CALIBRATED = 0x1
+FLAG_UNINTENDED_MOVEMENT = 0x2
+
+TelemetrySample = namedtuple('TelemetrySample',
+                             'sequence timestamp quaternion euler tip flags inside_count inside_mask')
+
+
+def parse_address(address):
+    """Returns (socket family, address) for 'udp://host:port' or 'unix:///path/to/socket'."""
+    if address.startswith("unix://"):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise ValueError("Unix domain sockets are not available on this platform")
+        return socket.AF_UNIX, address[len("unix://"):]
+    if address.startswith("udp://"):
+        host, _, port = address[len("udp://"):].rpartition(':')
+        if not host or not port.isdigit():
+            raise ValueError(f"Invalid UDP telemetry address '{address}'")
+        return socket.AF_INET, (host, int(port))
+    raise ValueError(f"Unsupported telemetry address '{address}' (use udp://host:port or unix:///path)")
+
+
+def unpack_sample(data):
+    fields = PACKET.unpack(data)
+    if fields[0] != TELEMETRY_MAGIC:
+        raise ValueError("Not a telemetry packet")
+    return TelemetrySample(fields[1], fields[2], fields[3:7], fields[7:10], fields[10:13], fields[13], fields[14],
+                           fields[15])
+
+
+class TelemetryPublisher:
+    def __init__(self, address=DEFAULT_ADDRESS):
+        self.address = address
+        family, self._target = parse_address(address)
+        self._socket = socket.socket(family, socket.SOCK_DGRAM)
+        self._socket.setblocking(False)
+        self._buffer = bytearray(PACKET.size)
+        self.sequence = 0
+        self.sent = 0
+        self.dropped = 0
+
+    def publish(self, timestamp, quaternion, euler, tip, flags=0, inside_count=0, inside_mask=0):
+        w, x, y, z = quaternion
+        pitch, yaw, roll = euler
+        tx, ty, tz = tip
+        PACKET.pack_into(self._buffer, 0, TELEMETRY_MAGIC, self.sequence, timestamp, w, x, y, z, pitch, yaw, roll,
+                         tx, ty, tz, flags, inside_count, inside_mask)
+        self.sequence = (self.sequence + 1) & 0xFFFFFFFF
+        try:
+            self._socket.sendto(self._buffer, self._target)
+            self.sent += 1
+        except OSError:
+            # No listener yet (ECONNREFUSED/ENOENT) or the receiver is behind: drop the sample.
+            self.dropped += 1
+
+    def close(self):
+        self._socket.close()
+
+
+class TelemetryReader:
+    """Subscriber side: binds the address and yields TelemetrySample tuples."""
+
+    def __init__(self, address=DEFAULT_ADDRESS, timeout=None):
+        family, self._target = parse_address(address)
+        if family != socket.AF_INET and os.path.exists(self._target):
+            os.unlink(self._target)
+        self._socket = socket.socket(family, socket.SOCK_DGRAM)
+        self._socket.bind(self._target)
+        self._socket.settimeout(timeout)
+        self.lost = 0
+        self._last_sequence = None
+
+    def read(self):
+        """Blocks for the next sample (raises socket.timeout after `timeout`). Counts sequence gaps in `lost`."""
+        while True:
+            data = self._socket.recv(PACKET.size)
+            if len(data) != PACKET.size:
+                continue
+            try:
+                sample = unpack_sample(data)
+            except ValueError:
+                continue
+            if self._last_sequence is not None:
+                self.lost += (sample.sequence - self._last_sequence - 1) & 0xFFFFFFFF
+            self._last_sequence = sample.sequence
+            return sample
+
+    def __iter__(self):
+        while True:
+            yield self.read()
+
+    def close(self):
+        self._socket.close()
+        if not isinstance(self._target, tuple) and os.path.exists(self._target):
+            os.unlink(self._target)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print the PyDualM2K telemetry stream.")
+    parser.add_argument("address", nargs='?', default=DEFAULT_ADDRESS,
+                        help="udp://host:port or unix:///path (default: %(default)s)")
+    args = parser.parse_args(argv)
+    reader = TelemetryReader(args.address)
+    print(f"Listening on {args.address} ...")
+    try:
+        for sample in reader:
+            pitch, yaw, roll = sample.euler
+            tx, ty, tz = sample.tip
+            print(f"#{sample.sequence:<8} t={sample.timestamp:10.3f}  P/Y/R {pitch:7.1f} {yaw:7.1f} {roll:7.1f}  "
+                  f"tip {tx:6.2f} {ty:6.2f} {tz:6.2f}  inside {sample.inside_count}  lost {reader.lost}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+# In test_quaternion_math.py
+"""
+Property checks for quaternion_math: the scalar and batch APIs agree on random inputs, and the
+basic algebra holds. Run with pytest; `python benchmark.py --check` runs the same tests.
+"""
+import numpy as np
+
+from quaternion_math import quaternion_multiply, quaternion_inverse, rotate_point_by_quaternion, quaternion_slerp, \
+    quaternion_to_euler, euler_to_quaternion, quaternion_multiply_batch, quaternion_inverse_batch, \
+    rotate_points_by_quaternion_batch, quaternion_slerp_batch, quaternion_to_euler_batch, euler_to_quaternion_batch, \
+    constrain_euler_angle, angle_difference
+
+SEED = 1234
+TRIALS = 500
+TOLERANCE = 1e-9
+
+
+def random_unit_quaternions(rng, count):
+    q = rng.normal(size=(count, 4))
+    return q / np.linalg.norm(q, axis=1, keepdims=True)
+
+
+_rng = np.random.default_rng(SEED)
+Q1 = random_unit_quaternions(_rng, TRIALS)
+Q2 = random_unit_quaternions(_rng, TRIALS)
+POINTS = _rng.normal(size=(TRIALS, 3))
+T = _rng.uniform(0.0, 1.0, size=TRIALS)
+# Keep yaw away from +/-90 degrees, where the Euler decomposition is not unique.
+ANGLES = np.column_stack((_rng.uniform(-179, 179, TRIALS), _rng.uniform(-85, 85, TRIALS),
+                          _rng.uniform(-179, 179, TRIALS)))
+LOCK_TARGETS = np.column_stack((_rng.uniform(-179, 179, TRIALS), _rng.uniform(-85, 85, TRIALS),
+                                _rng.uniform(-179, 179, TRIALS)))
+
+
+def assert_close(name, actual, expected):
+    error = float(np.max(np.abs(np.asarray(actual, dtype=float) - np.asarray(expected, dtype=float))))
+    assert error <= TOLERANCE, f"{name}: max error {error:.3e}"
+
+
+def test_multiply_scalar_matches_batch():
+    assert_close("multiply scalar == batch", [quaternion_multiply(a, b) for a, b in zip(Q1, Q2)],
+                 quaternion_multiply_batch(Q1, Q2))
+
+
+def test_inverse():
+    assert_close("inverse scalar == batch", [quaternion_inverse(a) for a in Q1], quaternion_inverse_batch(Q1))
+    assert_close("q * q^-1 == identity", quaternion_multiply_batch(Q1, quaternion_inverse_batch(Q1)),
+                 np.tile([1.0, 0.0, 0.0, 0.0], (TRIALS, 1)))
+
+
+def test_rotate():
+    rotated = rotate_points_by_quaternion_batch(POINTS, Q1)
+    assert_close("rotate scalar == batch", [rotate_point_by_quaternion(p, q) for p, q in zip(POINTS, Q1)], rotated)
+    sandwich = quaternion_multiply_batch(quaternion_multiply_batch(Q1, np.column_stack((np.zeros(TRIALS), POINTS))),
+                                         quaternion_inverse_batch(Q1))[:, 1:]
+    assert_close("rotate == q * p * q^-1", rotated, sandwich)
+    assert_close("rotate preserves length", np.linalg.norm(rotated, axis=1), np.linalg.norm(POINTS, axis=1))
+
+
+def test_euler():
+    assert_close("euler->quat scalar == batch", [euler_to_quaternion(*a) for a in ANGLES],
+                 euler_to_quaternion_batch(ANGLES[:, 0], ANGLES[:, 1], ANGLES[:, 2]))
+    assert_close("quat->euler scalar == batch", [quaternion_to_euler(q) for q in Q1], quaternion_to_euler_batch(Q1))
+    assert_close("euler round trip", quaternion_to_euler_batch(euler_to_quaternion_batch(
+        ANGLES[:, 0], ANGLES[:, 1], ANGLES[:, 2])), ANGLES)
+
+
+def test_slerp():
+    assert_close("slerp scalar == batch", [quaternion_slerp(a, b, s) for a, b, s in zip(Q1, Q2, T)],
+                 quaternion_slerp_batch(Q1, Q2, T))
+    assert_close("slerp t=0 endpoint", np.abs(np.sum(quaternion_slerp_batch(Q1, Q2, 0.0) * Q1, axis=1)),
+                 np.ones(TRIALS))
+    assert_close("slerp t=1 endpoint", np.abs(np.sum(quaternion_slerp_batch(Q1, Q2, 1.0) * Q2, axis=1)),
+                 np.ones(TRIALS))
+
+
+def test_lock_changes_only_that_angle():
+    """Locking one axis (as the sensor pipeline does) must change only that Euler angle."""
+    for axis_index, axis_name in enumerate(('pitch', 'yaw', 'roll')):
+        errors = []
+        for a, target in zip(ANGLES, LOCK_TARGETS[:, axis_index]):
+            locked, current = constrain_euler_angle(euler_to_quaternion(*a), axis_index, target)
+            expected = a.copy()
+            expected[axis_index] = target
+            errors.append([angle_difference(got, want) for got, want in zip(quaternion_to_euler(locked), expected)])
+            errors[-1].append(angle_difference(current, a[axis_index]))
+        assert_close(f"locking {axis_name} changes only {axis_name}", np.array(errors), np.zeros((TRIALS, 4)))
@@ -0,0 +1,108 @@
+# In ui_scheduler.py
+"""
+Runs the GUI's periodic work as separate tasks, each at its own rate, on the Tk event loop.
+
+Each tick runs the tasks that are due, most important first, and then sleeps (root.after) until
+the next one is due. A tick is timed as it goes: once it has used up `budget`, due LOW priority
+tasks are pushed to the next tick instead, so widget and stats refreshes give way to the engine
+and rendering. A LOW task is deferred at most MAX_DEFERRALS times in a row, so it still runs
+under sustained load.
+
+stats() reports the measured tick (frame) time and each task's average/max run time.
+"""
+import sys
+import time
+from collections import deque
+
+HIGH, NORMAL, LOW = 0, 1, 2
+MAX_DEFERRALS = 4
+FRAME_SAMPLES = 240
+
+
+class UiTask:
+    def __init__(self, name, callback, rate, priority):
+        self.name = name
+        self.callback = callback
+        self.interval = 1.0 / rate
+        self.priority = priority
+        self.next_due = 0.0
+        self.deferrals = 0
+        self.runs = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.deferred_total = 0
+
+
+class UiScheduler:
+    def __init__(self, root, budget=0.012):
+        self.root = root
+        self.budget = budget
+        self.tasks = []
+        self.running = False
+        self._after_id = None
+        self._frame_times = deque(maxlen=FRAME_SAMPLES)
+
+    def add(self, name, callback, rate, priority=NORMAL):
+        """Runs callback() about `rate` times per second."""
+        task = UiTask(name, callback, rate, priority)
+        self.tasks.append(task)
+        self.tasks.sort(key=lambda t: t.priority)
+        return task
+
+    def start(self, delay_ms=0):
+        self.running = True
+        self._after_id = self.root.after(delay_ms, self._tick)
+
+    def stop(self):
+        self.running = False
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _tick(self):
+        self._after_id = None
+        if not self.running:
+            return
+        start = time.perf_counter()
+        for task in self.tasks:
+            now = time.perf_counter()
+            if now < task.next_due:
+                continue
+            if task.priority == LOW and now - start > self.budget and task.deferrals < MAX_DEFERRALS:
+                task.deferrals += 1
+                task.deferred_total += 1
+                continue
+            task.deferrals = 0
+            # Keep the cadence, but don't try to catch up on runs missed during a stall.
+            task.next_due += task.interval
+            if task.next_due <= now:
+                task.next_due = now + task.interval
+            try:
+                task.callback()
+            except Exception:
+                # Report like any Tk callback error, but keep the other tasks and the loop running.
+                self.root.report_callback_exception(*sys.exc_info())
+            finally:
+                elapsed = time.perf_counter() - now
+                task.runs += 1
+                task.total_time += elapsed
+                task.max_time = max(task.max_time, elapsed)
+        end = time.perf_counter()
+        self._frame_times.append(end - start)
+        if not self.running:
+            return
+        next_due = min(task.next_due for task in self.tasks)
+        self._after_id = self.root.after(max(1, int((next_due - end) * 1000)), self._tick)
+
+    def stats(self):
+        """Frame-time and per-task timings in ms."""
+        frames = list(self._frame_times)
+        return {
+            'frame_ms': sum(frames) / len(frames) * 1000.0 if frames else 0.0,
+            'max_frame_ms': max(frames) * 1000.0 if frames else 0.0,
+            'budget_ms': self.budget * 1000.0,
+            'tasks': {task.name: {'avg_ms': task.total_time / task.runs * 1000.0 if task.runs else 0.0,
+                                  'max_ms': task.max_time * 1000.0, 'runs': task.runs,
+                                  'deferred': task.deferred_total}
+                      for task in self.tasks},
+        }
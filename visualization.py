@@ -37,10 +37,21 @@ def draw_text_2d(x, y, text, font=GLUT.GLUT_BITMAP_HELVETICA_18, center=False, w
         GLUT.glutBitmapCharacter(font, ord(char))
 
 
+# Color of the newest trail vertex; older vertices fade out towards transparent.
+TRAIL_COLOR = (1.0, 0.55, 0.1)
+
+
 class VisFrame(OpenGLFrame):
     def __init__(self, *args, **kw):
         super().__init__(*args, **kw)
         self.quadric = None
+        # Preallocated client-side vertex/color arrays for the motion trail, refilled each frame
+        # and drawn with a single glDrawArrays call.
+        capacity = global_state.motion_history.capacity
+        self.trail_vertices = np.zeros((capacity, 3), dtype=np.float32)
+        self.trail_colors = np.zeros((capacity, 4), dtype=np.float32)
+        self.trail_colors[:, :3] = TRAIL_COLOR
+        self.trail_length = 0
 
     def initgl(self):
         if self.height <= 0:
@@ -76,10 +87,15 @@ class VisFrame(OpenGLFrame):
             cam_roll, cam_zoom = global_state.camera_roll, global_state.camera_zoom
             gyro_pitch, gyro_yaw, gyro_roll = global_state.gyro_rotation
             dimensions = global_state.object_dimensions
-            ref_points = list(global_state.reference_points)
+            points = global_state.reference_points
+            ref_points = (list(points.ids), points.positions.copy(), points.hit.copy(), points.active.copy())
             tip_pos = global_state.controller_tip_position
             show_labels = global_state.show_ref_point_labels
             is_calibrated = global_state.is_calibrated
+            if global_state.show_motion_trail:
+                self.update_trail(global_state.motion_history, global_state.motion_trail_seconds)
+            else:
+                self.trail_length = 0
 
         glPushMatrix()
         try:
@@ -90,6 +106,7 @@ class VisFrame(OpenGLFrame):
 
             if is_calibrated:
                 self.draw_reference_points(ref_points, show_labels)
+                self.draw_motion_trail()
                 self.draw_controller_tip(tip_pos)
 
                 glPushMatrix()
@@ -225,23 +242,57 @@ class VisFrame(OpenGLFrame):
         draw_prism(right_handle_vertices, handle_faces)
 
     def draw_reference_points(self, points, show_labels):
-        for point in points:
+        """`points` is (ids, positions, hit, active) copied out of the reference point store."""
+        ids, positions, hit, active = points
+        for point_id, (x, y, z), is_hit, is_active in zip(ids, positions.tolist(), hit.tolist(), active.tolist()):
             glPushMatrix()
             try:
-                x, y, z = point['position']
                 glTranslatef(x, y, z)
-                if point['hit']:
+                if is_hit:
                     glColor3f(1.0, 1.0, 0.0)
-                elif not point.get('is_active', True):
+                elif not is_active:
                     glColor3f(0.5, 0.2, 0.8)
                 else:
                     glColor3f(0.0, 0.8, 0.8)
                 gluSphere(self.quadric, 0.05, 32, 32)
                 if show_labels:
-                    draw_text_3d(x, y, z, point['id'], point['hit'])
+                    draw_text_3d(x, y, z, point_id, is_hit)
             finally:
                 glPopMatrix()
 
+    def update_trail(self, history, duration):
+        """
+        Copies the last `duration` seconds of tip positions out of the motion history into the
+        trail arrays, with alpha fading linearly from 1 at the newest sample to 0 at `duration` seconds old.
+        Must be called with controller_lock held, since the history views are live.
+        """
+        if not len(history) or duration <= 0:
+            self.trail_length = 0
+            return
+        times, tips = history.window(history.times(1)[0] - duration, 'tip')
+        count = len(times)
+        self.trail_vertices[:count] = tips
+        np.subtract(times, times[-1] - duration, out=self.trail_colors[:count, 3], casting='unsafe')
+        self.trail_colors[:count, 3] *= 1.0 / duration
+        self.trail_length = count
+
+    def draw_motion_trail(self):
+        count = self.trail_length
+        if count < 2:
+            return
+        glDisable(GL_LIGHTING)
+        glLineWidth(2.0)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        try:
+            glVertexPointer(3, GL_FLOAT, 0, self.trail_vertices)
+            glColorPointer(4, GL_FLOAT, 0, self.trail_colors)
+            glDrawArrays(GL_LINE_STRIP, 0, count)
+        finally:
+            glDisableClientState(GL_COLOR_ARRAY)
+            glDisableClientState(GL_VERTEX_ARRAY)
+            glEnable(GL_LIGHTING)
+
     def draw_controller_tip(self, position):
         glPushMatrix()
         try: